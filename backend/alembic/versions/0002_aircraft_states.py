@@ -0,0 +1,48 @@
+"""Add aircraft_states table
+
+Revision ID: 0002_aircraft_states
+Revises: 0001_initial_migration
+Create aircraft_states table keyed by icao24 for bulk OpenSky upserts
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_aircraft_states'
+down_revision = '0001_initial_migration'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'aircraft_states',
+        sa.Column('id', sa.Integer(), primary_key=True, nullable=False),
+        sa.Column('icao24', sa.String(), nullable=False),
+        sa.Column('callsign', sa.String(), nullable=True),
+        sa.Column('origin_country', sa.String(), nullable=True),
+        sa.Column('time_position', sa.Integer(), nullable=True),
+        sa.Column('last_contact', sa.Integer(), nullable=True),
+        sa.Column('longitude', sa.Float(), nullable=True),
+        sa.Column('latitude', sa.Float(), nullable=True),
+        sa.Column('baro_altitude', sa.Float(), nullable=True),
+        sa.Column('on_ground', sa.Boolean(), nullable=True),
+        sa.Column('velocity', sa.Float(), nullable=True),
+        sa.Column('heading', sa.Float(), nullable=True),
+        sa.Column('vertical_rate', sa.Float(), nullable=True),
+        sa.Column('sensors', sa.JSON(), nullable=True),
+        sa.Column('geo_altitude', sa.Float(), nullable=True),
+        sa.Column('squawk', sa.String(), nullable=True),
+        sa.Column('spi', sa.Boolean(), nullable=True),
+        sa.Column('position_source', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_aircraft_states_icao24', 'aircraft_states', ['icao24'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_aircraft_states_icao24', table_name='aircraft_states')
+    op.drop_table('aircraft_states')
@@ -0,0 +1,39 @@
+"""Add unique natural key index to competitor_flights
+
+Revision ID: 0003_competitor_flight_natural_key
+Revises: 0002_aircraft_states
+Remove duplicate competitor flights and index (flight_number, departure_time)
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_competitor_flight_natural_key'
+down_revision = '0002_aircraft_states'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep the most recent row of any duplicates so the unique index can be built
+    op.execute(
+        """
+        DELETE FROM competitor_flights
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM competitor_flights
+            GROUP BY flight_number, departure_time
+        )
+        """
+    )
+    op.create_index(
+        'uq_competitor_flights_flight_number_departure_time',
+        'competitor_flights',
+        ['flight_number', 'departure_time'],
+        unique=True,
+    )
+
+
+def downgrade():
+    op.drop_index('uq_competitor_flights_flight_number_departure_time', table_name='competitor_flights')
@@ -0,0 +1,37 @@
+"""
+Standalone live-traffic ingest worker.
+
+Run one or more with `python -m src.ingest_worker` next to the API
+(started with INGEST_IN_API=false). Leader election ensures exactly one
+worker polls the providers, writes positions and broadcasts; the others
+stand by and take over if it exits.
+"""
+import asyncio
+import logging
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from .services.flight_update_service import update_flight_positions, close_live_traffic_clients
+from .services.leader_election import create_leader_lock, run_as_leader
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+async def main():
+    try:
+        await run_as_leader(update_flight_positions, create_leader_lock())
+    finally:
+        # Release pooled provider connections
+        await close_live_traffic_clients()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("Ingest worker stopped")
@@ -10,9 +10,16 @@ load_dotenv()
 
 from .config.db import engine, Base
 # Import all models to ensure they are registered with SQLAlchemy
-from .models import flight, schedule, competitor, alert, aircraft
+from .models import flight, schedule, competitor, alert, aircraft, aircraft_state
 from .routers import flights, schedules, competitors, alerts, reports, websockets, flight_data
-from .services.flight_update_service import update_flight_positions
+from .services.flight_update_service import update_flight_positions, close_live_traffic_clients, ingest_pipeline
+from .services.flight_data_service import close_shared_async_clients, flight_details_cache
+from .services.credit_budget import fr24_credit_budget
+from .services.resilience import resilience_metrics
+from .services.leader_election import create_leader_lock, run_as_leader
+from .services.snapshot_persistence import load_snapshot, snapshot_path
+from .services.shared_snapshot import SHARED_SNAPSHOT_ENABLED, alerts_reader, fleet_reader, live_traffic_reader, relay_alerts, relay_snapshots
+from .websockets.flight_socket import flight_manager
 
 # Create the database tables
 Base.metadata.create_all(bind=engine)
@@ -49,11 +56,61 @@ def read_root():
         "redoc": "/redoc"
     }
 
+@app.get("/api/ingest/metrics")
+def read_ingest_metrics():
+    """Per-stage latency, throughput and queue depth of the live-traffic ingest pipeline."""
+    return ingest_pipeline.metrics()
+
+@app.get("/api/credits")
+def read_credit_budget():
+    """FlightRadar24 API credits spent and left in the current window, per endpoint and consumer."""
+    return fr24_credit_budget.stats()
+
+@app.get("/api/cache/metrics")
+def read_cache_metrics():
+    """Size, hits, misses and coalesced lookups of this worker's flight details cache."""
+    return flight_details_cache.stats()
+
+@app.get("/api/upstream/metrics")
+def read_upstream_metrics():
+    """Circuit breaker state, retries and throttling of every upstream provider."""
+    return resilience_metrics()
+
+@app.get("/api/websockets/metrics")
+def read_websocket_metrics():
+    """Connections, queued frames and conflated frames of this worker's WebSocket clients."""
+    return flight_manager.metrics()
+
+# Whether API workers take part in ingest leader election; set to false when
+# a standalone worker (python -m src.ingest_worker) does the ingestion
+INGEST_IN_API = os.getenv("INGEST_IN_API", "true").lower() in ("1", "true", "yes")
+
 # Start background tasks
 @app.on_event("startup")
 async def startup_event():
-    # Start the flight position update task
-    asyncio.create_task(update_flight_positions())
+    # Serve the last known fleet positions to the first clients after a restart
+    warm = load_snapshot(snapshot_path())
+    if warm is not None and warm.fleet:
+        flight_manager.last_flight_data = warm.fleet
+    
+    # Start the flight position update task in the elected leader only, so N
+    # uvicorn workers still mean one poller, one writer and one broadcaster
+    if INGEST_IN_API:
+        asyncio.create_task(run_as_leader(update_flight_positions, create_leader_lock()))
+    
+    # Relay the leader's fleet updates and live traffic (for viewport
+    # subscriptions), and alerts created on any worker, to this worker's
+    # WebSocket clients
+    if SHARED_SNAPSHOT_ENABLED:
+        asyncio.create_task(relay_snapshots(fleet_reader, flight_manager))
+        asyncio.create_task(relay_snapshots(live_traffic_reader, flight_manager, method='broadcast_traffic'))
+        asyncio.create_task(relay_alerts(alerts_reader, flight_manager))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Release pooled provider connections
+    await close_live_traffic_clients()
+    await close_shared_async_clients()
 
 if __name__ == "__main__":
     uvicorn.run("src.main:app", host="0.0.0.0", port=8000, reload=True)
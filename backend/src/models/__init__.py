@@ -2,3 +2,4 @@ from .flight import Flight
 from .competitor import CompetitorFlight
 from .schedule import Schedule
 from .alert import Alert
+from .aircraft_state import AircraftState
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, JSON
+from ..config.db import Base
+from datetime import datetime
+
+class AircraftState(Base):
+    """Latest OpenSky state vector for each transponder (icao24)."""
+    __tablename__ = 'aircraft_states'
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    icao24 = Column(String, unique=True, index=True, nullable=False)
+    callsign = Column(String, nullable=True)
+    origin_country = Column(String, nullable=True)
+    time_position = Column(Integer, nullable=True)
+    last_contact = Column(Integer, nullable=True)
+    longitude = Column(Float, nullable=True)
+    latitude = Column(Float, nullable=True)
+    baro_altitude = Column(Float, nullable=True)
+    on_ground = Column(Boolean, nullable=True)
+    velocity = Column(Float, nullable=True)
+    heading = Column(Float, nullable=True)
+    vertical_rate = Column(Float, nullable=True)
+    sensors = Column(JSON, nullable=True)
+    geo_altitude = Column(Float, nullable=True)
+    squawk = Column(String, nullable=True)
+    spi = Column(Boolean, nullable=True)
+    position_source = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<AircraftState {self.icao24} ({self.callsign})>"
@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Index
 from ..config.db import Base
 from datetime import datetime
 
 class CompetitorFlight(Base):
     __tablename__ = 'competitor_flights'
+    __table_args__ = (
+        # Natural key used to upsert the daily competitor dump
+        Index('uq_competitor_flights_flight_number_departure_time', 'flight_number', 'departure_time', unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     operator = Column(String, nullable=False)
@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Body
+import asyncio
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Body
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from datetime import datetime
@@ -7,6 +9,8 @@ from ..config.db import get_db
 from ..models.alert import Alert
 from ..schemas.alert import AlertCreate, AlertResponse
 from ..services import alert_service
+from ..services.shared_snapshot import ALERTS_SEGMENT, SHARED_SNAPSHOT_ENABLED, append_alert
+from ..websockets.flight_socket import flight_manager
 
 router = APIRouter(
     prefix="/api/alerts",
@@ -14,6 +18,14 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+async def push_alert(alert: dict):
+    """
+    Push an alert to the WebSocket clients of every API worker through the
+    shared alert log, or to this worker's clients if it is not available.
+    """
+    if not (SHARED_SNAPSHOT_ENABLED and await asyncio.to_thread(append_alert, ALERTS_SEGMENT, alert)):
+        await flight_manager.broadcast_alert(alert)
+
 @router.get("/", response_model=List[AlertResponse])
 def get_alerts(
     resolved: Optional[bool] = Query(None, description="Filter by resolution status"),
@@ -49,13 +61,15 @@ def get_alert(
 @router.post("/", response_model=AlertResponse, status_code=201)
 def create_alert(
     alert_data: AlertCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
-    Create a new alert.
+    Create a new alert and push it to connected WebSocket clients.
     """
     try:
         alert = alert_service.create_alert(db, alert_data.dict())
+        background_tasks.add_task(push_alert, alert_service.alert_to_dict(alert))
         return alert
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+from ..services.credit_budget import CreditBudgetExhausted
 from ..services.flight_data_service import FlightDataService
+from ..services.shared_snapshot import live_traffic_reader
 from ..schemas.flight import FlightResponse, FlightCreate, FlightUpdate
 
 router = APIRouter(prefix="/api/flights", tags=["flights"])
 
+CREDIT_BUDGET_EXHAUSTED = "API credit budget exhausted; try again when the budget window resets"
+
 def get_flight_service() -> FlightDataService:
     """Dependency injection for FlightDataService."""
     return FlightDataService()
@@ -13,14 +17,20 @@ def get_flight_service() -> FlightDataService:
 @router.get("/live", response_model=List[FlightResponse])
 async def get_live_flights(
     bounds: Optional[str] = Query(None, description="Bounding box coordinates (lat1,lat2,lon1,lon2)"),
+    tiled: bool = Query(False, description="Fetch large bounds as concurrent tiles"),
     service: FlightDataService = Depends(get_flight_service)
 ):
     """
     Get live flight data within specified bounds.
-    If no bounds are specified, returns all available flights.
+    If no bounds are specified, returns all available flights, served from the
+    ingest leader's shared snapshot when available.
     """
+    if bounds is None and not tiled:
+        payload = live_traffic_reader.read()
+        if payload is not None:
+            return Response(content=payload, media_type="application/json")
     try:
-        flights = service.get_live_flights(bounds)
+        flights = await service.get_live_flights_async(bounds, tiled)
         return flights
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -32,10 +42,14 @@ async def get_flight_details(
 ):
     """Get detailed information about a specific flight."""
     try:
-        flight_details = service.get_flight_details(flight_id)
+        flight_details = await service.get_flight_details_async(flight_id)
         if not flight_details:
             raise HTTPException(status_code=404, detail="Flight not found")
         return flight_details
+    except CreditBudgetExhausted:
+        raise HTTPException(status_code=429, detail=CREDIT_BUDGET_EXHAUSTED)
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -47,10 +61,14 @@ async def get_historical_flight_data(
 ):
     """Get historical data for a specific flight on a given date."""
     try:
-        historical_data = service.get_historical_flight_data(flight_id, date)
+        historical_data = await service.get_historical_flight_data_async(flight_id, date)
         if not historical_data:
             raise HTTPException(status_code=404, detail="Historical flight data not found")
         return historical_data
+    except CreditBudgetExhausted:
+        raise HTTPException(status_code=429, detail=CREDIT_BUDGET_EXHAUSTED)
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
-from ..services.flight_service import get_active_flights
+from ..services.flight_service import active_flights_payload
+from ..services.shared_snapshot import ACTIVE_FLIGHTS_MAX_AGE_SECONDS, active_flights_reader
 from ..config.db import get_db
 
 router = APIRouter(
@@ -12,9 +13,14 @@ router = APIRouter(
 def active_flights(db: Session = Depends(get_db)):
     """
     Retrieve active flight data.
+    Served from the ingest leader's shared snapshot when available, so API
+    workers do not query the database. Without a recent snapshot (e.g. no
+    leader is running) the database is queried.
     """
+    payload = active_flights_reader.read(max_age=ACTIVE_FLIGHTS_MAX_AGE_SECONDS)
+    if payload is not None:
+        return Response(content=payload, media_type="application/json")
     try:
-        flights = get_active_flights(db)
-        return {"flights": flights}
+        return active_flights_payload(db)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,55 +1,61 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-from sqlalchemy.orm import Session
-from typing import List
-import asyncio
+import json
+import logging
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
-from ..config.db import get_db
 from ..websockets.flight_socket import flight_manager
-from ..services.flight_service import get_active_flights
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/ws",
     tags=["websockets"],
 )
 
+def handle_client_message(websocket: WebSocket, message: str):
+    """
+    Apply a client message. Besides heartbeats (ignored), clients send:
+
+        "resync" or {"type": "resync"}      request a full keyframe after a sequence gap
+        {"type": "subscribe", "bounds": {"south": .., "west": .., "north": .., "east": ..}, "zoom": z}
+                                            receive only the live traffic inside a viewport
+        {"type": "unsubscribe"}             return to the fleet stream
+    """
+    if message.strip().strip('"').lower() == "resync":
+        flight_manager.resync(websocket)
+        return
+    try:
+        request = json.loads(message)
+    except ValueError:
+        return
+    if not isinstance(request, dict):
+        return
+
+    message_type = request.get("type")
+    if message_type == "resync":
+        flight_manager.resync(websocket)
+    elif message_type == "unsubscribe":
+        flight_manager.unsubscribe(websocket)
+    elif message_type == "subscribe":
+        try:
+            bounds = request["bounds"]
+            flight_manager.subscribe(
+                websocket,
+                float(bounds["south"]), float(bounds["west"]), float(bounds["north"]), float(bounds["east"]),
+                int(request.get("zoom", 0)),
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Ignoring invalid subscribe message: {e}")
+
 @router.websocket("/flights")
-async def websocket_flights(websocket: WebSocket, db: Session = Depends(get_db)):
+async def websocket_flights(websocket: WebSocket):
     await flight_manager.connect(websocket)
     try:
         while True:
-            # Wait for any message from the client (can be used as a heartbeat)
-            await websocket.receive_text()
-            
-            # Get the latest flight data
-            active_flights = get_active_flights(db)
-            
-            # Convert to dict for JSON serialization
-            flight_data = {
-                "flights": [
-                    {
-                        "id": flight.id,
-                        "flight_id": flight.flight_id,
-                        "tail_number": flight.tail_number,
-                        "status": flight.status,
-                        "departure_time": flight.departure_time.isoformat() if flight.departure_time else None,
-                        "arrival_time": flight.arrival_time.isoformat() if flight.arrival_time else None,
-                        "current_position_lat": flight.current_position_lat,
-                        "current_position_lon": flight.current_position_lon,
-                        "altitude": flight.altitude,
-                        "speed": flight.speed,
-                        "heading": flight.heading
-                    }
-                    for flight in active_flights
-                ]
-            }
-            
-            # Send the data to the client
-            await websocket.send_json(flight_data)
-            
-            # Sleep for a short time to avoid overwhelming the database
-            await asyncio.sleep(5)
+            message = await websocket.receive_text()
+            handle_client_message(websocket, message)
     except WebSocketDisconnect:
         flight_manager.disconnect(websocket)
     except Exception as e:
         print(f"WebSocket error: {e}")
-        flight_manager.disconnect(websocket) 
\ No newline at end of file
+        flight_manager.disconnect(websocket)
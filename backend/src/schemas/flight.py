@@ -33,6 +33,10 @@ class FlightResponse(FlightBase):
     """Schema for flight response data."""
     flight_id: str
     last_updated: datetime
+    smoothed_latitude: Optional[float] = None
+    smoothed_longitude: Optional[float] = None
+    velocity_north: Optional[float] = None
+    velocity_east: Optional[float] = None
     
     class Config:
         orm_mode = True
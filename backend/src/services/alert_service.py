@@ -30,6 +30,22 @@ def create_alert(db: Session, alert_data: dict):
     db.refresh(db_alert)
     return db_alert
 
+def alert_to_dict(alert: Alert) -> dict:
+    """
+    Convert an alert to a JSON-serializable dict, e.g. for WebSocket clients.
+    """
+    return {
+        "id": alert.id,
+        "title": alert.title,
+        "description": alert.description,
+        "alert_type": alert.alert_type.value if alert.alert_type is not None else None,
+        "severity": alert.severity.value if alert.severity is not None else None,
+        "flight_id": alert.flight_id,
+        "aircraft_id": alert.aircraft_id,
+        "created_at": alert.created_at.isoformat() if alert.created_at else None,
+        "resolved": alert.resolved,
+    }
+
 def resolve_alert(db: Session, alert_id: int):
     """
     Mark an alert as resolved.
@@ -1,89 +1,112 @@
 import asyncio
 import logging
-from typing import List, Dict, Any
+import time
+from typing import List, Optional, Tuple
 
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
-from .open_sky_client import OpenSkyClient
+from .open_sky_client import AsyncOpenSkyClient
+from .state_vector_decoder import StateVector
+from .bulk_upsert import bulk_upsert, UpsertResult
+from .polling_scheduler import PollingScheduler
+from .stale_filter import HighWaterMarks
 from ..config.db import SessionLocal
-from ..models.flight import Flight
+from ..models.aircraft_state import AircraftState
 
 logger = logging.getLogger(__name__)
 
+# High-water marks of aircraft not heard from for this long are dropped
+HIGH_WATER_MARK_RETENTION_SECONDS = 3600
+
 class FlightDataService:
     """
     Background service to fetch flight data periodically and store it in the database.
     """
-    def __init__(self, interval: int = 300):
+    def __init__(self, interval: int = 300, scheduler: Optional[PollingScheduler] = None):
         """
         Initialize the service.
 
         Args:
-            interval: Time between fetches in seconds (default: 300 seconds = 5 minutes)
+            interval: Base time between fetches in seconds (default: 300 seconds = 5 minutes)
+            scheduler: Optional polling scheduler; by default one global region is
+                polled at the base interval, backing off when quiet or at night
         """
         self.interval = interval
-        self.client = OpenSkyClient()
+        self.scheduler = scheduler or PollingScheduler(
+            base_interval=interval,
+            min_interval=interval,
+            max_interval=interval * 4
+        )
+        self.client = AsyncOpenSkyClient()
+        self.last_result: Optional[UpsertResult] = None
+        # Newest last_contact stored per aircraft; older state vectors are dropped
+        self.high_water_marks = HighWaterMarks()
 
-    async def fetch_and_store_flights(self):
+    async def fetch_and_store_flights(self, bounds: Optional[Tuple[float, float, float, float]] = None) -> Optional[UpsertResult]:
         """
-        Fetch flights and store them in the database.
+        Fetch flights and upsert them into the database in batches.
+
+        Args:
+            bounds: Optional bounding box (lat1, lon1, lat2, lon2) to fetch; None means global
+
+        Returns:
+            Rows inserted and updated in this cycle, or None if nothing was stored.
         """
         try:
-            flights: List[Dict[str, Any]] = self.client.get_live_flights()
+            flights: List[StateVector] = await self.client.get_state_vectors(bounds=bounds)
             if not flights:
                 logger.warning("No flights fetched from OpenSky API.")
                 return
 
-            db: Session = SessionLocal()
-            try:
-                for flight_data in flights:
-                    # Check if flight already exists to prevent duplicates
-                    existing_flight = db.query(Flight).filter_by(icao24=flight_data.get("icao24")).first()
-                    if existing_flight:
-                        # Update existing flight data
-                        for key, value in flight_data.items():
-                            setattr(existing_flight, key, value)
-                    else:
-                        # Create new flight entry
-                        flight = Flight(
-                            icao24=flight_data.get("icao24"),
-                            callsign=flight_data.get("callsign"),
-                            origin_country=flight_data.get("origin_country"),
-                            time_position=flight_data.get("time_position"),
-                            last_contact=flight_data.get("last_contact"),
-                            longitude=flight_data.get("longitude"),
-                            latitude=flight_data.get("latitude"),
-                            baro_altitude=flight_data.get("baro_altitude"),
-                            on_ground=flight_data.get("on_ground"),
-                            velocity=flight_data.get("velocity"),
-                            heading=flight_data.get("heading"),
-                            vertical_rate=flight_data.get("vertical_rate"),
-                            sensors=flight_data.get("sensors"),
-                            geo_altitude=flight_data.get("geo_altitude"),
-                            squawk=flight_data.get("squawk"),
-                            spi=flight_data.get("spi"),
-                            position_source=flight_data.get("position_source"),
-                        )
-                        db.add(flight)
-                db.commit()
-                logger.info(f"Stored/Updated {len(flights)} flights in the database.")
-            except SQLAlchemyError as e:
-                db.rollback()
-                logger.error(f"Database error while storing flights: {e}")
-            finally:
-                db.close()
+            # Drop state vectors that are not newer than what was already stored
+            fresh = self.high_water_marks.filter(flights, lambda state: state.icao24, lambda state: state.last_contact)
+            self.high_water_marks.forget_older_than(time.time() - HIGH_WATER_MARK_RETENTION_SECONDS)
+
+            # The database writes run off the event loop
+            return await asyncio.to_thread(self._store_flights, fresh, len(flights))
 
         except Exception as e:
             logger.error(f"Unexpected error in fetch_and_store_flights: {e}")
 
+    def _store_flights(self, fresh: List[StateVector], received: int) -> Optional[UpsertResult]:
+        """Upsert the fresh state vectors and commit, in a worker thread."""
+        db: Session = SessionLocal()
+        try:
+            # The version guard also protects against other writers and restarts
+            result = bulk_upsert(
+                db,
+                AircraftState,
+                (state._asdict() for state in fresh),
+                key_columns=["icao24"],
+                version_column="last_contact"
+            )
+            db.commit()
+            self.last_result = result
+            logger.info(
+                f"Stored {result.inserted + result.updated} of {received} flights in the database "
+                f"({result.inserted} inserted, {result.updated} updated, "
+                f"{received - result.inserted - result.updated} stale)."
+            )
+            return result
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error(f"Database error while storing flights: {e}")
+        finally:
+            db.close()
+
     async def run(self):
         """
-        Periodically fetch and store flight data.
+        Periodically fetch and store flight data on the scheduler's cadence.
+        Each due region is fetched within its own bounds, so its traffic
+        drives its own polling interval.
         """
         while True:
-            await self.fetch_and_store_flights()
-            await asyncio.sleep(self.interval)
+            for region in self.scheduler.due_regions():
+                result = await self.fetch_and_store_flights(region.bounds)
+                traffic = result.inserted + result.updated if result else 0
+                self.scheduler.record_poll(region, traffic)
+            await asyncio.sleep(max(1, self.scheduler.seconds_until_next()))
 
 def start_flight_data_service():
     """
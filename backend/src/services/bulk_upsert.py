@@ -0,0 +1,137 @@
+import logging
+from datetime import datetime
+from typing import Dict, Any, Iterable, NamedTuple, Optional, Sequence
+
+from sqlalchemy import or_, select, tuple_
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+logger = logging.getLogger(__name__)
+
+# Rows written per INSERT ... ON CONFLICT batch
+DEFAULT_BATCH_SIZE = 1000
+
+# Dialect specific INSERT constructs that support ON CONFLICT
+_INSERT_CONSTRUCTS = {
+    'sqlite': sqlite_insert,
+    'postgresql': postgresql_insert,
+}
+
+class UpsertResult(NamedTuple):
+    """Number of rows inserted, updated and skipped as stale by a bulk upsert."""
+    inserted: int = 0
+    updated: int = 0
+    stale: int = 0
+
+    def __add__(self, other):
+        return UpsertResult(self.inserted + other.inserted, self.updated + other.updated, self.stale + other.stale)
+
+def bulk_upsert(
+    db: Session,
+    model,
+    rows: Iterable[Dict[str, Any]],
+    key_columns: Sequence[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    version_column: Optional[str] = None
+) -> UpsertResult:
+    """
+    Insert or update rows in batches using INSERT ... ON CONFLICT DO UPDATE.
+    
+    Each batch costs one SELECT (to count existing keys) and one executemany
+    INSERT, instead of a SELECT and an INSERT/UPDATE per row. Rows may be a
+    generator; only one batch is materialized at a time. Keys that are not
+    columns of the model's table are ignored. The caller is responsible for
+    committing the session.
+    
+    With a version_column (e.g. a provider timestamp), an existing row is only
+    overwritten by a strictly newer version, so out-of-order updates never
+    move a row backwards.
+    
+    Args:
+        db: Database session
+        model: Declarative model whose table is written to
+        rows: Row dictionaries keyed by column name
+        key_columns: Columns covered by a unique index identifying a row
+        batch_size: Number of rows written per statement
+        version_column: Optional column that must increase for a row to be updated
+        
+    Returns:
+        UpsertResult with the number of inserted, updated and stale rows
+        
+    Raises:
+        ValueError: If the session's dialect has no ON CONFLICT support here
+    """
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+    insert = _INSERT_CONSTRUCTS.get(dialect)
+    if insert is None:
+        raise ValueError(f"Bulk upsert is not supported for the '{dialect}' dialect")
+    
+    column_names = set(table.columns.keys())
+    result = UpsertResult()
+    
+    # Rows are consumed lazily so a large feed never has to be held in memory
+    batch: Dict[tuple, Dict[str, Any]] = {}
+    for row in rows:
+        values = {key: value for key, value in row.items() if key in column_names}
+        # Deduplicate on the natural key within a batch (last row, or newest version, wins)
+        key = tuple(values.get(name) for name in key_columns)
+        if version_column is not None and key in batch and _is_stale(batch[key].get(version_column), values.get(version_column)):
+            result += UpsertResult(stale=1)
+            continue
+        batch[key] = values
+        if len(batch) >= batch_size:
+            result += _upsert_batch(db, table, insert, batch, key_columns, version_column)
+            batch = {}
+    if batch:
+        result += _upsert_batch(db, table, insert, batch, key_columns, version_column)
+    
+    return result
+
+def _is_stale(current: Any, incoming: Any) -> bool:
+    """Whether an incoming version must not replace the current one."""
+    if current is None:
+        return False
+    return incoming is None or incoming <= current
+
+def _upsert_batch(db: Session, table, insert, batch: Dict[tuple, Dict[str, Any]], key_columns: Sequence[str],
+                  version_column: Optional[str] = None) -> UpsertResult:
+    key_cols = [table.c[key] for key in key_columns]
+    if len(key_cols) == 1:
+        lookup = [key[0] for key in batch]
+        key_expr = key_cols[0]
+    else:
+        lookup = list(batch)
+        key_expr = tuple_(*key_cols)
+    selected = key_cols + ([table.c[version_column]] if version_column else [])
+    existing = db.execute(select(*selected).where(key_expr.in_(lookup))).fetchall()
+    
+    stale = 0
+    if version_column:
+        stale = sum(
+            1 for row in existing
+            if _is_stale(row[-1], batch[tuple(row[:-1])].get(version_column))
+        )
+    
+    # executemany needs every row to carry the same set of columns
+    write_columns = sorted(set().union(*batch.values()))
+    stmt = insert(table)
+    update_set = {
+        name: stmt.excluded[name] for name in write_columns if name not in key_columns
+    }
+    if 'updated_at' in table.c and 'updated_at' not in write_columns:
+        update_set['updated_at'] = datetime.utcnow()
+    where = None
+    if version_column:
+        version = table.c[version_column]
+        where = or_(version.is_(None), stmt.excluded[version_column] > version)
+    stmt = stmt.on_conflict_do_update(index_elements=key_cols, set_=update_set, where=where)
+    
+    db.execute(stmt, [
+        {name: values.get(name) for name in write_columns}
+        for values in batch.values()
+    ])
+    
+    updated = len(existing) - stale
+    return UpsertResult(inserted=len(batch) - len(existing), updated=updated, stale=stale)
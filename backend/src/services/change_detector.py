@@ -0,0 +1,147 @@
+import math
+import os
+import time
+from typing import Any, Callable, Dict, Mapping, Optional
+
+# Horizontal movement (meters) that counts as a meaningful change
+DEFAULT_MIN_DISTANCE_METERS = 200.0
+# Altitude change (feet) that counts as a meaningful change
+DEFAULT_MIN_ALTITUDE_FEET = 100.0
+# Speed change (knots) that counts as a meaningful change
+DEFAULT_MIN_SPEED_KNOTS = 5.0
+# Heading change (degrees) that counts as a meaningful change
+DEFAULT_MIN_HEADING_DEGREES = 3.0
+# A flight is written at least this often even if it did not move
+DEFAULT_MAX_SILENCE_SECONDS = 300.0
+
+EARTH_RADIUS_METERS = 6371000.0
+
+def distance_meters(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Great circle distance between two points in meters (haversine formula).
+    """
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(math.sqrt(min(1.0, a)))
+
+def _exceeds(previous: Any, current: Any, threshold: float) -> bool:
+    if current is None:
+        return False
+    if previous is None:
+        return True
+    return abs(current - previous) >= threshold
+
+class ChangeDetector:
+    """
+    Decides whether a new position report differs enough from the last one
+    that was applied to be worth writing and broadcasting.
+
+    A report is significant if the aircraft moved at least min_distance_meters,
+    or its altitude, speed or heading changed by at least their thresholds, or
+    its status changed, or nothing was applied for max_silence_seconds.
+    """
+
+    def __init__(self, min_distance_meters: float = DEFAULT_MIN_DISTANCE_METERS,
+                 min_altitude_feet: float = DEFAULT_MIN_ALTITUDE_FEET,
+                 min_speed_knots: float = DEFAULT_MIN_SPEED_KNOTS,
+                 min_heading_degrees: float = DEFAULT_MIN_HEADING_DEGREES,
+                 max_silence_seconds: float = DEFAULT_MAX_SILENCE_SECONDS,
+                 clock: Callable[[], float] = time.time):
+        self.min_distance_meters = min_distance_meters
+        self.min_altitude_feet = min_altitude_feet
+        self.min_speed_knots = min_speed_knots
+        self.min_heading_degrees = min_heading_degrees
+        self.max_silence_seconds = max_silence_seconds
+        self.clock = clock
+        self._applied: Dict[Any, Dict[str, Any]] = {}
+        self._applied_at: Dict[Any, float] = {}
+
+    @classmethod
+    def from_env(cls, **overrides) -> 'ChangeDetector':
+        """
+        Build a detector from CHANGE_MIN_DISTANCE_METERS, CHANGE_MIN_ALTITUDE_FEET,
+        CHANGE_MIN_SPEED_KNOTS, CHANGE_MIN_HEADING_DEGREES and CHANGE_MAX_SILENCE_SECONDS.
+        """
+        options = {
+            'min_distance_meters': float(os.getenv('CHANGE_MIN_DISTANCE_METERS', DEFAULT_MIN_DISTANCE_METERS)),
+            'min_altitude_feet': float(os.getenv('CHANGE_MIN_ALTITUDE_FEET', DEFAULT_MIN_ALTITUDE_FEET)),
+            'min_speed_knots': float(os.getenv('CHANGE_MIN_SPEED_KNOTS', DEFAULT_MIN_SPEED_KNOTS)),
+            'min_heading_degrees': float(os.getenv('CHANGE_MIN_HEADING_DEGREES', DEFAULT_MIN_HEADING_DEGREES)),
+            'max_silence_seconds': float(os.getenv('CHANGE_MAX_SILENCE_SECONDS', DEFAULT_MAX_SILENCE_SECONDS)),
+        }
+        options.update(overrides)
+        return cls(**options)
+
+    def __len__(self) -> int:
+        return len(self._applied)
+
+    def is_significant(self, previous: Optional[Mapping[str, Any]], current: Mapping[str, Any]) -> bool:
+        """
+        Compare two position reports against the movement thresholds
+        (ignoring the time threshold).
+        """
+        if previous is None:
+            return True
+        if current.get('status') and current.get('status') != previous.get('status'):
+            return True
+
+        lat1, lon1 = previous.get('latitude'), previous.get('longitude')
+        lat2, lon2 = current.get('latitude'), current.get('longitude')
+        if lat2 is not None and lon2 is not None:
+            if lat1 is None or lon1 is None:
+                return True
+            if distance_meters(lat1, lon1, lat2, lon2) >= self.min_distance_meters:
+                return True
+
+        if _exceeds(previous.get('altitude'), current.get('altitude'), self.min_altitude_feet):
+            return True
+        if _exceeds(previous.get('speed'), current.get('speed'), self.min_speed_knots):
+            return True
+
+        heading, previous_heading = current.get('heading'), previous.get('heading')
+        if heading is not None:
+            if previous_heading is None:
+                return True
+            turn = abs(heading - previous_heading) % 360
+            if min(turn, 360 - turn) >= self.min_heading_degrees:
+                return True
+        return False
+
+    def check(self, key: Any, record: Mapping[str, Any], now: Optional[float] = None) -> bool:
+        """
+        Return True if the record should be applied for key, remembering it
+        as the last applied state if so.
+
+        Args:
+            key: Flight identifier
+            record: Position report (latitude, longitude, altitude, speed, heading, status)
+            now: Optional time of the check (defaults to the detector clock)
+
+        Returns:
+            Whether the change is meaningful
+        """
+        now = self.clock() if now is None else now
+        previous = self._applied.get(key)
+        silent_for = now - self._applied_at.get(key, now)
+        if previous is not None and silent_for < self.max_silence_seconds and not self.is_significant(previous, record):
+            return False
+        self._applied[key] = dict(record)
+        self._applied_at[key] = now
+        return True
+
+    def forget(self, key: Any):
+        """Drop the remembered state of a flight."""
+        self._applied.pop(key, None)
+        self._applied_at.pop(key, None)
+
+    def forget_older_than(self, cutoff: float) -> int:
+        """
+        Drop flights whose last applied state is older than the cutoff.
+
+        Returns:
+            Number of flights forgotten
+        """
+        stale = [key for key, applied_at in self._applied_at.items() if applied_at < cutoff]
+        for key in stale:
+            self.forget(key)
+        return len(stale)
@@ -1,36 +1,56 @@
 import asyncio
 import logging
-from typing import List, Dict, Any
-from datetime import datetime, time
+from typing import List, Dict, Any, Optional
+from datetime import datetime, time, timezone
 
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
 from .competitor_data_client import CompetitorDataClient
+from .bulk_upsert import bulk_upsert, UpsertResult, DEFAULT_BATCH_SIZE
 from ..config.db import SessionLocal
 from ..models.competitor import CompetitorFlight
 
 logger = logging.getLogger(__name__)
 
+def _normalize_competitor_flight(flight_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert ISO timestamp strings from the Competitor API into naive UTC
+    datetimes so they match the natural key stored in the database.
+    """
+    row = dict(flight_data)
+    for key in ("departure_time", "arrival_time"):
+        if isinstance(row.get(key), str):
+            value = datetime.fromisoformat(row[key].replace("Z", "+00:00"))
+            if value.tzinfo is not None:
+                value = value.astimezone(timezone.utc).replace(tzinfo=None)
+            row[key] = value
+    return row
+
 class CompetitorDataService:
     """
     Service to fetch competitor flight data daily and store it in the database.
     """
-    def __init__(self, fetch_time: time = time(0, 0), interval_seconds: int = 86400):
+    def __init__(self, fetch_time: time = time(0, 0), interval_seconds: int = 86400, batch_size: int = DEFAULT_BATCH_SIZE):
         """
         Initialize the service.
 
         Args:
             fetch_time: Time of day to perform the fetch (default: midnight)
             interval_seconds: Interval between fetches in seconds (default: 86400 seconds = 24 hours)
+            batch_size: Number of competitor flights written per upsert statement
         """
         self.fetch_time = fetch_time
         self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
         self.client = CompetitorDataClient()
 
-    async def fetch_and_store_competitor_flights(self):
+    async def fetch_and_store_competitor_flights(self) -> Optional[UpsertResult]:
         """
-        Fetch competitor flights and store them in the database.
+        Fetch competitor flights and upsert them into the database in batches.
+
+        Returns:
+            Rows inserted and updated, or None if nothing was stored.
         """
         try:
             flights: List[Dict[str, Any]] = self.client.get_daily_competitor_flights()
@@ -40,31 +60,20 @@ class CompetitorDataService:
 
             db: Session = SessionLocal()
             try:
-                for flight_data in flights:
-                    # Check if flight already exists to prevent duplicates
-                    existing_flight = db.query(CompetitorFlight).filter_by(
-                        flight_number=flight_data.get("flight_number"),
-                        departure_time=flight_data.get("departure_time")
-                    ).first()
-                    if existing_flight:
-                        # Update existing flight data
-                        for key, value in flight_data.items():
-                            setattr(existing_flight, key, value)
-                    else:
-                        # Create new competitor flight entry
-                        competitor_flight = CompetitorFlight(
-                            operator=flight_data.get("operator"),
-                            flight_number=flight_data.get("flight_number"),
-                            route=flight_data.get("route"),
-                            departure_time=flight_data.get("departure_time"),
-                            arrival_time=flight_data.get("arrival_time"),
-                            status=flight_data.get("status"),
-                            aircraft_type=flight_data.get("aircraft_type"),
-                            remarks=flight_data.get("remarks")
-                        )
-                        db.add(competitor_flight)
+                rows = [_normalize_competitor_flight(flight_data) for flight_data in flights]
+                result = bulk_upsert(
+                    db,
+                    CompetitorFlight,
+                    rows,
+                    key_columns=["flight_number", "departure_time"],
+                    batch_size=self.batch_size
+                )
                 db.commit()
-                logger.info(f"Stored/Updated {len(flights)} competitor flights in the database.")
+                logger.info(
+                    f"Stored {len(flights)} competitor flights in the database "
+                    f"({result.inserted} inserted, {result.updated} updated)."
+                )
+                return result
             except SQLAlchemyError as e:
                 db.rollback()
                 logger.error(f"Database error while storing competitor flights: {e}")
@@ -0,0 +1,267 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Mapping, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Consumers sharing the provider quota
+FLEET = 'fleet'
+COMPETITOR = 'competitor'
+ADHOC = 'adhoc'
+
+# Budgeted FR24 endpoints
+LIVE_POSITIONS = 'live_positions'
+FLIGHT_DETAILS = 'flight_details'
+HISTORICAL_FLIGHT = 'historical_flight'
+
+# Length of an accounting window (seconds); quotas are usually billed monthly
+DEFAULT_WINDOW_SECONDS = 30 * 24 * 3600
+# Fraction of the window's credits each consumer may spend
+DEFAULT_SHARES = {FLEET: 0.6, COMPETITOR: 0.2, ADHOC: 0.2}
+# Credits charged per request when an endpoint has no configured cost
+DEFAULT_COST = 1.0
+# File the accounting is kept in, shared by every process on the host
+DEFAULT_STATE_PATH = os.path.join('.cache', 'fr24_credits.json')
+
+class CreditBudgetExhausted(Exception):
+    """Raised when a request is denied by the credit budget and no degraded data can be served."""
+
+def parse_weights(value: str) -> Dict[str, float]:
+    """
+    Parse weights in the form "name:value,name2:value2".
+    """
+    weights = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        name, _, weight = item.partition(':')
+        if not weight:
+            raise ValueError(f"Invalid weight '{item}' (expected name:value)")
+        weights[name.strip()] = float(weight)
+    return weights
+
+class CreditBudget:
+    """
+    Accounts provider API credits per endpoint and consumer over fixed time
+    windows.
+
+    Every request is charged its endpoint's cost. A request is allowed only if
+    both the window's total limit and the consumer's share of it still cover
+    the cost, so ad-hoc page loads cannot starve fleet tracking. Denied
+    requests are counted; callers degrade to cached or extrapolated data.
+    Without a limit every request is allowed and only the accounting is kept.
+
+    With a state path the accounting lives in a JSON file that is locked for
+    every charge, so it survives restarts and all API workers and the ingest
+    worker on a host draw from one budget. Without one it is kept in memory.
+    """
+
+    def __init__(
+        self,
+        limit: Optional[float] = None,
+        window_seconds: float = DEFAULT_WINDOW_SECONDS,
+        shares: Optional[Mapping[str, float]] = None,
+        costs: Optional[Mapping[str, float]] = None,
+        clock: Callable[[], float] = time.time,
+        state_path: Optional[str] = None
+    ):
+        """
+        Args:
+            limit: Credits available per window (None means unlimited)
+            window_seconds: Length of an accounting window in seconds
+            shares: Fraction of the limit per consumer; consumers without a
+                share are only bound by the total
+            costs: Credits charged per request by endpoint
+            clock: Time source (epoch seconds)
+            state_path: Optional file shared by processes to keep the
+                accounting in (None keeps it in this process)
+        """
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.shares = dict(DEFAULT_SHARES if shares is None else shares)
+        self.costs = dict(costs or {})
+        self.clock = clock
+        if state_path and fcntl is None:
+            logger.warning("Credit budget state file requires fcntl; keeping the accounting in memory")
+            state_path = None
+        self.state_path = state_path
+        self.window_started_at = self._window_start(clock())
+        self.spent = 0.0
+        self.spent_by_endpoint: Dict[str, float] = {}
+        self.spent_by_consumer: Dict[str, float] = {}
+        self.denied_by_consumer: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls, **overrides) -> 'CreditBudget':
+        """
+        Build a budget from environment variables: FR24_CREDIT_LIMIT,
+        FR24_CREDIT_WINDOW_SECONDS, FR24_CREDIT_SHARES ("fleet:0.6,adhoc:0.2,..."),
+        FR24_CREDIT_COSTS ("live_positions:1,flight_details:2,...") and
+        FR24_CREDIT_STATE_PATH (empty keeps the accounting in memory).
+        """
+        options = {
+            'window_seconds': float(os.getenv('FR24_CREDIT_WINDOW_SECONDS', DEFAULT_WINDOW_SECONDS)),
+            'state_path': os.getenv('FR24_CREDIT_STATE_PATH', DEFAULT_STATE_PATH) or None,
+        }
+        limit = os.getenv('FR24_CREDIT_LIMIT')
+        if limit:
+            options['limit'] = float(limit)
+        shares = os.getenv('FR24_CREDIT_SHARES')
+        if shares:
+            options['shares'] = parse_weights(shares)
+        costs = os.getenv('FR24_CREDIT_COSTS')
+        if costs:
+            options['costs'] = parse_weights(costs)
+        options.update(overrides)
+        return cls(**options)
+
+    def _window_start(self, now: float) -> float:
+        return now - now % self.window_seconds
+
+    def _roll(self, now: float):
+        start = self._window_start(now)
+        if start != self.window_started_at:
+            self.window_started_at = start
+            self.spent = 0.0
+            self.spent_by_endpoint.clear()
+            self.spent_by_consumer.clear()
+            self.denied_by_consumer.clear()
+
+    def _load(self, content: str):
+        if not content:
+            return
+        try:
+            state = json.loads(content)
+            self.window_started_at = float(state['window_started_at'])
+            self.spent = float(state['spent'])
+            self.spent_by_endpoint = dict(state['spent_by_endpoint'])
+            self.spent_by_consumer = dict(state['spent_by_consumer'])
+            self.denied_by_consumer = dict(state['denied_by_consumer'])
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable credit budget state {self.state_path}: {e}")
+
+    def _dump(self) -> str:
+        return json.dumps({
+            'window_started_at': self.window_started_at,
+            'spent': self.spent,
+            'spent_by_endpoint': self.spent_by_endpoint,
+            'spent_by_consumer': self.spent_by_consumer,
+            'denied_by_consumer': self.denied_by_consumer,
+        })
+
+    @contextmanager
+    def _shared_state(self):
+        """Hold the state file locked, with its accounting loaded, and save it afterwards."""
+        if self.state_path is None:
+            yield
+            return
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.state_path, 'a+') as state_file:
+            fcntl.flock(state_file.fileno(), fcntl.LOCK_EX)
+            try:
+                state_file.seek(0)
+                self._load(state_file.read())
+                loaded = self._dump()
+                yield
+                # Reads (e.g. stats()) leave the file untouched
+                state = self._dump()
+                if state != loaded:
+                    state_file.seek(0)
+                    state_file.truncate()
+                    state_file.write(state)
+                    state_file.flush()
+            finally:
+                fcntl.flock(state_file.fileno(), fcntl.LOCK_UN)
+
+    def _remaining(self, consumer: Optional[str]) -> float:
+        remaining = self.limit - self.spent
+        share = self.shares.get(consumer) if consumer is not None else None
+        if share is not None:
+            remaining = min(remaining, share * self.limit - self.spent_by_consumer.get(consumer, 0.0))
+        return max(0.0, remaining)
+
+    def cost(self, endpoint: str) -> float:
+        """Credits charged for one request to an endpoint."""
+        return self.costs.get(endpoint, DEFAULT_COST)
+
+    def remaining(self, consumer: Optional[str] = None, now: Optional[float] = None) -> Optional[float]:
+        """
+        Credits left in the current window, overall or for a consumer.
+
+        Returns:
+            Remaining credits, or None if the budget is unlimited
+        """
+        if self.limit is None:
+            return None
+        with self._shared_state():
+            self._roll(self.clock() if now is None else now)
+            return self._remaining(consumer)
+
+    def try_spend(self, endpoint: str, consumer: str, requests: int = 1, now: Optional[float] = None) -> bool:
+        """
+        Charge the given number of requests to an endpoint if the budget allows.
+
+        Args:
+            endpoint: Budgeted endpoint name
+            consumer: Consumer the requests are made for
+            requests: Number of requests (e.g. tiles of one fetch)
+            now: Optional current time (defaults to the budget clock)
+
+        Returns:
+            True if the credits were spent, False if the request must be skipped
+        """
+        now = self.clock() if now is None else now
+        credits = self.cost(endpoint) * requests
+        with self._shared_state():
+            self._roll(now)
+            if self.limit is not None and credits > self._remaining(consumer):
+                denied = self.denied_by_consumer.get(consumer, 0)
+                if not denied:
+                    logger.warning(f"Credit budget exhausted for {consumer}; serving degraded data until the window resets")
+                self.denied_by_consumer[consumer] = denied + 1
+                return False
+            self.spent += credits
+            self.spent_by_endpoint[endpoint] = self.spent_by_endpoint.get(endpoint, 0.0) + credits
+            self.spent_by_consumer[consumer] = self.spent_by_consumer.get(consumer, 0.0) + credits
+            return True
+
+    async def try_spend_async(self, endpoint: str, consumer: str, requests: int = 1) -> bool:
+        """
+        try_spend() for the event loop: a budget kept in a state file is
+        charged in a worker thread, so waiting for the file lock held by
+        another process does not block the loop.
+        """
+        if self.state_path is None:
+            return self.try_spend(endpoint, consumer, requests)
+        return await asyncio.to_thread(self.try_spend, endpoint, consumer, requests)
+
+    def stats(self) -> Dict[str, object]:
+        """Return the accounting of the current window."""
+        with self._shared_state():
+            self._roll(self.clock())
+            limited = self.limit is not None
+            return {
+                'limit': self.limit,
+                'window_seconds': self.window_seconds,
+                'window_started_at': self.window_started_at,
+                'spent': self.spent,
+                'remaining': self._remaining(None) if limited else None,
+                'spent_by_endpoint': dict(self.spent_by_endpoint),
+                'spent_by_consumer': dict(self.spent_by_consumer),
+                'denied_by_consumer': dict(self.denied_by_consumer),
+                'remaining_by_consumer': {
+                    consumer: self._remaining(consumer) if limited else None for consumer in self.shares
+                },
+            }
+
+# Process-wide budget for the FlightRadar24 API key
+fr24_credit_budget = CreditBudget.from_env()
@@ -0,0 +1,210 @@
+import math
+import time
+from typing import Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+KNOTS_TO_METERS_PER_SECOND = 0.514444
+EARTH_RADIUS_METERS = 6371000.0
+
+# Seconds after which confidence in a projected position halves
+DEFAULT_CONFIDENCE_HALF_LIFE_SECONDS = 120.0
+# Positions are not projected further than this past the last fix
+DEFAULT_MAX_EXTRAPOLATION_SECONDS = 900.0
+
+class Projection(NamedTuple):
+    """Projected position of one aircraft."""
+    latitude: float
+    longitude: float
+    confidence: float
+    age: float
+
+def dead_reckon(latitude: np.ndarray, longitude: np.ndarray, speed: np.ndarray, heading: np.ndarray,
+                elapsed: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Project positions along their heading at constant speed (great circle).
+
+    Args:
+        latitude: Latitudes of the last fixes in degrees
+        longitude: Longitudes of the last fixes in degrees
+        speed: Ground speeds in knots (NaN leaves the position unchanged)
+        heading: True headings in degrees (NaN leaves the position unchanged)
+        elapsed: Seconds since each fix
+
+    Returns:
+        Tuple of projected latitude and longitude arrays
+    """
+    distance = np.nan_to_num(speed * KNOTS_TO_METERS_PER_SECOND * elapsed) / EARTH_RADIUS_METERS
+    bearing = np.radians(np.nan_to_num(heading))
+    lat1 = np.radians(latitude)
+    lon1 = np.radians(longitude)
+
+    lat2 = np.arcsin(np.sin(lat1) * np.cos(distance) + np.cos(lat1) * np.sin(distance) * np.cos(bearing))
+    lon2 = lon1 + np.arctan2(
+        np.sin(bearing) * np.sin(distance) * np.cos(lat1),
+        np.cos(distance) - np.sin(lat1) * np.sin(lat2)
+    )
+    # Normalize longitude to [-180, 180)
+    lon2 = (lon2 + math.pi) % (2 * math.pi) - math.pi
+    return np.degrees(lat2), np.degrees(lon2)
+
+def decay_confidence(age: np.ndarray, half_life: float = DEFAULT_CONFIDENCE_HALF_LIFE_SECONDS) -> np.ndarray:
+    """Exponential confidence in a projection: 1 at the fix, 0.5 after one half-life."""
+    return np.exp2(-np.maximum(age, 0.0) / half_life)
+
+class DeadReckoningEngine:
+    """
+    Keeps the last fix of every aircraft and projects all of them at once.
+
+    Fixes are held in NumPy columns so projecting the whole fleet is a handful
+    of vectorized operations. Each projection carries a confidence that decays
+    exponentially with the time since the fix, which lets callers decide when
+    a projection is too old to show.
+    """
+
+    def __init__(self, half_life: float = DEFAULT_CONFIDENCE_HALF_LIFE_SECONDS,
+                 max_extrapolation: float = DEFAULT_MAX_EXTRAPOLATION_SECONDS,
+                 capacity: int = 256, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            half_life: Seconds after which confidence halves
+            max_extrapolation: Maximum seconds a position is projected past its fix
+            capacity: Initial number of aircraft slots
+            clock: Time source (epoch seconds)
+        """
+        self.half_life = half_life
+        self.max_extrapolation = max_extrapolation
+        self.clock = clock
+        self._keys: List[Hashable] = []
+        self._index: Dict[Hashable, int] = {}
+        self._columns = {name: np.full(capacity, np.nan) for name in ('latitude', 'longitude', 'speed', 'heading', 'timestamp')}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._index
+
+    def record_fix(self, key: Hashable, latitude: float, longitude: float, speed: Optional[float] = None,
+                   heading: Optional[float] = None, timestamp: Optional[float] = None):
+        """
+        Record a measured position for an aircraft.
+
+        Args:
+            key: Aircraft identifier
+            latitude: Latitude in degrees
+            longitude: Longitude in degrees
+            speed: Ground speed in knots
+            heading: True heading in degrees
+            timestamp: Time of the fix (defaults to now)
+        """
+        row = self._index.get(key)
+        if row is None:
+            row = len(self._keys)
+            if row == len(self._columns['timestamp']):
+                for name, column in self._columns.items():
+                    self._columns[name] = np.concatenate([column, np.full(len(column), np.nan)])
+            self._keys.append(key)
+            self._index[key] = row
+        values = {
+            'latitude': latitude,
+            'longitude': longitude,
+            'speed': speed,
+            'heading': heading,
+            'timestamp': self.clock() if timestamp is None else timestamp,
+        }
+        for name, value in values.items():
+            self._columns[name][row] = np.nan if value is None else value
+
+    def forget(self, key: Hashable) -> bool:
+        """
+        Drop an aircraft's fix, moving the last row into its slot.
+
+        Returns:
+            True if the aircraft was known
+        """
+        row = self._index.pop(key, None)
+        if row is None:
+            return False
+        last = len(self._keys) - 1
+        if row != last:
+            moved = self._keys[last]
+            self._keys[row] = moved
+            self._index[moved] = row
+            for column in self._columns.values():
+                column[row] = column[last]
+        self._keys.pop()
+        return True
+
+    def state(self) -> Tuple[List[Hashable], Dict[str, np.ndarray]]:
+        """
+        Return a copy of every fix as (keys, columns), e.g. for persisting.
+        """
+        size = len(self._keys)
+        return list(self._keys), {name: column[:size].copy() for name, column in self._columns.items()}
+
+    def restore(self, keys: List[Hashable], columns: Dict[str, np.ndarray]):
+        """
+        Replace all fixes with a state returned by state().
+        """
+        size = len(keys)
+        capacity = max(size, len(self._columns['timestamp']))
+        self._keys = list(keys)
+        self._index = {key: row for row, key in enumerate(self._keys)}
+        for name in self._columns:
+            column = np.full(capacity, np.nan)
+            if name in columns:
+                column[:size] = columns[name]
+            self._columns[name] = column
+
+    def project_all(self, now: Optional[float] = None) -> Tuple[List[Hashable], np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Project every known aircraft to the given time.
+
+        Returns:
+            Tuple of (keys, latitudes, longitudes, confidences)
+        """
+        now = self.clock() if now is None else now
+        size = len(self._keys)
+        columns = {name: column[:size] for name, column in self._columns.items()}
+        age = now - columns['timestamp']
+        elapsed = np.clip(age, 0.0, self.max_extrapolation)
+        latitude, longitude = dead_reckon(columns['latitude'], columns['longitude'], columns['speed'],
+                                          columns['heading'], elapsed)
+        return list(self._keys), latitude, longitude, decay_confidence(age, self.half_life)
+
+    def project(self, keys: Iterable[Hashable], now: Optional[float] = None) -> Dict[Hashable, Projection]:
+        """
+        Project the given aircraft to the given time. Unknown keys are skipped.
+
+        Args:
+            keys: Aircraft identifiers
+            now: Optional target time (defaults to the engine clock)
+
+        Returns:
+            Mapping of key to Projection
+        """
+        now = self.clock() if now is None else now
+        keys = [key for key in keys if key in self._index]
+        if not keys:
+            return {}
+        rows = np.fromiter((self._index[key] for key in keys), dtype=np.intp, count=len(keys))
+        columns = {name: column[rows] for name, column in self._columns.items()}
+        age = now - columns['timestamp']
+        elapsed = np.clip(age, 0.0, self.max_extrapolation)
+        latitude, longitude = dead_reckon(columns['latitude'], columns['longitude'], columns['speed'],
+                                          columns['heading'], elapsed)
+        confidence = decay_confidence(age, self.half_life)
+        return {
+            key: Projection(lat, lon, conf, max(0.0, fix_age))
+            for key, lat, lon, conf, fix_age in zip(keys, latitude.tolist(), longitude.tolist(),
+                                                    confidence.tolist(), age.tolist())
+        }
+
+    def confidence(self, key: Hashable, now: Optional[float] = None) -> Optional[float]:
+        """Return the current confidence for an aircraft, or None if unknown."""
+        row = self._index.get(key)
+        if row is None:
+            return None
+        now = self.clock() if now is None else now
+        return float(decay_confidence(np.float64(now - self._columns['timestamp'][row]), self.half_life))
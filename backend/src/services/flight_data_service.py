@@ -1,14 +1,22 @@
 import os
+import time
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Union
+import numpy as np
 from dotenv import load_dotenv
-from datetime import datetime
-from .flightradar24_client import FlightRadar24Client
+from datetime import datetime, timezone
+from .flightradar24_client import FlightRadar24Client, AsyncFlightRadar24Client, DEFAULT_TILE_ROWS, DEFAULT_TILE_COLUMNS
 from ..models.flight import Flight
 from ..schemas.flight import FlightCreate, FlightUpdate
 
 # Import the mock data provider
 from .mock_flight_data import MockFlightDataProvider
+from .ttl_cache import AsyncTTLCache
+from .historical_cache import HistoricalFlightCache
+from .credit_budget import ADHOC, FLIGHT_DETAILS, HISTORICAL_FLIGHT, LIVE_POSITIONS, CreditBudget, CreditBudgetExhausted, fr24_credit_budget
+from .dead_reckoning import DEFAULT_MAX_EXTRAPOLATION_SECONDS, dead_reckon
+from .shared_snapshot import live_traffic_reader
 
 # Try to import the real client if it exists
 try:
@@ -24,6 +32,104 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Flight details are cached briefly so concurrent identical lookups share one upstream call
+FLIGHT_DETAILS_TTL_SECONDS = float(os.getenv('FLIGHT_DETAILS_TTL_SECONDS', 15))
+FLIGHT_DETAILS_CACHE_SIZE = int(os.getenv('FLIGHT_DETAILS_CACHE_SIZE', 1000))
+flight_details_cache = AsyncTTLCache(ttl=FLIGHT_DETAILS_TTL_SECONDS, max_size=FLIGHT_DETAILS_CACHE_SIZE)
+
+# Async clients are shared across requests so their connection pools stay warm
+_async_clients: Dict[str, AsyncFlightRadar24Client] = {}
+
+# Historical data never changes, so it is kept on disk across restarts
+_historical_cache: Optional[HistoricalFlightCache] = None
+
+def get_historical_cache() -> HistoricalFlightCache:
+    """Return the process-wide historical flight disk cache."""
+    global _historical_cache
+    if _historical_cache is None:
+        _historical_cache = HistoricalFlightCache.from_env()
+    return _historical_cache
+
+def get_shared_async_client(api_key: str) -> AsyncFlightRadar24Client:
+    """
+    Return the process-wide async FlightRadar24 client for the given API key.
+    
+    Args:
+        api_key: FlightRadar24 API token
+        
+    Returns:
+        A pooled AsyncFlightRadar24Client
+    """
+    client = _async_clients.get(api_key)
+    if client is None:
+        client = AsyncFlightRadar24Client(api_key, historical_cache=get_historical_cache())
+        _async_clients[api_key] = client
+    return client
+
+def _parse_bounds(bounds: Optional[str]) -> Optional[Tuple[float, float, float, float]]:
+    if not bounds:
+        return None
+    lat1, lat2, lon1, lon2 = (float(value) for value in bounds.split(','))
+    return min(lat1, lat2), max(lat1, lat2), min(lon1, lon2), max(lon1, lon2)
+
+def _extrapolated(flights: List[Dict[str, Any]], now: float) -> List[Dict[str, Any]]:
+    """Copy flights with their positions projected from last_updated to now."""
+    flights = [dict(flight) for flight in flights if flight.get('latitude') is not None and flight.get('longitude') is not None]
+    if not flights:
+        return []
+    elapsed = []
+    for flight in flights:
+        try:
+            # last_updated is naive UTC
+            reported_at = datetime.fromisoformat(flight['last_updated']).replace(tzinfo=timezone.utc).timestamp()
+        except (KeyError, TypeError, ValueError):
+            reported_at = now
+        elapsed.append(min(max(0.0, now - reported_at), DEFAULT_MAX_EXTRAPOLATION_SECONDS))
+    latitude, longitude = dead_reckon(
+        np.array([flight['latitude'] for flight in flights], dtype=float),
+        np.array([flight['longitude'] for flight in flights], dtype=float),
+        np.array([flight.get('speed') for flight in flights], dtype=float),
+        np.array([flight.get('heading') for flight in flights], dtype=float),
+        np.array(elapsed)
+    )
+    for flight, lat, lon in zip(flights, latitude.tolist(), longitude.tolist()):
+        flight['latitude'] = lat
+        flight['longitude'] = lon
+    return flights
+
+def degraded_live_flights(bounds: Optional[str] = None, flight_id: Optional[str] = None,
+                          now: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Live traffic served without spending API credits: the ingest leader's
+    shared snapshot, with positions projected to now by dead reckoning.
+
+    Args:
+        bounds: Optional bounding box coordinates (lat1,lat2,lon1,lon2)
+        flight_id: Optional flight to return alone
+        now: Optional current time (defaults to now)
+
+    Returns:
+        List of flight dictionaries (empty if no snapshot is available)
+    """
+    flights = live_traffic_reader.read_json() or []
+    if flight_id is not None:
+        flights = [flight for flight in flights if flight.get('flight_id') == flight_id]
+    flights = _extrapolated(flights, time.time() if now is None else now)
+    box = _parse_bounds(bounds)
+    if box is not None:
+        lat_min, lat_max, lon_min, lon_max = box
+        flights = [
+            flight for flight in flights
+            if lat_min <= flight['latitude'] <= lat_max and lon_min <= flight['longitude'] <= lon_max
+        ]
+    return flights
+
+async def close_shared_async_clients():
+    """Close every shared async client, e.g. on application shutdown."""
+    for client in list(_async_clients.values()):
+        await client.aclose()
+    _async_clients.clear()
+
 class FlightDataService:
     """
     Service for retrieving flight data from either Flightradar24 API or mock data.
@@ -31,13 +137,27 @@ class FlightDataService:
     1. The Flightradar API key is not set
     2. The FlightradarClient is not available
     3. The Flightradar API returns an error
+    
+    Every upstream request is charged to the API credit budget; once the
+    consumer's share is spent, live data is served from the shared snapshot
+    (extrapolated) and flight details from the cache, even if expired.
     """
     
-    def __init__(self, fr24_client: Optional[FlightRadar24Client] = None):
+    def __init__(
+        self,
+        fr24_client: Optional[FlightRadar24Client] = None,
+        async_client: Optional[AsyncFlightRadar24Client] = None,
+        budget: Optional[CreditBudget] = None,
+        consumer: str = ADHOC
+    ):
         """Initialize the flight data service."""
         # Load environment variables
         load_dotenv()
         
+        # Credits are charged to this consumer's share of the budget
+        self.budget = budget or fr24_credit_budget
+        self.consumer = consumer
+        
         # Get API key
         self.api_key = os.getenv('FLIGHTRADAR_API_KEY')
         
@@ -51,7 +171,8 @@ class FlightDataService:
         
         if self.use_real_data:
             logger.info("Using real Flightradar24 API data")
-            self.fr24_client = fr24_client or FlightRadar24Client(self.api_key)
+            self.fr24_client = fr24_client or FlightRadar24Client(self.api_key, historical_cache=get_historical_cache())
+            self.async_client = async_client or get_shared_async_client(self.api_key)
         else:
             logger.info("Using mock flight data")
             self.mock_provider = MockFlightDataProvider(num_flights=50)
@@ -61,6 +182,8 @@ class FlightDataService:
         Get live flight data from FlightRadar24.
         Processes and formats the data for the application.
         """
+        if not self.budget.try_spend(LIVE_POSITIONS, self.consumer):
+            return degraded_live_flights(bounds)
         try:
             raw_data = self.fr24_client.get_live_flights(bounds)
             return self._process_live_flights(raw_data)
@@ -74,6 +197,8 @@ class FlightDataService:
         Get detailed flight information.
         Returns None if the flight is not found or an error occurs.
         """
+        if not self.budget.try_spend(FLIGHT_DETAILS, self.consumer):
+            return self._degraded_flight_details(flight_id)
         try:
             return self.fr24_client.get_flight_details(flight_id)
         except Exception as e:
@@ -91,11 +216,96 @@ class FlightDataService:
             logger.error(f"Error fetching historical flight data: {str(e)}")
             return None
     
-    def _process_live_flights(self, raw_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def get_live_flights_async(self, bounds: Optional[str] = None, tiled: bool = False) -> List[Dict[str, Any]]:
+        """
+        Non-blocking variant of get_live_flights for use in async routes.
+        With tiled=True, large bounds are fetched as concurrent tiles.
+        """
+        requests = DEFAULT_TILE_ROWS * DEFAULT_TILE_COLUMNS if tiled and bounds else 1
+        if not await self.budget.try_spend_async(LIVE_POSITIONS, self.consumer, requests):
+            return degraded_live_flights(bounds)
+        try:
+            if tiled and bounds:
+                raw_data = await self.async_client.get_live_flights_tiled(bounds)
+            else:
+                raw_data = await self.async_client.get_live_flights(bounds)
+            return self._process_live_flights(raw_data)
+        except Exception as e:
+            logger.error(f"Error fetching live flights: {str(e)}")
+            return []
+    
+    async def get_flight_details_async(self, flight_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Non-blocking variant of get_flight_details for use in async routes.
+        Results are served from flight_details_cache while fresh; only cache
+        misses are charged to the credit budget.
+
+        Raises:
+            CreditBudgetExhausted: If the budget denied the lookup and no
+                degraded details are available
+        """
+        async def fetch():
+            if not await self.budget.try_spend_async(FLIGHT_DETAILS, self.consumer):
+                raise CreditBudgetExhausted(self.consumer)
+            return await self.async_client.get_flight_details(flight_id)
+        
+        try:
+            details = await flight_details_cache.get_or_fetch(flight_id, fetch)
+        except CreditBudgetExhausted:
+            degraded = self._degraded_flight_details(flight_id)
+            if degraded is None:
+                raise
+            return degraded
+        except Exception as e:
+            logger.error(f"Error fetching flight details: {str(e)}")
+            return None
+        return details if details is not None else self._degraded_flight_details(flight_id)
+    
+    async def get_historical_flight_data_async(self, flight_id: str, date: datetime) -> Optional[Dict[str, Any]]:
+        """
+        Non-blocking variant of get_historical_flight_data for use in async routes.
+        Only lookups missing from the disk cache are charged to the credit budget.
+
+        Raises:
+            CreditBudgetExhausted: If the lookup is not cached and the budget denied it
+        """
+        cache = self.async_client.historical_cache
+        try:
+            cached = await asyncio.to_thread(cache.get, flight_id, date) if cache is not None else None
+        except Exception as e:
+            logger.error(f"Error reading historical flight cache: {str(e)}")
+            cached = None
+        if cached is not None:
+            return cached
+        if not await self.budget.try_spend_async(HISTORICAL_FLIGHT, self.consumer):
+            raise CreditBudgetExhausted(self.consumer)
+        try:
+            return await self.async_client.fetch_historical_flight(flight_id, date)
+        except Exception as e:
+            logger.error(f"Error fetching historical flight data: {str(e)}")
+            return None
+    
+    def _degraded_flight_details(self, flight_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Details served without spending credits: the last cached response even
+        if expired, else the flight's extrapolated live position.
+        """
+        details = flight_details_cache.get_stale(flight_id)
+        if details is None:
+            flights = degraded_live_flights(flight_id=flight_id)
+            if not flights:
+                return None
+            details = flights[0]
+        return {**details, 'degraded': True}
+    
+    def _process_live_flights(self, raw_data: Union[Dict[str, Any], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
         """
         Process raw flight data from FlightRadar24 API.
-        Converts it to the format expected by the application.
+        Converts it to the format expected by the application. The clients
+        already return parsed flights, which are passed through unchanged.
         """
+        if isinstance(raw_data, list):
+            return raw_data
         processed_flights = []
         
         for flight in raw_data.get('flights', []):
@@ -0,0 +1,321 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Unit conversions from OpenSky (SI) to the feet/knots used everywhere else
+METERS_TO_FEET = 3.28084
+METERS_PER_SECOND_TO_KNOTS = 1.943844
+
+# How long to wait for providers before merging whatever has arrived
+DEFAULT_FUSION_TIMEOUT_SECONDS = 5.0
+# Provider results older than this are not merged
+DEFAULT_MAX_RESULT_AGE_SECONDS = 120.0
+# Fixes this close in time are treated as simultaneous and resolved by priority
+DEFAULT_TIE_WINDOW_SECONDS = 5.0
+# Source priorities used to break ties between simultaneous fixes
+SOURCE_PRIORITIES = {'fr24': 3, 'flightradar': 2, 'opensky': 1}
+
+class FusedFlight(NamedTuple):
+    """Provider-independent live flight record (altitude in feet, speed in knots)."""
+    key: str
+    source: str
+    timestamp: float
+    flight_id: Optional[str] = None
+    callsign: Optional[str] = None
+    registration: Optional[str] = None
+    icao24: Optional[str] = None
+    aircraft_type: Optional[str] = None
+    origin: Optional[str] = None
+    destination: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    altitude: Optional[float] = None
+    speed: Optional[float] = None
+    heading: Optional[float] = None
+    status: Optional[str] = None
+    on_ground: Optional[bool] = None
+
+def fusion_key(callsign: Optional[str], registration: Optional[str], fallback: Optional[str]) -> Optional[str]:
+    """
+    Build the key used to match the same aircraft across providers. The callsign
+    is the only identifier all providers report; registration and the provider
+    id are fallbacks.
+    """
+    for value in (callsign, registration):
+        if value and value.strip():
+            return value.strip().upper()
+    return fallback
+
+def _parse_timestamp(value: Any, default: float) -> float:
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return default
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def _scaled(value: Optional[float], factor: float) -> Optional[float]:
+    return None if value is None else value * factor
+
+def normalize_opensky(state: Any, fetched_at: float) -> Optional[FusedFlight]:
+    """Normalize an OpenSky StateVector (or its dict form)."""
+    state = state._asdict() if hasattr(state, '_asdict') else state
+    key = fusion_key(state.get('callsign'), None, state.get('icao24'))
+    if key is None:
+        return None
+    return FusedFlight(
+        key=key,
+        source='opensky',
+        timestamp=_parse_timestamp(state.get('time_position') or state.get('last_contact'), fetched_at),
+        flight_id=state.get('icao24'),
+        callsign=state.get('callsign'),
+        icao24=state.get('icao24'),
+        latitude=state.get('latitude'),
+        longitude=state.get('longitude'),
+        altitude=_scaled(state.get('baro_altitude'), METERS_TO_FEET),
+        speed=_scaled(state.get('velocity'), METERS_PER_SECOND_TO_KNOTS),
+        heading=state.get('heading'),
+        on_ground=state.get('on_ground'),
+    )
+
+def normalize_flightradar(flight: Mapping[str, Any], fetched_at: float) -> Optional[FusedFlight]:
+    """Normalize a FlightradarClient flight (tail_number/origin fields)."""
+    key = fusion_key(flight.get('callsign'), flight.get('tail_number'), flight.get('flight_id'))
+    if key is None:
+        return None
+    return FusedFlight(
+        key=key,
+        source='flightradar',
+        timestamp=_parse_timestamp(flight.get('timestamp'), fetched_at),
+        flight_id=flight.get('flight_id'),
+        callsign=flight.get('callsign'),
+        registration=flight.get('tail_number'),
+        aircraft_type=flight.get('aircraft_type'),
+        origin=flight.get('origin'),
+        destination=flight.get('destination'),
+        latitude=flight.get('latitude'),
+        longitude=flight.get('longitude'),
+        altitude=flight.get('altitude'),
+        speed=flight.get('speed'),
+        heading=flight.get('heading'),
+        status=flight.get('status'),
+    )
+
+def normalize_fr24(flight: Mapping[str, Any], fetched_at: float) -> Optional[FusedFlight]:
+    """Normalize a FlightRadar24Client flight (registration/departure_airport fields)."""
+    key = fusion_key(flight.get('callsign'), flight.get('registration'), flight.get('flight_id'))
+    if key is None:
+        return None
+    return FusedFlight(
+        key=key,
+        source='fr24',
+        # last_updated is stamped at parse time; only the provider timestamp dates the fix
+        timestamp=_parse_timestamp(flight.get('timestamp'), fetched_at),
+        flight_id=flight.get('flight_id'),
+        callsign=flight.get('callsign'),
+        registration=flight.get('registration'),
+        aircraft_type=flight.get('aircraft_type'),
+        origin=flight.get('departure_airport'),
+        destination=flight.get('arrival_airport'),
+        latitude=flight.get('latitude'),
+        longitude=flight.get('longitude'),
+        altitude=flight.get('altitude'),
+        speed=flight.get('speed'),
+        heading=flight.get('heading'),
+        status=flight.get('status'),
+    )
+
+class FusionSource(NamedTuple):
+    """A provider feeding the fusion engine."""
+    name: str
+    priority: int
+    fetch: Callable[[], Awaitable[Iterable[Any]]]
+    normalize: Callable[[Any, float], Optional[FusedFlight]]
+
+def merge_flights(records: Iterable[FusedFlight], priorities: Mapping[str, int],
+                  tie_window: float = DEFAULT_TIE_WINDOW_SECONDS) -> Dict[str, FusedFlight]:
+    """
+    Resolve records describing the same aircraft into one record per key.
+
+    The freshest fix wins; fixes within tie_window seconds of it are resolved by
+    source priority. Fields the winner lacks are filled from the other records.
+
+    Args:
+        records: Normalized records from all providers
+        priorities: Source name to priority (higher wins ties)
+        tie_window: Seconds within which fixes are treated as simultaneous
+
+    Returns:
+        Mapping of fusion key to merged record
+    """
+    grouped: Dict[str, List[FusedFlight]] = {}
+    for record in records:
+        grouped.setdefault(record.key, []).append(record)
+
+    merged = {}
+    for key, candidates in grouped.items():
+        if len(candidates) == 1:
+            merged[key] = candidates[0]
+            continue
+        freshest = max(record.timestamp for record in candidates)
+        candidates.sort(
+            key=lambda record: (record.timestamp >= freshest - tie_window, priorities.get(record.source, 0), record.timestamp),
+            reverse=True
+        )
+        winner = candidates[0]
+        missing = {
+            field: next((getattr(other, field) for other in candidates[1:] if getattr(other, field) is not None), None)
+            for field in FusedFlight._fields
+            if getattr(winner, field) is None
+        }
+        merged[key] = winner._replace(**missing) if missing else winner
+    return merged
+
+class FlightFusionEngine:
+    """
+    Runs several live-traffic providers concurrently and fuses their results.
+
+    Each snapshot waits at most `timeout` seconds. A provider that is still
+    running keeps going in the background and its last successful result (if
+    younger than max_result_age) is merged instead, so one slow or failing
+    provider never delays the snapshot.
+    """
+
+    def __init__(self, sources: Iterable[FusionSource], timeout: float = DEFAULT_FUSION_TIMEOUT_SECONDS,
+                 max_result_age: float = DEFAULT_MAX_RESULT_AGE_SECONDS, tie_window: float = DEFAULT_TIE_WINDOW_SECONDS):
+        self.sources = {source.name: source for source in sources}
+        self.priorities = {source.name: source.priority for source in self.sources.values()}
+        self.timeout = timeout
+        self.max_result_age = max_result_age
+        self.tie_window = tie_window
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._results: Dict[str, List[FusedFlight]] = {}
+        self._result_times: Dict[str, float] = {}
+
+    async def _run_source(self, source: FusionSource):
+        fetched_at = time.time()
+        raw = await source.fetch()
+        records = []
+        for item in raw:
+            record = source.normalize(item, fetched_at)
+            if record is not None:
+                records.append(record)
+        self._results[source.name] = records
+        self._result_times[source.name] = fetched_at
+
+    def _start(self, source: FusionSource):
+        task = self._tasks.get(source.name)
+        if task is not None and not task.done():
+            return task
+        task = asyncio.ensure_future(self._run_source(source))
+        task.add_done_callback(lambda done, name=source.name: self._log_failure(name, done))
+        self._tasks[source.name] = task
+        return task
+
+    @staticmethod
+    def _log_failure(name: str, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Live traffic provider {name} failed: {task.exception()}")
+
+    async def snapshot(self) -> Dict[str, FusedFlight]:
+        """
+        Fetch from every provider and return the fused flights keyed by fusion key.
+        """
+        tasks = [self._start(source) for source in self.sources.values()]
+        done, pending = await asyncio.wait(tasks, timeout=self.timeout)
+        if pending:
+            slow = [name for name, task in self._tasks.items() if task in pending]
+            logger.warning(f"Fusing without waiting for slow providers: {', '.join(slow)}")
+
+        cutoff = time.time() - self.max_result_age
+        records = []
+        for name, results in self._results.items():
+            if self._result_times.get(name, 0) >= cutoff:
+                records.extend(results)
+        return merge_flights(records, self.priorities, self.tie_window)
+
+    async def aclose(self):
+        """Cancel provider fetches that are still running."""
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+def to_live_record(flight: FusedFlight) -> Dict[str, Any]:
+    """
+    Convert a fused flight into the live record consumed by the ingest
+    pipeline. The fusion key is the flight id, so an aircraft keeps one id
+    whichever provider won the merge; timestamp is the fix's position time.
+    """
+    return {
+        'flight_id': flight.key,
+        'callsign': flight.callsign,
+        'tail_number': flight.registration,
+        'icao24': flight.icao24,
+        'aircraft_type': flight.aircraft_type,
+        'origin': flight.origin,
+        'destination': flight.destination,
+        'latitude': flight.latitude,
+        'longitude': flight.longitude,
+        'altitude': flight.altitude,
+        'speed': flight.speed,
+        'heading': flight.heading,
+        'status': flight.status,
+        'timestamp': flight.timestamp,
+        'source': flight.source,
+    }
+
+def _fr24_bounds(bounds: Tuple[float, float, float, float]) -> str:
+    """FR24 bounds (north,south,west,east) of a (lat1, lon1, lat2, lon2) box."""
+    lat1, lon1, lat2, lon2 = bounds
+    return f"{max(lat1, lat2)},{min(lat1, lat2)},{min(lon1, lon2)},{max(lon1, lon2)}"
+
+def _gated(name: str, fetch: Callable[[], Awaitable[Iterable[Any]]],
+           allow: Optional[Callable[[str], Awaitable[bool]]]) -> Callable[[], Awaitable[Iterable[Any]]]:
+    if allow is None:
+        return fetch
+
+    async def gated_fetch() -> Iterable[Any]:
+        # A provider that may not be called this round contributes nothing
+        if not await allow(name):
+            return []
+        return await fetch()
+    return gated_fetch
+
+def build_sources(opensky_client=None, flightradar_client=None, fr24_client=None,
+                  bounds: Optional[Tuple[float, float, float, float]] = None,
+                  allow: Optional[Callable[[str], Awaitable[bool]]] = None) -> List[FusionSource]:
+    """
+    Build fusion sources for the async provider clients that are configured.
+
+    Args:
+        opensky_client: Optional AsyncOpenSkyClient
+        flightradar_client: Optional AsyncFlightradarClient
+        fr24_client: Optional AsyncFlightRadar24Client
+        bounds: Optional bounding box (lat1, lon1, lat2, lon2) every source is restricted to
+        allow: Optional async check called with the source name before each fetch,
+            e.g. to charge an API credit budget; False skips the source for that round
+
+    Returns:
+        List of FusionSource
+    """
+    sources = []
+    if opensky_client is not None:
+        fetch = partial(opensky_client.get_state_vectors, bounds) if bounds else opensky_client.get_state_vectors
+        sources.append(FusionSource('opensky', SOURCE_PRIORITIES['opensky'], _gated('opensky', fetch, allow), normalize_opensky))
+    if flightradar_client is not None:
+        fetch = partial(flightradar_client.get_live_flights, bounds) if bounds else flightradar_client.get_live_flights
+        sources.append(FusionSource('flightradar', SOURCE_PRIORITIES['flightradar'], _gated('flightradar', fetch, allow), normalize_flightradar))
+    if fr24_client is not None:
+        fetch = partial(fr24_client.get_live_flights, _fr24_bounds(bounds)) if bounds else fr24_client.get_live_flights
+        sources.append(FusionSource('fr24', SOURCE_PRIORITIES['fr24'], _gated('fr24', fetch, allow), normalize_fr24))
+    return sources
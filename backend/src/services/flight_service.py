@@ -27,6 +27,23 @@ def get_active_flights(db: Session):
     """
     return db.query(Flight).filter(Flight.status == 'active').all()
 
+def flight_to_dict(flight: Flight) -> Dict[str, Any]:
+    """
+    Convert a flight to a JSON-serializable dict of all its columns, as
+    served by /api/flights/active.
+    """
+    values = {}
+    for column in Flight.__table__.columns:
+        value = getattr(flight, column.name)
+        values[column.name] = value.isoformat() if isinstance(value, datetime) else value
+    return values
+
+def active_flights_payload(db: Session) -> Dict[str, Any]:
+    """
+    Active flights in the response shape of /api/flights/active.
+    """
+    return {"flights": [flight_to_dict(flight) for flight in get_active_flights(db)]}
+
 def get_flight_by_id(db: Session, flight_id: int):
     """
     Retrieve a specific flight by ID.
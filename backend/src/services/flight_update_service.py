@@ -1,80 +1,482 @@
 import asyncio
-import random
+import logging
+import os
+import time
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 
 from ..config.db import get_db
 from ..models.flight import Flight
 from ..websockets.flight_socket import flight_manager
-from .flightradar_client import FlightradarClient
+from .flightradar_client import AsyncFlightradarClient
+from .flightradar24_client import AsyncFlightRadar24Client
+from .open_sky_client import AsyncOpenSkyClient
+from .flight_fusion import FlightFusionEngine, build_sources, to_live_record
+from .ingest_pipeline import IngestPipeline, Stage
+from .change_detector import ChangeDetector
+from .credit_budget import FLEET, LIVE_POSITIONS, fr24_credit_budget
+from .resilience import provider_policy
+from .dead_reckoning import DeadReckoningEngine
+from .live_store import live_store
+from .polling_scheduler import PollingScheduler
+from .position_smoother import PositionSmoother
+from .stale_filter import HighWaterMarks
+from .snapshot_persistence import DEFAULT_SNAPSHOT_INTERVAL_SECONDS, load_snapshot, save_snapshot, snapshot_path
+from .flight_service import active_flights_payload
+from .shared_snapshot import ACTIVE_FLIGHTS_SEGMENT, FLEET_SEGMENT, LIVE_TRAFFIC_SEGMENT, SHARED_SNAPSHOT_ENABLED, publish_snapshot
+
+logger = logging.getLogger(__name__)
 
 # Constants for flight updates
-UPDATE_INTERVAL_SECONDS = 30  # Update interval in seconds
+UPDATE_INTERVAL_SECONDS = 30  # Base update interval in seconds
+MIN_SLEEP_SECONDS = 1  # Shortest pause between scheduler checks
 
-# Initialize the Flightradar client
-flightradar_client = FlightradarClient()
+# Live traffic providers fused by the fetch stage (flightradar, opensky, fr24)
+LIVE_TRAFFIC_PROVIDERS = [
+    name.strip() for name in os.getenv('LIVE_TRAFFIC_PROVIDERS', 'flightradar,opensky').split(',') if name.strip()
+]
 
-async def update_flight_positions():
+# Initialize the provider clients (non-blocking, pooled connections)
+flightradar_client = AsyncFlightradarClient()
+opensky_client = AsyncOpenSkyClient() if 'opensky' in LIVE_TRAFFIC_PROVIDERS else None
+fr24_client = AsyncFlightRadar24Client(os.getenv('FLIGHTRADAR_API_KEY', '')) \
+    if 'fr24' in LIVE_TRAFFIC_PROVIDERS and os.getenv('FLIGHTRADAR_API_KEY') else None
+
+# One fusion engine per polling region, created on its first poll
+_fusion_engines: Dict[str, FlightFusionEngine] = {}
+
+# Adaptive per-region polling cadence and API credit budget
+polling_scheduler = PollingScheduler.from_env(base_interval=UPDATE_INTERVAL_SECONDS)
+
+# Capacity of the queues between ingest stages
+INGEST_QUEUE_SIZE = 8
+# Steady cadence of WebSocket broadcasts (seconds)
+BROADCAST_INTERVAL_SECONDS = 5
+# Live flights not reported again within this many seconds are forgotten
+LIVE_FLIGHT_MAX_AGE_SECONDS = 600
+
+# Latest live record per flight id across all regions, maintained by the diff stage
+latest_live_flights: Dict[str, Dict[str, Any]] = {}
+_live_flight_seen_at: Dict[str, float] = {}
+
+# Kalman-filtered positions and velocities of all live traffic
+position_smoother = PositionSmoother()
+
+# Newest provider timestamp per live flight; older reports are dropped
+live_high_water_marks = HighWaterMarks()
+
+# Latest broadcast record of every fleet flight, maintained by the broadcast stage
+latest_fleet_flights: Dict[Any, Dict[str, Any]] = {}
+# Fleet statuses tracked and broadcast as active
+ACTIVE_FLIGHT_STATUSES = ("ACTIVE", "EN_ROUTE", "DEPARTED")
+
+# Seconds between warm-restart snapshot writes
+WARM_SNAPSHOT_INTERVAL_SECONDS = float(os.getenv('WARM_SNAPSHOT_INTERVAL_SECONDS', DEFAULT_SNAPSHOT_INTERVAL_SECONDS))
+
+# Last fix of every fleet aircraft, projected while the provider has no data
+dead_reckoning = DeadReckoningEngine()
+# Projections below this confidence are no longer moved
+MIN_PROJECTION_CONFIDENCE = 0.05
+# Fleet aircraft without a fix for this many seconds are projected
+FLEET_STALE_AFTER_SECONDS = 2 * UPDATE_INTERVAL_SECONDS
+# Database id of every active fleet flight by ('flight_id', id) and
+# ('tail_number', registration), refreshed by the persist stage
+fleet_fix_keys: Dict[Tuple[str, str], int] = {}
+
+# Movement/time thresholds deciding which position reports are written and broadcast
+change_detector = ChangeDetector.from_env()
+
+async def _may_fetch(provider: str) -> bool:
+    """
+    Charge a credit for the providers billed per request; OpenSky is free.
+    A provider whose circuit breaker rejects calls is skipped uncharged.
+    """
+    if provider == 'opensky':
+        return True
+    if provider_policy(provider).breaker.rejecting:
+        return False
+    return await fr24_credit_budget.try_spend_async(LIVE_POSITIONS, FLEET)
+
+def fusion_engine(region) -> FlightFusionEngine:
+    """Return the fusion engine polling every configured provider within a region."""
+    engine = _fusion_engines.get(region.name)
+    if engine is None:
+        sources = build_sources(
+            opensky_client=opensky_client,
+            flightradar_client=flightradar_client if 'flightradar' in LIVE_TRAFFIC_PROVIDERS else None,
+            fr24_client=fr24_client,
+            bounds=region.bounds,
+            allow=_may_fetch,
+        )
+        engine = FlightFusionEngine(sources)
+        _fusion_engines[region.name] = engine
+    return engine
+
+async def close_live_traffic_clients():
+    """Stop running provider fetches and close the pooled provider connections."""
+    for engine in _fusion_engines.values():
+        await engine.aclose()
+    for client in (flightradar_client, opensky_client, fr24_client):
+        if client is not None:
+            await client.aclose()
+
+async def fetch_live_traffic():
+    """
+    Pipeline source: poll every due region on the adaptive schedule of
+    polling_scheduler and yield the flights returned for each round, fused
+    across the configured providers (see flight_fusion). Each record carries
+    the provider's position time as its timestamp, or the fetch time if the
+    provider reports none.
+    """
+    while True:
+        regions = polling_scheduler.due_regions()
+        if not regions:
+            await asyncio.sleep(max(MIN_SLEEP_SECONDS, polling_scheduler.seconds_until_next()))
+            continue
+
+        live_flights = []
+        snapshots = await asyncio.gather(
+            *(fusion_engine(region).snapshot() for region in regions), return_exceptions=True
+        )
+        for region, fused in zip(regions, snapshots):
+            if isinstance(fused, Exception):
+                logger.error(f"Error fetching live flights for region {region.name}: {fused}")
+                fused = {}
+            region_flights = [to_live_record(flight) for flight in fused.values()]
+            # No data (errors or exhausted credits): the fleet is projected by
+            # dead reckoning and the last traffic count is reused. Fleet
+            # activity is refreshed by the persist stage.
+            traffic = len(region_flights) if region_flights else region.traffic
+            polling_scheduler.record_poll(region, traffic, region.fleet_airborne)
+            live_flights.extend(region_flights)
+
+        yield live_flights
+
+        await asyncio.sleep(max(MIN_SLEEP_SECONDS, polling_scheduler.seconds_until_next()))
+
+async def normalize_live_traffic(live_flights: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Normalize stage: drop records without an id or older than the flight's
+    last report, keep the shared columnar store of live traffic current and
+    refresh the dead-reckoning fix of every fleet aircraft that reported.
+    """
+    live_flights = [
+        flight for flight in live_flights
+        if flight.get('flight_id') and live_high_water_marks.accept(flight['flight_id'], flight.get('timestamp'))
+    ]
+    live_store.upsert_many(live_flights)
+    # One vectorized filter pass over every flight reported in this round
+    position_smoother.smooth(live_store, [flight['flight_id'] for flight in live_flights])
+    record_fleet_fixes(live_flights)
+    return live_flights
+
+def record_fleet_fixes(live_flights: List[Dict[str, Any]]):
+    """
+    Record a dead-reckoning fix for every fleet flight among the reports,
+    matched by flight id or, as a fallback, by tail number. Every accepted
+    report counts, including those the diff stage drops as unchanged, so an
+    aircraft that barely moves is never projected from an old fix.
+    """
+    for flight in live_flights:
+        fleet_id = fleet_fix_keys.get(('flight_id', flight['flight_id']))
+        if fleet_id is None and flight.get('tail_number'):
+            fleet_id = fleet_fix_keys.get(('tail_number', flight['tail_number']))
+        if fleet_id is None or flight.get('latitude') is None or flight.get('longitude') is None:
+            continue
+        dead_reckoning.record_fix(
+            fleet_id, flight['latitude'], flight['longitude'],
+            flight.get('speed'), flight.get('heading'),
+            flight.get('timestamp') or time.time()
+        )
+
+async def diff_live_traffic(live_flights: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Diff stage: merge the round into latest_live_flights and pass on only the
+    flights that changed meaningfully (see change_detector). The list is
+    passed on even when empty, so the persist stage still projects fleet
+    aircraft that stopped reporting.
+    """
+    now = time.time()
+    changed = []
+    for flight in live_flights:
+        flight_id = flight['flight_id']
+        if change_detector.check(('live', flight_id), flight, now):
+            changed.append(flight)
+        latest_live_flights[flight_id] = flight
+        _live_flight_seen_at[flight_id] = now
+
+    cutoff = now - LIVE_FLIGHT_MAX_AGE_SECONDS
+    expired = [flight_id for flight_id, seen_at in _live_flight_seen_at.items() if seen_at < cutoff]
+    for flight_id in expired:
+        del _live_flight_seen_at[flight_id]
+        latest_live_flights.pop(flight_id, None)
+        live_store.remove(flight_id)
+        change_detector.forget(('live', flight_id))
+        live_high_water_marks.forget(flight_id)
+        position_smoother.forget(flight_id)
+
+    # Share the live traffic with every API worker, which relays it to its
+    # viewport subscribers; without shared snapshots serve this process's
+    if changed or expired:
+        payload = live_traffic_payload(live_store.snapshot())
+        if not (SHARED_SNAPSHOT_ENABLED and await asyncio.to_thread(publish_snapshot, LIVE_TRAFFIC_SEGMENT, payload)):
+            await flight_manager.broadcast_traffic(payload)
+
+    return changed
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.utcfromtimestamp(timestamp).isoformat() if timestamp else None
+
+def live_traffic_payload(snapshot) -> List[Dict[str, Any]]:
+    """
+    Convert a live store snapshot into the FlightResponse shape served by
+    /api/flights/live.
+    """
+    return [
+        {
+            "flight_id": record["flight_id"],
+            "callsign": record["callsign"],
+            "registration": record["tail_number"],
+            "aircraft_type": record["aircraft_type"],
+            "latitude": record["latitude"],
+            "longitude": record["longitude"],
+            "altitude": record["altitude"],
+            "speed": record["speed"],
+            "heading": record["heading"],
+            "status": record["status"],
+            "departure_airport": record["origin"],
+            "arrival_airport": record["destination"],
+            "smoothed_latitude": record["smoothed_latitude"],
+            "smoothed_longitude": record["smoothed_longitude"],
+            "velocity_north": record["velocity_north"],
+            "velocity_east": record["velocity_east"],
+            "last_updated": _isoformat(record["position_timestamp"] or record["timestamp"])
+        }
+        for record in snapshot.to_records()
+    ]
+
+async def persist_fleet_positions(changes: List[List[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """
+    Persist stage: apply every queued round of changes to our fleet in one
+    database transaction, off the event loop. Only the records the diff stage
+    passed on are matched against the fleet (the newest per flight when
+    several rounds queued up), and only fleet flights that changed
+    meaningfully are written. Fleet flights without a report in the last
+    FLEET_STALE_AFTER_SECONDS are projected by dead reckoning.
+
+    The changes are merged into latest_fleet_flights, which is pruned to the
+    flights still active, and the full fleet is passed on for broadcasting
+    whenever it changed (the broadcast stage keeps only the newest state).
+    """
+    changed = {}
+    for round_changes in changes:
+        for flight in round_changes:
+            changed[flight['flight_id']] = flight
+    cutoff = time.time() - FLEET_STALE_AFTER_SECONDS
+    reporting = [
+        latest_live_flights[flight_id] for flight_id, seen_at in _live_flight_seen_at.items()
+        if seen_at >= cutoff and flight_id in latest_live_flights
+    ]
+    flight_data, fleet_positions, active_ids, fix_keys = await asyncio.to_thread(
+        _persist_fleet_positions, list(changed.values()), reporting
+    )
+    # Lets the normalize stage refresh fleet fixes from every report
+    fleet_fix_keys.clear()
+    fleet_fix_keys.update(fix_keys)
+
+    # Feed fleet activity back into the polling schedule
+    for region in polling_scheduler.regions:
+        region.fleet_airborne = sum(1 for lat, lon in fleet_positions if region.contains(lat, lon))
+
+    # Flights that landed or otherwise left the active set are removed
+    inactive = [flight_id for flight_id in latest_fleet_flights if flight_id not in active_ids]
+    for flight_id in inactive:
+        del latest_fleet_flights[flight_id]
+        dead_reckoning.forget(flight_id)
+    latest_fleet_flights.update((flight["id"], flight) for flight in flight_data["flights"] if flight["id"] in active_ids)
+    if not (flight_data["flights"] or inactive):
+        return None
+    return {"flights": list(latest_fleet_flights.values())}
+
+def _persist_fleet_positions(live_flights: List[Dict[str, Any]], reporting: List[Dict[str, Any]]):
+    db = next(get_db())
+    try:
+        # Get all active flights from the database
+        active_flights = db.query(Flight).filter(Flight.status.in_(ACTIVE_FLIGHT_STATUSES)).all()
+
+        # Update flight positions from the changed live data of every region
+        updated_flights = update_flights_from_api(active_flights, live_flights, db, change_detector, reporting)
+
+        # Commit the changes
+        db.commit()
+        fleet_positions = [(flight.current_position_lat, flight.current_position_lon) for flight in active_flights]
+        # Flights whose status this update moved out of the active set are not active any more
+        active_ids = {flight.id for flight in active_flights if flight.status in ACTIVE_FLIGHT_STATUSES}
+        fix_keys = {('flight_id', flight.flight_id): flight.id for flight in active_flights if flight.id in active_ids}
+        fix_keys.update(
+            (('tail_number', flight.tail_number), flight.id)
+            for flight in active_flights if flight.id in active_ids and flight.tail_number
+        )
+
+        # Prepare the flight data for broadcasting
+        return {
+            "flights": [
+                {
+                    "id": flight.id,
+                    "flight_id": flight.flight_id,
+                    "tail_number": flight.tail_number,
+                    "status": flight.status,
+                    "departure_time": flight.departure_time.isoformat() if flight.departure_time else None,
+                    "arrival_time": flight.arrival_time.isoformat() if flight.arrival_time else None,
+                    "current_position_lat": flight.current_position_lat,
+                    "current_position_lon": flight.current_position_lon,
+                    "altitude": flight.altitude,
+                    "speed": flight.speed,
+                    "heading": flight.heading,
+                    "position_confidence": dead_reckoning.confidence(flight.id)
+                }
+                for flight in updated_flights
+            ]
+        }, fleet_positions, active_ids, fix_keys
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+async def broadcast_fleet_positions(fleet: Dict[str, Any]):
+    """
+    Broadcast stage: publish the full fleet state to the shared snapshot,
+    which every API worker relays to its WebSocket clients as deltas (flights
+    missing from it are reported as removed). Without shared snapshots it is
+    sent to this process's clients directly.
+    """
+    if SHARED_SNAPSHOT_ENABLED and await asyncio.to_thread(publish_snapshot, FLEET_SEGMENT, fleet):
+        return
+    await flight_manager.broadcast(fleet)
+
+def _publish_active_flights() -> bool:
+    db = next(get_db())
+    try:
+        return publish_snapshot(ACTIVE_FLIGHTS_SEGMENT, active_flights_payload(db))
+    finally:
+        db.close()
+
+async def publish_active_flights_periodically():
     """
-    Background task to update flight positions periodically using Flightradar API
-    and broadcast to WebSocket clients.
+    Background task publishing the active flights, in the shape served by
+    /api/flights/active, every UPDATE_INTERVAL_SECONDS. The API workers serve
+    them from the shared snapshot and fall back to the database once it is
+    older than ACTIVE_FLIGHTS_MAX_AGE_SECONDS.
     """
     while True:
-        # Get a new database session
-        db = next(get_db())
         try:
-            # Get all active flights from the database
-            active_flights = db.query(Flight).filter(Flight.status.in_(["ACTIVE", "EN_ROUTE", "DEPARTED"])).all()
-            
-            # Get flight data from Flightradar API
-            live_flights = flightradar_client.get_live_flights()
-            
-            # Update flight positions based on Flightradar data
-            updated_flights = update_flights_from_api(active_flights, live_flights, db)
-            
-            # Commit the changes
-            db.commit()
-            
-            # Prepare the flight data for broadcasting
-            flight_data = {
-                "flights": [
-                    {
-                        "id": flight.id,
-                        "flight_id": flight.flight_id,
-                        "tail_number": flight.tail_number,
-                        "status": flight.status,
-                        "departure_time": flight.departure_time.isoformat() if flight.departure_time else None,
-                        "arrival_time": flight.arrival_time.isoformat() if flight.arrival_time else None,
-                        "current_position_lat": flight.current_position_lat,
-                        "current_position_lon": flight.current_position_lon,
-                        "altitude": flight.altitude,
-                        "speed": flight.speed,
-                        "heading": flight.heading
-                    }
-                    for flight in updated_flights
-                ]
-            }
-            
-            # Broadcast the updated flight data
-            await flight_manager.broadcast(flight_data)
-            
+            await asyncio.to_thread(_publish_active_flights)
         except Exception as e:
-            print(f"Error updating flight positions: {e}")
-        finally:
-            db.close()
-        
-        # Wait for the next update interval
+            logger.error(f"Error publishing active flights: {e}")
         await asyncio.sleep(UPDATE_INTERVAL_SECONDS)
 
-def update_flights_from_api(active_flights: List[Flight], live_flights: List[Dict[str, Any]], db: Session) -> List[Flight]:
+# Live-traffic ingestion: fetch -> normalize -> diff -> persist -> broadcast.
+# Stages run concurrently behind bounded queues; persistence batches whatever
+# rounds queued up while it was busy, and broadcasting only ever sends the
+# newest state at a steady cadence.
+ingest_pipeline = IngestPipeline('fetch', fetch_live_traffic, [
+    Stage('normalize', normalize_live_traffic, queue_size=INGEST_QUEUE_SIZE),
+    Stage('diff', diff_live_traffic, queue_size=INGEST_QUEUE_SIZE),
+    Stage('persist', persist_fleet_positions, queue_size=INGEST_QUEUE_SIZE, batch=True),
+    Stage('broadcast', broadcast_fleet_positions, queue_size=1, latest_only=True,
+          min_interval=BROADCAST_INTERVAL_SECONDS),
+])
+
+def restore_warm_snapshot(path: Optional[str] = None) -> bool:
+    """
+    Load the last saved snapshot into the live store, the dead-reckoning
+    engine and the fleet state, and share it with the API workers, so clients
+    get data before the first poll completes.
+    
+    Returns:
+        True if a snapshot was loaded
+    """
+    warm = load_snapshot(path or snapshot_path())
+    if warm is None:
+        return False
+    
+    live_store.restore(warm.live)
+    dead_reckoning.restore(warm.dead_reckoning_keys, warm.dead_reckoning_columns)
+    for record in warm.live.to_records():
+        seen_at = record["timestamp"] or warm.saved_at
+        # Fetched records carry the provider's position time as 'timestamp'
+        record["timestamp"] = record.pop("position_timestamp") or seen_at
+        latest_live_flights[record["flight_id"]] = record
+        _live_flight_seen_at[record["flight_id"]] = seen_at
+    if warm.fleet:
+        latest_fleet_flights.update((flight["id"], flight) for flight in warm.fleet.get("flights", []))
+        flight_manager.last_flight_data = warm.fleet
+    
+    if SHARED_SNAPSHOT_ENABLED:
+        publish_snapshot(LIVE_TRAFFIC_SEGMENT, live_traffic_payload(warm.live))
+        if warm.fleet:
+            publish_snapshot(FLEET_SEGMENT, warm.fleet)
+    logger.info(f"Restored {len(warm.live)} live flights and {len(warm.dead_reckoning_keys)} fleet fixes from {path or snapshot_path()}")
+    return True
+
+async def save_warm_snapshot(path: Optional[str] = None):
+    """
+    Write the live store, dead-reckoning fixes and fleet state to the
+    warm-restart snapshot file, off the event loop.
+    """
+    live = live_store.snapshot()
+    state = dead_reckoning.state()
+    fleet = {"flights": list(latest_fleet_flights.values())}
+    await asyncio.to_thread(save_snapshot, path or snapshot_path(), live, state, fleet)
+
+async def save_warm_snapshots_periodically():
+    """
+    Background task writing the warm-restart snapshot every
+    WARM_SNAPSHOT_INTERVAL_SECONDS, and once more when cancelled.
+    """
+    try:
+        while True:
+            await asyncio.sleep(WARM_SNAPSHOT_INTERVAL_SECONDS)
+            try:
+                await save_warm_snapshot()
+            except Exception as e:
+                logger.error(f"Error saving warm-restart snapshot: {e}")
+    except asyncio.CancelledError:
+        await save_warm_snapshot()
+        raise
+
+async def update_flight_positions():
+    """
+    Background task to update flight positions using Flightradar API and
+    broadcast to WebSocket clients. Regions are polled on the adaptive
+    schedule of polling_scheduler. State is restored from and periodically
+    saved to the warm-restart snapshot.
+    """
+    restore_warm_snapshot()
+    tasks = [ingest_pipeline.run(), save_warm_snapshots_periodically()]
+    if SHARED_SNAPSHOT_ENABLED:
+        tasks.append(publish_active_flights_periodically())
+    await asyncio.gather(*tasks)
+
+def update_flights_from_api(active_flights: List[Flight], live_flights: List[Dict[str, Any]], db: Session,
+                            detector: Optional[ChangeDetector] = None,
+                            reporting: Optional[List[Dict[str, Any]]] = None) -> List[Flight]:
     """
     Update flight positions based on data from the Flightradar API.
+    Fleet flights that are not reporting are projected by dead reckoning
+    once their last fix is older than FLEET_STALE_AFTER_SECONDS; their
+    fixes are recorded by the normalize stage (see record_fleet_fixes).
     
     Args:
         active_flights: List of active flights from the database
-        live_flights: List of live flights from the Flightradar API
+        live_flights: Live flights that changed since the last call
         db: Database session
+        detector: Optional change detector; flights whose live data did not
+            change meaningfully are left untouched and not returned
+        reporting: Every flight reported recently, changed or not; defaults
+            to live_flights
         
     Returns:
         List of updated flights
@@ -89,13 +491,23 @@ def update_flights_from_api(active_flights: List[Flight], live_flights: List[Dic
         flight['tail_number']: flight for flight in live_flights if flight.get('tail_number')
     }
     
+    # Flights still reporting are not projected, even when unchanged
+    reporting = live_flights if reporting is None else reporting
+    reporting_ids = {flight['flight_id'] for flight in reporting}
+    reporting_tails = {flight['tail_number'] for flight in reporting if flight.get('tail_number')}
+    
     updated_flights = []
+    unmatched_flights = []
     
     for flight in active_flights:
         # Try to find matching flight in live data
         live_flight = live_flight_map.get(flight.flight_id) or tail_number_map.get(flight.tail_number)
         
         if live_flight:
+            # Skip flights that have not moved enough to be worth writing
+            if detector is not None and not detector.check(('fleet', flight.id), live_flight):
+                continue
+            
             # Update flight with live data
             flight.current_position_lat = live_flight.get('latitude', flight.current_position_lat)
             flight.current_position_lon = live_flight.get('longitude', flight.current_position_lon)
@@ -108,32 +520,58 @@ def update_flights_from_api(active_flights: List[Flight], live_flights: List[Dic
                 flight.status = map_status(live_flight['status'])
             
             updated_flights.append(flight)
-        else:
-            # If no live data is available, fall back to simulation
-            simulate_flight_position(flight)
-            updated_flights.append(flight)
+        elif flight.flight_id not in reporting_ids and flight.tail_number not in reporting_tails:
+            unmatched_flights.append(flight)
+    
+    # Flights that stopped reporting are projected along the last heading and speed
+    updated_flights.extend(extrapolate_flight_positions(unmatched_flights, detector))
     
     return updated_flights
 
-def simulate_flight_position(flight: Flight):
-    """
-    Simulate a flight's position if no live data is available.
-    This is a fallback method when the API doesn't return data for a flight.
+def extrapolate_flight_positions(flights: List[Flight], detector: Optional[ChangeDetector] = None,
+                                 now: Optional[float] = None,
+                                 stale_after: float = FLEET_STALE_AFTER_SECONDS) -> List[Flight]:
     """
-    # Skip if the flight doesn't have position data
-    if flight.current_position_lat is None or flight.current_position_lon is None:
-        return
-    
-    # Add some small random movement
-    flight.current_position_lat += random.uniform(-0.01, 0.01)
-    flight.current_position_lon += random.uniform(-0.01, 0.01)
-    
-    # Add some randomness to altitude and speed
-    flight.altitude += random.randint(-500, 500)
-    flight.altitude = max(20000, min(40000, flight.altitude))  # Keep altitude within reasonable bounds
+    Move flights without live data along their last heading and speed.
+    This is the fallback when the API doesn't return data for a flight.
     
-    flight.speed += random.randint(-20, 20)
-    flight.speed = max(400, min(600, flight.speed))  # Keep speed within reasonable bounds
+    Args:
+        flights: Flights missing from the latest live data
+        detector: Optional change detector; projections that did not move
+            meaningfully are not applied
+        now: Optional target time (defaults to now)
+        stale_after: Seconds since the last fix before a flight is moved;
+            flights with a recent fix are still reporting and left alone
+        
+    Returns:
+        List of flights whose position was updated
+    """
+    now = time.time() if now is None else now
+    for flight in flights:
+        # Seed the engine from the stored position after a restart
+        if flight.id not in dead_reckoning and flight.current_position_lat is not None \
+                and flight.current_position_lon is not None:
+            updated_at = getattr(flight, 'updated_at', None)
+            dead_reckoning.record_fix(
+                flight.id, flight.current_position_lat, flight.current_position_lon, flight.speed, flight.heading,
+                timestamp=now - (datetime.utcnow() - updated_at).total_seconds() if updated_at else now
+            )
+
+    projections = dead_reckoning.project([flight.id for flight in flights], now)
+    extrapolated = []
+    for flight in flights:
+        projection = projections.get(flight.id)
+        # Stop moving aircraft whose last fix is too old to trust
+        if projection is None or projection.confidence < MIN_PROJECTION_CONFIDENCE:
+            continue
+        if projection.age < stale_after:
+            continue
+        if detector is not None and not detector.check(('fleet', flight.id), projection._asdict(), now):
+            continue
+        flight.current_position_lat = projection.latitude
+        flight.current_position_lon = projection.longitude
+        extrapolated.append(flight)
+    return extrapolated
 
 def map_status(api_status: str) -> str:
     """
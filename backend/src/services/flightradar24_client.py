@@ -1,34 +1,124 @@
+import asyncio
 import requests
+import httpx
 import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+from .http_pool import create_async_session
+from .historical_cache import HistoricalFlightCache
+from .resilience import CircuitOpenError, ResiliencePolicy, provider_policy
+
 logger = logging.getLogger(__name__)
 
+BASE_URL = 'https://fr24api.flightradar24.com/api'
+
+# Tiled fetch defaults
+DEFAULT_TILE_ROWS = 2
+DEFAULT_TILE_COLUMNS = 2
+DEFAULT_TILE_CONCURRENCY = 4
+
+def _auth_headers(api_token: str) -> Dict[str, str]:
+    """Build the headers required by the Flightradar24 API."""
+    return {
+        'Accept': 'application/json',
+        'Authorization': f'Bearer {api_token}',
+        'Accept-Version': 'v1'
+    }
+
+def split_bounds(bounds: str, rows: int, columns: int) -> List[str]:
+    """
+    Split a bounding box into a grid of smaller bounding boxes.
+    
+    Args:
+        bounds: Bounding box coordinates (lat1,lat2,lon1,lon2)
+        rows: Number of tiles along the latitude axis
+        columns: Number of tiles along the longitude axis
+        
+    Returns:
+        Tile bounds in the same format, covering the whole box
+    """
+    lat1, lat2, lon1, lon2 = (float(value) for value in bounds.split(','))
+    lat_step = (lat2 - lat1) / rows
+    lon_step = (lon2 - lon1) / columns
+    tiles = []
+    for row in range(rows):
+        for column in range(columns):
+            tiles.append(','.join(
+                f"{value:.6f}".rstrip('0').rstrip('.') for value in (
+                    lat1 + row * lat_step,
+                    lat1 + (row + 1) * lat_step,
+                    lon1 + column * lon_step,
+                    lon1 + (column + 1) * lon_step,
+                )
+            ))
+    return tiles
+
+def _parse_live_flights(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Convert a live flight positions response into flight dictionaries."""
+    flights = []
+    
+    for flight in data.get('data', []):
+        processed_flight = {
+            'flight_id': flight.get('id'),
+            'callsign': flight.get('callsign'),
+            'registration': flight.get('registration'),
+            'aircraft_type': flight.get('aircraft', {}).get('type'),
+            'latitude': flight.get('latitude'),
+            'longitude': flight.get('longitude'),
+            'altitude': flight.get('altitude'),
+            'speed': flight.get('speed'),
+            'heading': flight.get('heading'),
+            'status': flight.get('status'),
+            'departure_airport': flight.get('departure', {}).get('code'),
+            'arrival_airport': flight.get('arrival', {}).get('code'),
+            'airline': flight.get('airline', {}).get('name'),
+            # Provider time of the position report (ISO 8601, UTC)
+            'timestamp': flight.get('timestamp'),
+            'last_updated': flight.get('timestamp') or datetime.utcnow().isoformat()
+        }
+        flights.append(processed_flight)
+    
+    return flights
+
 class FlightRadar24Client:
     """Client for interacting with the FlightRadar24 API."""
     
-    def __init__(self, api_token: str):
-        """Initialize the client with API token."""
-        self.base_url = 'https://fr24api.flightradar24.com/api'
+    def __init__(self, api_token: str, historical_cache: Optional[HistoricalFlightCache] = None,
+                 resilience: Optional[ResiliencePolicy] = None):
+        """
+        Initialize the client with API token.
+        
+        Args:
+            api_token: FlightRadar24 API token
+            historical_cache: Optional disk cache for historical flight responses
+            resilience: Optional retry/rate-limit/breaker policy (shared FR24 policy by default)
+        """
+        self.base_url = BASE_URL
         self.session = requests.Session()
-        self.session.headers.update({
-            'Accept': 'application/json',
-            'Authorization': f'Bearer {api_token}',
-            'Accept-Version': 'v1'
-        })
+        self.session.headers.update(_auth_headers(api_token))
+        self.historical_cache = historical_cache
+        self.resilience = resilience or provider_policy('fr24')
 
     def _make_request(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Make a request to the Flightradar24 API."""
         url = f"{self.base_url}{endpoint}"
-        try:
+        
+        def send() -> Dict[str, Any]:
             response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()
             return response.json()
-        except requests.exceptions.RequestException as e:
+        
+        try:
+            return self.resilience.call(send)
+        except (requests.exceptions.RequestException, CircuitOpenError) as e:
             logger.error(f"Error making request to {url}: {e}")
             return {}
 
+    def metrics(self) -> Dict[str, Any]:
+        """Circuit breaker state and request counters of the FR24 policy."""
+        return self.resilience.metrics()
+
     def get_live_flights(self, bounds: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Get live flight positions.
@@ -44,26 +134,7 @@ class FlightRadar24Client:
         
         try:
             data = self._make_request(endpoint, params)
-            flights = []
-            
-            for flight in data.get('data', []):
-                processed_flight = {
-                    'flight_id': flight.get('id'),
-                    'callsign': flight.get('callsign'),
-                    'registration': flight.get('registration'),
-                    'aircraft_type': flight.get('aircraft', {}).get('type'),
-                    'latitude': flight.get('latitude'),
-                    'longitude': flight.get('longitude'),
-                    'altitude': flight.get('altitude'),
-                    'speed': flight.get('speed'),
-                    'heading': flight.get('heading'),
-                    'status': flight.get('status'),
-                    'departure_airport': flight.get('departure', {}).get('code'),
-                    'arrival_airport': flight.get('arrival', {}).get('code'),
-                    'airline': flight.get('airline', {}).get('name'),
-                    'last_updated': datetime.utcnow().isoformat()
-                }
-                flights.append(processed_flight)
+            flights = _parse_live_flights(data)
             
             logger.info(f"Fetched {len(flights)} live flights from Flightradar24 API")
             return flights
@@ -95,9 +166,18 @@ class FlightRadar24Client:
         Returns:
             Dictionary containing historical flight information
         """
+        if self.historical_cache is not None:
+            cached = self.historical_cache.get(flight_id, date)
+            if cached is not None:
+                return cached
+        
         endpoint = f'/flights/historical/{flight_id}'
         params = {'date': date.strftime('%Y-%m-%d')}
-        return self._make_request(endpoint, params)
+        data = self._make_request(endpoint, params)
+        
+        if self.historical_cache is not None:
+            self.historical_cache.put(flight_id, date, data)
+        return data
 
     def get_airport_details(self, airport_code: str) -> Dict[str, Any]:
         """
@@ -123,4 +203,135 @@ class FlightRadar24Client:
             Dictionary containing airline information
         """
         endpoint = f'/airlines/{airline_code}'
-        return self._make_request(endpoint) 
\ No newline at end of file
+        return self._make_request(endpoint)
+
+class AsyncFlightRadar24Client:
+    """Non-blocking client for the FlightRadar24 API with pooled keep-alive connections."""
+    
+    def __init__(self, api_token: str, historical_cache: Optional[HistoricalFlightCache] = None,
+                 resilience: Optional[ResiliencePolicy] = None):
+        """Initialize the client with API token, an optional historical disk cache and resilience policy."""
+        self.base_url = BASE_URL
+        self.session = create_async_session(_auth_headers(api_token))
+        self.historical_cache = historical_cache
+        self.resilience = resilience or provider_policy('fr24')
+
+    async def _make_request(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Make a request to the Flightradar24 API without blocking the event loop."""
+        url = f"{self.base_url}{endpoint}"
+        
+        async def send() -> Dict[str, Any]:
+            response = await self.session.get(url, params=params)
+            response.raise_for_status()
+            return response.json()
+        
+        try:
+            return await self.resilience.call_async(send)
+        except (httpx.HTTPError, CircuitOpenError) as e:
+            logger.error(f"Error making request to {url}: {e}")
+            return {}
+
+    def metrics(self) -> Dict[str, Any]:
+        """Circuit breaker state and request counters of the FR24 policy."""
+        return self.resilience.metrics()
+
+    async def get_live_flights(self, bounds: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get live flight positions.
+        
+        Args:
+            bounds: Optional bounding box coordinates (lat1,lat2,lon1,lon2)
+            
+        Returns:
+            List of flight dictionaries
+        """
+        endpoint = '/live/flight-positions/light'
+        params = {'bounds': bounds} if bounds else {}
+        
+        try:
+            data = await self._make_request(endpoint, params)
+            flights = _parse_live_flights(data)
+            
+            logger.info(f"Fetched {len(flights)} live flights from Flightradar24 API")
+            return flights
+        except Exception as e:
+            logger.error(f"Error processing live flights data: {e}")
+            return []
+
+    async def get_live_flights_tiled(
+        self,
+        bounds: str,
+        rows: int = DEFAULT_TILE_ROWS,
+        columns: int = DEFAULT_TILE_COLUMNS,
+        max_concurrency: int = DEFAULT_TILE_CONCURRENCY
+    ) -> List[Dict[str, Any]]:
+        """
+        Get live flight positions for a large area by fetching tiles concurrently.
+        
+        The area is split into a rows x columns grid, at most max_concurrency
+        tiles are in flight at once, and aircraft reported by more than one tile
+        are returned once.
+        
+        Args:
+            bounds: Bounding box coordinates (lat1,lat2,lon1,lon2)
+            rows: Number of tiles along the latitude axis
+            columns: Number of tiles along the longitude axis
+            max_concurrency: Maximum number of concurrent tile requests
+            
+        Returns:
+            List of flight dictionaries
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def fetch_tile(tile: str) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await self.get_live_flights(tile)
+        
+        results = await asyncio.gather(*(fetch_tile(tile) for tile in split_bounds(bounds, rows, columns)))
+        
+        flights = []
+        seen = set()
+        for tile_flights in results:
+            for flight in tile_flights:
+                key = flight.get('flight_id') or flight.get('registration')
+                if key is not None:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                flights.append(flight)
+        
+        logger.info(f"Fetched {len(flights)} live flights from {len(results)} tiles")
+        return flights
+
+    async def get_flight_details(self, flight_id: str) -> Dict[str, Any]:
+        """Get detailed information about a specific flight."""
+        return await self._make_request(f'/live/flight-details/{flight_id}')
+
+    async def get_historical_flight(self, flight_id: str, date: datetime) -> Dict[str, Any]:
+        """Get historical flight data for the given date, served from disk when cached."""
+        if self.historical_cache is not None:
+            cached = await asyncio.to_thread(self.historical_cache.get, flight_id, date)
+            if cached is not None:
+                return cached
+        return await self.fetch_historical_flight(flight_id, date)
+
+    async def fetch_historical_flight(self, flight_id: str, date: datetime) -> Dict[str, Any]:
+        """Request historical flight data from the API, bypassing the disk cache, and cache it."""
+        params = {'date': date.strftime('%Y-%m-%d')}
+        data = await self._make_request(f'/flights/historical/{flight_id}', params)
+        
+        if self.historical_cache is not None:
+            await asyncio.to_thread(self.historical_cache.put, flight_id, date, data)
+        return data
+
+    async def get_airport_details(self, airport_code: str) -> Dict[str, Any]:
+        """Get detailed information about an airport."""
+        return await self._make_request(f'/airports/{airport_code}')
+
+    async def get_airline_details(self, airline_code: str) -> Dict[str, Any]:
+        """Get detailed information about an airline."""
+        return await self._make_request(f'/airlines/{airline_code}')
+
+    async def aclose(self):
+        """Close the pooled connections."""
+        await self.session.aclose()
@@ -1,25 +1,78 @@
 import requests
-from typing import List, Dict, Any
+import httpx
+from typing import List, Dict, Any, Optional
 import os
 import logging
 from dotenv import load_dotenv
 
+from .http_pool import create_async_session
+from .resilience import CircuitOpenError, ResiliencePolicy, provider_policy
+
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+def _parse_live_flights(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Convert a Flightradar24 live flights response into flight dictionaries.
+
+    Args:
+        data: Decoded JSON response from the /flights endpoint
+
+    Returns:
+        List of dictionaries containing flight data.
+    """
+    flights = []
+    
+    # Process the response based on Flightradar24 API structure
+    # Note: Adjust this based on the actual API response structure
+    for flight_id, flight_data in data.get('flights', {}).items():
+        flight = {
+            'flight_id': flight_id,
+            'callsign': flight_data.get('callsign'),
+            'tail_number': flight_data.get('registration'),
+            'aircraft_type': flight_data.get('aircraft', {}).get('model', {}).get('code'),
+            'origin': flight_data.get('airport', {}).get('origin', {}).get('code', {}).get('iata'),
+            'destination': flight_data.get('airport', {}).get('destination', {}).get('code', {}).get('iata'),
+            'latitude': flight_data.get('latitude'),
+            'longitude': flight_data.get('longitude'),
+            'altitude': flight_data.get('altitude'),
+            'speed': flight_data.get('speed'),
+            'heading': flight_data.get('heading'),
+            'status': flight_data.get('status'),
+            'airline': flight_data.get('airline', {}).get('name'),
+            # Provider time of the position report
+            'timestamp': flight_data.get('timestamp')
+        }
+        flights.append(flight)
+    
+    return flights
+
 class FlightradarClient:
     """
     Client to interact with the Flightradar24 API for fetching live flight data.
     """
     BASE_URL = "https://api.flightradar24.com/v1"
 
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, resilience: Optional[ResiliencePolicy] = None):
         self.session = requests.Session()
         self.api_key = api_key or os.getenv('FLIGHTRADAR_API_KEY')
         if not self.api_key:
             logger.warning("FLIGHTRADAR_API_KEY environment variable not set. API calls may fail.")
+        # Retries, rate limit and circuit breaker shared by all Flightradar clients
+        self.resilience = resilience or provider_policy('flightradar')
+
+    def _get_json(self, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        def send() -> Dict[str, Any]:
+            response = self.session.get(url, params=params, timeout=10)
+            response.raise_for_status()
+            return response.json()
+        return self.resilience.call(send)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Circuit breaker state and request counters of the Flightradar policy."""
+        return self.resilience.metrics()
 
     def get_live_flights(self, bounds=None) -> List[Dict[str, Any]]:
         """
@@ -41,34 +94,12 @@ class FlightradarClient:
             params['bounds'] = ','.join(map(str, bounds))
         
         try:
-            response = self.session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            flights = []
-            
-            # Process the response based on Flightradar24 API structure
-            # Note: Adjust this based on the actual API response structure
-            for flight_id, flight_data in data.get('flights', {}).items():
-                flight = {
-                    'flight_id': flight_id,
-                    'callsign': flight_data.get('callsign'),
-                    'tail_number': flight_data.get('registration'),
-                    'aircraft_type': flight_data.get('aircraft', {}).get('model', {}).get('code'),
-                    'origin': flight_data.get('airport', {}).get('origin', {}).get('code', {}).get('iata'),
-                    'destination': flight_data.get('airport', {}).get('destination', {}).get('code', {}).get('iata'),
-                    'latitude': flight_data.get('latitude'),
-                    'longitude': flight_data.get('longitude'),
-                    'altitude': flight_data.get('altitude'),
-                    'speed': flight_data.get('speed'),
-                    'heading': flight_data.get('heading'),
-                    'status': flight_data.get('status'),
-                    'airline': flight_data.get('airline', {}).get('name')
-                }
-                flights.append(flight)
+            data = self._get_json(url, params)
+            flights = _parse_live_flights(data)
             
             logger.info(f"Fetched {len(flights)} live flights from Flightradar24 API.")
             return flights
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, CircuitOpenError) as e:
             logger.error(f"Error fetching live flights from Flightradar24 API: {e}")
             return []
     
@@ -88,9 +119,7 @@ class FlightradarClient:
         }
         
         try:
-            response = self.session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = self._get_json(url, params)
             
             # Process the response based on Flightradar24 API structure
             # Note: Adjust this based on the actual API response structure
@@ -98,6 +127,87 @@ class FlightradarClient:
             
             logger.info(f"Fetched details for flight {flight_id} from Flightradar24 API.")
             return flight_details
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, CircuitOpenError) as e:
+            logger.error(f"Error fetching flight details from Flightradar24 API: {e}")
+            return {}
+
+class AsyncFlightradarClient:
+    """
+    Non-blocking counterpart of FlightradarClient for use inside the event loop.
+    Connections are pooled and kept alive between polling cycles.
+    """
+    BASE_URL = FlightradarClient.BASE_URL
+
+    def __init__(self, api_key=None, resilience: Optional[ResiliencePolicy] = None):
+        self.session = create_async_session()
+        self.api_key = api_key or os.getenv('FLIGHTRADAR_API_KEY')
+        if not self.api_key:
+            logger.warning("FLIGHTRADAR_API_KEY environment variable not set. API calls may fail.")
+        self.resilience = resilience or provider_policy('flightradar')
+
+    async def _get_json(self, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        async def send() -> Dict[str, Any]:
+            response = await self.session.get(url, params=params)
+            response.raise_for_status()
+            return response.json()
+        return await self.resilience.call_async(send)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Circuit breaker state and request counters of the Flightradar policy."""
+        return self.resilience.metrics()
+
+    async def get_live_flights(self, bounds=None) -> List[Dict[str, Any]]:
+        """
+        Fetches live flight data from the Flightradar24 API without blocking the event loop.
+
+        Args:
+            bounds (tuple, optional): Bounding box for filtering flights (lat1, lon1, lat2, lon2).
+                                     Default is None (global).
+
+        Returns:
+            List of dictionaries containing flight data.
+        """
+        url = f"{self.BASE_URL}/flights"
+        params = {
+            'api_key': self.api_key
+        }
+        
+        if bounds:
+            params['bounds'] = ','.join(map(str, bounds))
+        
+        try:
+            flights = _parse_live_flights(await self._get_json(url, params))
+            
+            logger.info(f"Fetched {len(flights)} live flights from Flightradar24 API.")
+            return flights
+        except (httpx.HTTPError, CircuitOpenError) as e:
+            logger.error(f"Error fetching live flights from Flightradar24 API: {e}")
+            return []
+    
+    async def get_flight_details(self, flight_id: str) -> Dict[str, Any]:
+        """
+        Fetches detailed information for a specific flight without blocking the event loop.
+
+        Args:
+            flight_id (str): The ID of the flight to fetch details for.
+
+        Returns:
+            Dictionary containing detailed flight information.
+        """
+        url = f"{self.BASE_URL}/flights/{flight_id}"
+        params = {
+            'api_key': self.api_key
+        }
+        
+        try:
+            flight_details = (await self._get_json(url, params)).get('flight', {})
+            
+            logger.info(f"Fetched details for flight {flight_id} from Flightradar24 API.")
+            return flight_details
+        except (httpx.HTTPError, CircuitOpenError) as e:
             logger.error(f"Error fetching flight details from Flightradar24 API: {e}")
-            return {} 
\ No newline at end of file
+            return {}
+
+    async def aclose(self):
+        """Close the pooled connections."""
+        await self.session.aclose()
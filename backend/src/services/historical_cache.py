@@ -0,0 +1,144 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'historical')
+DEFAULT_MAX_MEGABYTES = 512
+COMPRESSION_LEVEL = 6
+FILE_SUFFIX = '.json.z'
+
+class HistoricalFlightCache:
+    """
+    Persistent disk cache for historical flight responses.
+
+    Data for past dates never changes, so entries never expire. Each response
+    is stored zlib-compressed in a file named by the SHA-256 of the request,
+    written atomically, and the least recently read files are removed once the
+    cache grows past its size cap.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_MEGABYTES * 1024 * 1024):
+        """
+        Args:
+            directory: Directory holding the cache files
+            max_bytes: Maximum total size of the cache files
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._total_bytes = sum(os.path.getsize(path) for path in self._files())
+
+    @classmethod
+    def from_env(cls) -> 'HistoricalFlightCache':
+        """Build a cache from HISTORICAL_CACHE_DIR and HISTORICAL_CACHE_MAX_MB."""
+        return cls(
+            directory=os.getenv('HISTORICAL_CACHE_DIR', DEFAULT_CACHE_DIR),
+            max_bytes=int(float(os.getenv('HISTORICAL_CACHE_MAX_MB', DEFAULT_MAX_MEGABYTES)) * 1024 * 1024)
+        )
+
+    @staticmethod
+    def is_cacheable(date: datetime) -> bool:
+        """Only dates before today (UTC) are final and safe to cache forever."""
+        return date.date() < datetime.utcnow().date()
+
+    def _files(self):
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(FILE_SUFFIX):
+                    yield os.path.join(root, name)
+
+    def _path(self, flight_id: str, date: datetime) -> str:
+        digest = hashlib.sha256(f"{flight_id}|{date.strftime('%Y-%m-%d')}".encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + FILE_SUFFIX)
+
+    def get(self, flight_id: str, date: datetime) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached response, or None if it is not cached.
+        """
+        path = self._path(flight_id, date)
+        try:
+            with open(path, 'rb') as cache_file:
+                data = json.loads(zlib.decompress(cache_file.read()))
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, zlib.error) as e:
+            logger.warning(f"Discarding unreadable historical cache entry {path}: {e}")
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        # Refresh the modification time so eviction removes the least recently read entries
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return data
+
+    def put(self, flight_id: str, date: datetime, data: Dict[str, Any]):
+        """
+        Store a response for a past date. Empty responses and current or
+        future dates are ignored.
+        """
+        if not data or not self.is_cacheable(date):
+            return
+        path = self._path(flight_id, date)
+        payload = zlib.compress(json.dumps(data, separators=(',', ':')).encode('utf-8'), COMPRESSION_LEVEL)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temporary file and rename so readers never see partial entries
+        descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as temp_file:
+                temp_file.write(payload)
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.error(f"Error writing historical cache entry {path}: {e}")
+            self._remove(temp_path)
+            return
+
+        with self._lock:
+            self._total_bytes += len(payload) - previous
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def _remove(self, path: str) -> int:
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            return size
+        except OSError:
+            return 0
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for path in self._files():
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            entries.sort()
+
+            total = sum(size for _, size, _ in entries)
+            # Evict down to 90% of the cap so eviction does not run on every write
+            target = self.max_bytes * 0.9
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                total -= self._remove(path)
+            self._total_bytes = total
@@ -0,0 +1,28 @@
+import httpx
+from typing import Dict, Optional
+
+# Connection pool settings shared by the async provider clients
+REQUEST_TIMEOUT_SECONDS = 10
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE_CONNECTIONS = 10
+KEEPALIVE_EXPIRY_SECONDS = 30
+
+def create_async_session(headers: Optional[Dict[str, str]] = None) -> httpx.AsyncClient:
+    """
+    Create a pooled HTTP client that keeps connections alive between polls.
+
+    Args:
+        headers: Optional default headers sent with every request
+
+    Returns:
+        An httpx.AsyncClient configured with the shared pool limits
+    """
+    return httpx.AsyncClient(
+        headers=headers,
+        timeout=REQUEST_TIMEOUT_SECONDS,
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+        ),
+    )
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Default capacity of the queue in front of each stage
+DEFAULT_QUEUE_SIZE = 8
+
+class StageMetrics:
+    """Latency and throughput counters for one pipeline stage."""
+    __slots__ = ('processed', 'errors', 'dropped', 'last_latency', 'total_latency', 'max_latency')
+
+    def __init__(self):
+        self.processed = 0
+        self.errors = 0
+        self.dropped = 0
+        self.last_latency = 0.0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def record(self, latency: float):
+        self.processed += 1
+        self.last_latency = latency
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    @property
+    def average_latency(self) -> float:
+        return self.total_latency / self.processed if self.processed else 0.0
+
+class Stage:
+    """
+    One step of an ingest pipeline, fed by a bounded queue.
+
+    A full queue blocks the upstream stage (backpressure) unless latest_only is
+    set, in which case the oldest queued item is dropped so the stage always
+    works on the newest data. With batch set, the handler receives every item
+    queued at that moment as a list, so slow sinks can catch up in one go.
+    """
+
+    def __init__(self, name: str, handler: Callable[[Any], Awaitable[Any]], queue_size: int = DEFAULT_QUEUE_SIZE,
+                 batch: bool = False, latest_only: bool = False, min_interval: float = 0.0):
+        """
+        Args:
+            name: Stage name used in logs and metrics
+            handler: Coroutine function processing one item (or a list with batch);
+                its result is passed to the next stage unless it is None
+            queue_size: Capacity of the stage's input queue
+            batch: Whether to hand all queued items to the handler at once
+            latest_only: Whether to drop the oldest queued item instead of blocking
+            min_interval: Minimum seconds between handler runs, for a steady cadence
+        """
+        self.name = name
+        self.handler = handler
+        self.queue_size = queue_size
+        self.batch = batch
+        self.latest_only = latest_only
+        self.min_interval = min_interval
+        self.metrics = StageMetrics()
+        self.queue: Optional[asyncio.Queue] = None
+
+    async def put(self, item: Any):
+        """Queue an item for this stage, waiting for space unless latest_only."""
+        if self.latest_only:
+            while self.queue.full():
+                self.queue.get_nowait()
+                self.queue.task_done()
+                self.metrics.dropped += 1
+            self.queue.put_nowait(item)
+        else:
+            await self.queue.put(item)
+
+    async def _next(self) -> List[Any]:
+        items = [await self.queue.get()]
+        if self.batch:
+            while not self.queue.empty():
+                items.append(self.queue.get_nowait())
+        return items
+
+    async def run(self, downstream: Optional['Stage']):
+        last_run = None
+        while True:
+            items = await self._next()
+            if last_run is not None and self.min_interval:
+                wait = last_run + self.min_interval - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            last_run = time.monotonic()
+            try:
+                await self._process(items if self.batch else items[0], downstream)
+            finally:
+                for _ in items:
+                    self.queue.task_done()
+
+    async def _process(self, item: Any, downstream: Optional['Stage']):
+        start = time.perf_counter()
+        try:
+            result = await self.handler(item)
+        except Exception as e:
+            self.metrics.errors += 1
+            logger.error(f"Ingest stage {self.name} failed: {e}")
+            return
+        self.metrics.record(time.perf_counter() - start)
+
+        if downstream is not None and result is not None:
+            await downstream.put(result)
+
+class IngestPipeline:
+    """
+    Runs a source and a chain of stages as concurrent tasks connected by
+    bounded queues, so a slow stage only delays the stages before it once its
+    queue is full instead of stalling the whole loop.
+    """
+
+    def __init__(self, source_name: str, source: Callable[[], AsyncIterator[Any]], stages: Sequence[Stage]):
+        """
+        Args:
+            source_name: Name of the source in metrics
+            source: Async generator function producing items for the first stage
+            stages: Stages in processing order
+        """
+        self.source_name = source_name
+        self.source = source
+        self.stages = list(stages)
+        self.source_metrics = StageMetrics()
+
+    async def _run_source(self):
+        items = self.source().__aiter__()
+        while True:
+            start = time.perf_counter()
+            try:
+                item = await items.__anext__()
+            except StopAsyncIteration:
+                return
+            self.source_metrics.record(time.perf_counter() - start)
+            if self.stages and item is not None:
+                await self.stages[0].put(item)
+
+    async def run(self):
+        """
+        Run the pipeline until the source is exhausted or the task is cancelled.
+        """
+        for stage in self.stages:
+            stage.queue = asyncio.Queue(maxsize=stage.queue_size)
+        downstream = self.stages[1:] + [None]
+        workers = [
+            asyncio.ensure_future(stage.run(next_stage))
+            for stage, next_stage in zip(self.stages, downstream)
+        ]
+        try:
+            await self._run_source()
+            # Let the stages finish what the source produced
+            for stage in self.stages:
+                await stage.queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return per-stage counters, latencies (seconds) and queue depths.
+        """
+        metrics = {self.source_name: _metrics_dict(self.source_metrics)}
+        for stage in self.stages:
+            metrics[stage.name] = _metrics_dict(stage.metrics)
+            metrics[stage.name]['queue_depth'] = stage.queue.qsize() if stage.queue is not None else 0
+            metrics[stage.name]['queue_size'] = stage.queue_size
+        return metrics
+
+def _metrics_dict(metrics: StageMetrics) -> Dict[str, Any]:
+    return {
+        'processed': metrics.processed,
+        'errors': metrics.errors,
+        'dropped': metrics.dropped,
+        'last_latency': metrics.last_latency,
+        'average_latency': metrics.average_latency,
+        'max_latency': metrics.max_latency,
+    }
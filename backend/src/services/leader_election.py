@@ -0,0 +1,239 @@
+import asyncio
+import logging
+import os
+import tempfile
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import text
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCK_PATH = os.path.join(tempfile.gettempdir(), 'flight-ingest.lock')
+# Arbitrary application-wide key for the Postgres advisory lock
+DEFAULT_ADVISORY_LOCK_ID = 0x5EBA5
+# Seconds between attempts of a standby to become leader
+DEFAULT_RETRY_SECONDS = 5.0
+# Seconds between checks that the leader still holds its lock
+LEADER_CHECK_SECONDS = float(os.getenv('INGEST_LEADER_CHECK_SECONDS', 2.0))
+
+class FileLeaderLock:
+    """
+    Leader lock held as an exclusive flock on a file. The operating system
+    releases it when the holding process exits, so a standby takes over after
+    a crash. Only coordinates processes on the same host.
+    """
+
+    def __init__(self, path: str = DEFAULT_LOCK_PATH):
+        self.path = path
+        self._file = None
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def try_acquire(self) -> bool:
+        """Try to take the lock without blocking."""
+        if self._file is not None:
+            return True
+        if fcntl is None:
+            raise RuntimeError("File leader lock requires fcntl; use INGEST_LEADER_LOCK=postgres on this platform")
+        lock_file = open(self.path, 'a+')
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        # Record the holder for operators inspecting the lock file
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        self._file = lock_file
+        return True
+
+    def verify(self) -> bool:
+        """Whether the lock is still held; a flock lasts as long as the process."""
+        return self.held
+
+    def release(self):
+        """Release the lock if held."""
+        if self._file is None:
+            return
+        try:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+
+class PostgresLeaderLock:
+    """
+    Leader lock held as a session-level Postgres advisory lock on a dedicated
+    connection. The server releases it when the connection closes, so it
+    coordinates processes across hosts sharing the database. Because a
+    dropped session silently releases the lock, the leader must call
+    verify() periodically and step down when it fails.
+    """
+
+    def __init__(self, engine, lock_id: int = DEFAULT_ADVISORY_LOCK_ID):
+        self.engine = engine
+        self.lock_id = lock_id
+        self._connection = None
+
+    @property
+    def held(self) -> bool:
+        return self._connection is not None
+
+    def try_acquire(self) -> bool:
+        """Try to take the lock without blocking."""
+        if self._connection is not None:
+            return True
+        # Autocommit, so the checks do not leave the session idle in transaction
+        connection = self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            acquired = connection.execute(text("SELECT pg_try_advisory_lock(:id)"), {'id': self.lock_id}).scalar()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        self._connection = connection
+        return True
+
+    def verify(self) -> bool:
+        """
+        Check in pg_locks that this session still holds the advisory lock.
+        A failed check (e.g. the connection dropped) discards the connection,
+        so the lock counts as lost.
+        """
+        if self._connection is None:
+            return False
+        try:
+            # A bigint advisory key is split into classid (high) and objid (low 32 bits)
+            held = self._connection.execute(text(
+                "SELECT EXISTS (SELECT 1 FROM pg_locks WHERE locktype = 'advisory' AND granted"
+                " AND pid = pg_backend_pid() AND classid = :classid AND objid = :objid AND objsubid = 1)"
+            ), {'classid': (self.lock_id >> 32) & 0xFFFFFFFF, 'objid': self.lock_id & 0xFFFFFFFF}).scalar()
+        except Exception as e:
+            logger.error(f"Error checking the ingest leader lock: {e}")
+            held = False
+        if not held:
+            self._discard()
+        return bool(held)
+
+    def _discard(self):
+        try:
+            self._connection.close()
+        except Exception:
+            pass
+        self._connection = None
+
+    def release(self):
+        """Release the lock if held."""
+        if self._connection is None:
+            return
+        try:
+            self._connection.execute(text("SELECT pg_advisory_unlock(:id)"), {'id': self.lock_id})
+        finally:
+            self._connection.close()
+            self._connection = None
+
+class NoLeaderLock:
+    """Lock that is always acquired, for single-process deployments."""
+    held = True
+
+    def try_acquire(self) -> bool:
+        return True
+
+    def verify(self) -> bool:
+        return True
+
+    def release(self):
+        pass
+
+def create_leader_lock(kind: Optional[str] = None):
+    """
+    Build the leader lock selected by INGEST_LEADER_LOCK: "file" (default,
+    path from INGEST_LOCK_PATH), "postgres" (advisory lock on DATABASE_URL)
+    or "none".
+    """
+    kind = (kind or os.getenv('INGEST_LEADER_LOCK', 'file')).lower()
+    if kind == 'file':
+        return FileLeaderLock(os.getenv('INGEST_LOCK_PATH') or DEFAULT_LOCK_PATH)
+    if kind == 'postgres':
+        from ..config.db import engine
+        return PostgresLeaderLock(engine, int(os.getenv('INGEST_ADVISORY_LOCK_ID', DEFAULT_ADVISORY_LOCK_ID)))
+    if kind == 'none':
+        return NoLeaderLock()
+    raise ValueError(f"Unknown INGEST_LEADER_LOCK '{kind}' (expected file, postgres or none)")
+
+async def _acquire(lock, retry_interval: float):
+    announced = False
+    while True:
+        try:
+            acquired = await asyncio.to_thread(lock.try_acquire)
+        except Exception as e:
+            logger.error(f"Error acquiring ingest leader lock: {e}")
+            acquired = False
+        if acquired:
+            return
+        if not announced:
+            logger.info("Another process is the ingest leader; standing by")
+            announced = True
+        await asyncio.sleep(retry_interval)
+
+async def _lead(task: Callable[[], Awaitable[None]], lock, check_interval: float) -> bool:
+    """
+    Run the task, checking every check_interval seconds that the lock is
+    still held. Returns True when the task finished, False when the lock was
+    lost and the task was cancelled.
+    """
+    runner = asyncio.ensure_future(task())
+    try:
+        while True:
+            done, _ = await asyncio.wait({runner}, timeout=check_interval)
+            if done:
+                runner.result()
+                return True
+            try:
+                held = await asyncio.to_thread(lock.verify)
+            except Exception as e:
+                logger.error(f"Error checking ingest leader lock: {e}")
+                held = False
+            if not held:
+                logger.error("Lost the ingest leader lock; stepping down")
+                return False
+    finally:
+        if not runner.done():
+            runner.cancel()
+            await asyncio.gather(runner, return_exceptions=True)
+
+async def run_as_leader(task: Callable[[], Awaitable[None]], lock, retry_interval: float = DEFAULT_RETRY_SECONDS,
+                        check_interval: float = LEADER_CHECK_SECONDS):
+    """
+    Wait until the leader lock is acquired, then run the task while holding it.
+    Processes that lose the election stay on standby and retry, so a new
+    leader takes over when the current one exits. The leader re-verifies the
+    lock every check_interval seconds; if it was lost (e.g. the database
+    session dropped), the task is cancelled and the process stands by again,
+    so two leaders overlap for at most one check interval.
+
+    Args:
+        task: Coroutine function to run as leader
+        lock: Leader lock with try_acquire(), verify() and release()
+        retry_interval: Seconds between acquisition attempts
+        check_interval: Seconds between checks that the lock is still held
+    """
+    while True:
+        await _acquire(lock, retry_interval)
+        logger.info(f"Acquired ingest leader lock (pid {os.getpid()})")
+        try:
+            if await _lead(task, lock, check_interval):
+                return
+        finally:
+            lock.release()
@@ -0,0 +1,382 @@
+import time
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Numeric columns held as float64 arrays (NaN means unknown). 'timestamp' is
+# when the store received the row and 'position_timestamp' the provider's time
+# of the position; the smoothed position and velocity (m/s) columns are
+# written by PositionSmoother
+FLOAT_COLUMNS = ('latitude', 'longitude', 'altitude', 'speed', 'heading', 'timestamp', 'position_timestamp',
+                 'smoothed_latitude', 'smoothed_longitude', 'velocity_north', 'velocity_east')
+
+# String columns held as dictionary-encoded int32 codes (-1 means unknown)
+STRING_COLUMNS = ('callsign', 'tail_number', 'aircraft_type', 'status', 'origin', 'destination')
+
+# Provider field names that map onto store columns
+_ALIASES = {
+    'registration': 'tail_number',
+    'departure_airport': 'origin',
+    'arrival_airport': 'destination',
+    'timestamp': 'position_timestamp',
+}
+
+_MISSING = -1
+
+# Vocabularies are compacted once they hold this many values more than twice
+# the live rows, so values of departed flights do not accumulate
+_COMPACT_SLACK = 64
+
+class StringColumn:
+    """Dictionary-encoded string column: each distinct value is stored once."""
+
+    def __init__(self, capacity: int):
+        self.codes = np.full(capacity, _MISSING, dtype=np.int32)
+        self.values: List[str] = []
+        self._lookup: Dict[str, int] = {}
+        self._vocab: Optional[Tuple[str, ...]] = None
+
+    def encode(self, value: Optional[str]) -> int:
+        if value is None:
+            return _MISSING
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self._lookup[value] = code
+            self._vocab = None
+        return code
+
+    def vocab(self) -> Tuple[str, ...]:
+        """Immutable copy of the values, shared by snapshots until a value is added."""
+        if self._vocab is None:
+            self._vocab = tuple(self.values)
+        return self._vocab
+
+    def compact(self, size: int) -> bool:
+        """
+        Drop values no longer used by the first size rows and re-encode their
+        codes, if the vocabulary outgrew twice the rows.
+
+        Returns:
+            True if the column was compacted
+        """
+        if len(self.values) <= 2 * size + _COMPACT_SLACK:
+            return False
+        codes = self.codes[:size]
+        used = np.unique(codes[codes != _MISSING])
+        remap = np.full(len(self.values), _MISSING, dtype=np.int32)
+        remap[used] = np.arange(len(used), dtype=np.int32)
+        codes[:] = np.where(codes == _MISSING, _MISSING, remap[codes])
+        self.values = [self.values[code] for code in used]
+        self._lookup = {value: code for code, value in enumerate(self.values)}
+        self._vocab = None
+        return True
+
+class LiveSnapshot:
+    """
+    Immutable point-in-time view of the live store.
+
+    All readers of the same store version share one snapshot; its arrays are
+    read-only so they can be handed out without defensive copies.
+    """
+    __slots__ = ('version', 'ids', 'columns', 'codes', 'vocab')
+
+    def __init__(self, version: int, ids: List[str], columns: Dict[str, np.ndarray],
+                 codes: Dict[str, np.ndarray], vocab: Dict[str, Sequence[str]]):
+        self.version = version
+        self.ids = ids
+        self.columns = columns
+        self.codes = codes
+        self.vocab = vocab
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def filter(self, bounds: Optional[Sequence[float]] = None, status: Optional[Iterable[str]] = None,
+               since: Optional[float] = None) -> np.ndarray:
+        """
+        Select rows with vectorized comparisons.
+
+        Args:
+            bounds: Optional bounding box (lat1, lon1, lat2, lon2)
+            status: Optional statuses to keep
+            since: Optional epoch seconds; keep rows received at or after it
+
+        Returns:
+            Array of matching row indices
+        """
+        mask = np.ones(len(self.ids), dtype=bool)
+        if bounds is not None:
+            lat1, lon1, lat2, lon2 = bounds
+            lat = self.columns['latitude']
+            lon = self.columns['longitude']
+            mask &= (lat >= min(lat1, lat2)) & (lat <= max(lat1, lat2))
+            mask &= (lon >= min(lon1, lon2)) & (lon <= max(lon1, lon2))
+        if status is not None:
+            vocab = self.vocab['status']
+            wanted = [vocab.index(value) for value in status if value in vocab]
+            mask &= np.isin(self.codes['status'], wanted)
+        if since is not None:
+            mask &= self.columns['timestamp'] >= since
+        return np.flatnonzero(mask)
+
+    def to_records(self, indices: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+        """
+        Materialize rows as dictionaries, e.g. for JSON responses.
+
+        Args:
+            indices: Optional row indices (defaults to all rows)
+
+        Returns:
+            List of flight dictionaries
+        """
+        if indices is None:
+            indices = range(len(self.ids))
+        float_lists = {name: column.tolist() for name, column in self.columns.items()}
+        code_lists = {name: codes.tolist() for name, codes in self.codes.items()}
+        records = []
+        for row in indices:
+            record = {'flight_id': self.ids[row]}
+            for name, values in float_lists.items():
+                value = values[row]
+                record[name] = None if value != value else value
+            for name, codes in code_lists.items():
+                code = codes[row]
+                record[name] = None if code == _MISSING else self.vocab[name][code]
+            records.append(record)
+        return records
+
+class LiveTrafficStore:
+    """
+    Columnar store of the latest known state of every live flight, keyed by flight id.
+
+    Rows live in preallocated NumPy arrays that grow geometrically, so upserts are
+    O(1) amortized and filters run as vectorized comparisons. Removing a row moves
+    the last row into its slot to keep the arrays dense.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._capacity = capacity
+        self._size = 0
+        self._ids: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._floats = {name: np.full(capacity, np.nan) for name in FLOAT_COLUMNS}
+        self._strings = {name: StringColumn(capacity) for name in STRING_COLUMNS}
+        self.version = 0
+        self.stale_rejected = 0
+        self._snapshot: Optional[LiveSnapshot] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, flight_id: str) -> bool:
+        return flight_id in self._index
+
+    def _grow(self):
+        capacity = self._capacity * 2
+        for name, column in self._floats.items():
+            grown = np.full(capacity, np.nan)
+            grown[:self._size] = column[:self._size]
+            self._floats[name] = grown
+        for column in self._strings.values():
+            grown = np.full(capacity, _MISSING, dtype=np.int32)
+            grown[:self._size] = column.codes[:self._size]
+            column.codes = grown
+        self._capacity = capacity
+
+    def _clear_row(self, row: int):
+        for column in self._floats.values():
+            column[row] = np.nan
+        for column in self._strings.values():
+            column.codes[row] = _MISSING
+
+    def upsert(self, flight_id: str, record: Mapping[str, Any], received_at: Optional[float] = None) -> Optional[int]:
+        """
+        Insert or update one flight. Fields missing from the record keep their
+        previous value. The record's 'timestamp' is the provider's position
+        time and is stored as position_timestamp; a record whose position time
+        is older than the stored one is ignored. The timestamp column holds
+        the receive time.
+
+        Args:
+            flight_id: Unique flight identifier
+            record: Flight fields; provider aliases such as 'registration' are accepted
+            received_at: Optional receive time in epoch seconds (defaults to now)
+
+        Returns:
+            Row index of the flight, or None if the record was stale
+        """
+        row = self._index.get(flight_id)
+        position_timestamp = record.get('timestamp', record.get('position_timestamp'))
+        if (row is not None and position_timestamp is not None
+                and position_timestamp < self._floats['position_timestamp'][row]):
+            self.stale_rejected += 1
+            return None
+        if row is None:
+            if self._size == self._capacity:
+                self._grow()
+            row = self._size
+            self._size += 1
+            self._ids.append(flight_id)
+            self._index[flight_id] = row
+            self._clear_row(row)
+        self._floats['timestamp'][row] = time.time() if received_at is None else received_at
+
+        for key, value in record.items():
+            name = _ALIASES.get(key, key)
+            if name in self._floats:
+                self._floats[name][row] = np.nan if value is None else value
+            elif name in self._strings:
+                column = self._strings[name]
+                column.codes[row] = column.encode(value)
+
+        self.version += 1
+        return row
+
+    def upsert_many(self, records: Iterable[Mapping[str, Any]], key: str = 'flight_id',
+                    received_at: Optional[float] = None) -> int:
+        """
+        Insert or update many flights.
+
+        Args:
+            records: Flight dictionaries
+            key: Field holding the flight identifier
+            received_at: Optional receive time of all records (defaults to now)
+
+        Returns:
+            Number of records applied
+        """
+        if received_at is None:
+            received_at = time.time()
+        count = 0
+        for record in records:
+            flight_id = record.get(key)
+            if flight_id is None:
+                continue
+            if self.upsert(flight_id, record, received_at) is not None:
+                count += 1
+        return count
+
+    def _rows_for(self, flight_ids: Sequence[str]) -> np.ndarray:
+        return np.fromiter((self._index[flight_id] for flight_id in flight_ids), dtype=np.intp, count=len(flight_ids))
+
+    def columns_for(self, flight_ids: Sequence[str], names: Iterable[str]) -> Dict[str, np.ndarray]:
+        """
+        Gather numeric columns for the given flights in one vectorized take.
+
+        Args:
+            flight_ids: Flights present in the store
+            names: Numeric column names
+
+        Returns:
+            Dict of arrays aligned with flight_ids
+        """
+        rows = self._rows_for(flight_ids)
+        return {name: self._floats[name][rows] for name in names}
+
+    def update_columns(self, flight_ids: Sequence[str], values: Mapping[str, np.ndarray]):
+        """
+        Write numeric columns for the given flights in one vectorized assignment.
+
+        Args:
+            flight_ids: Flights present in the store
+            values: Column name to array aligned with flight_ids
+        """
+        rows = self._rows_for(flight_ids)
+        for name, column in values.items():
+            self._floats[name][rows] = column
+        self.version += 1
+
+    def remove(self, flight_id: str) -> bool:
+        """
+        Remove a flight from the store.
+
+        Returns:
+            True if the flight was present
+        """
+        row = self._index.pop(flight_id, None)
+        if row is None:
+            return False
+        last = self._size - 1
+        if row != last:
+            moved_id = self._ids[last]
+            self._ids[row] = moved_id
+            self._index[moved_id] = row
+            for column in self._floats.values():
+                column[row] = column[last]
+            for column in self._strings.values():
+                column.codes[row] = column.codes[last]
+        self._ids.pop()
+        self._size = last
+        self.version += 1
+        return True
+
+    def evict_older_than(self, cutoff: float) -> int:
+        """
+        Remove flights last received before the cutoff.
+
+        Args:
+            cutoff: Epoch seconds
+
+        Returns:
+            Number of flights removed
+        """
+        stale = np.flatnonzero(self._floats['timestamp'][:self._size] < cutoff)
+        stale_ids = [self._ids[row] for row in stale]
+        for flight_id in stale_ids:
+            self.remove(flight_id)
+        return len(stale_ids)
+
+    def restore(self, snapshot: LiveSnapshot):
+        """
+        Replace the store's contents with a snapshot, e.g. one loaded from disk
+        at startup. The snapshot's arrays are copied.
+        """
+        size = len(snapshot)
+        capacity = max(self._capacity, size)
+        self._capacity = capacity
+        self._size = size
+        self._ids = list(snapshot.ids)
+        self._index = {flight_id: row for row, flight_id in enumerate(self._ids)}
+        for name in FLOAT_COLUMNS:
+            column = np.full(capacity, np.nan)
+            if name in snapshot.columns:
+                column[:size] = snapshot.columns[name]
+            self._floats[name] = column
+        for name in STRING_COLUMNS:
+            column = StringColumn(capacity)
+            if name in snapshot.codes:
+                column.codes[:size] = snapshot.codes[name]
+                column.values = list(snapshot.vocab[name])
+                column._lookup = {value: code for code, value in enumerate(column.values)}
+            self._strings[name] = column
+        self.version += 1
+
+    def snapshot(self) -> LiveSnapshot:
+        """
+        Return a read-only snapshot of the current state. The snapshot is
+        cached until the next write, so concurrent readers share it, and
+        snapshots share each vocabulary until a value is added to it.
+        """
+        if self._snapshot is not None and self._snapshot.version == self.version:
+            return self._snapshot
+
+        size = self._size
+        for column in self._strings.values():
+            column.compact(size)
+        columns = {}
+        for name, column in self._floats.items():
+            columns[name] = column[:size].copy()
+            columns[name].flags.writeable = False
+        codes = {}
+        for name, column in self._strings.items():
+            codes[name] = column.codes[:size].copy()
+            codes[name].flags.writeable = False
+        vocab = {name: column.vocab() for name, column in self._strings.items()}
+
+        self._snapshot = LiveSnapshot(self.version, list(self._ids), columns, codes, vocab)
+        return self._snapshot
+
+# Shared store of live traffic for the API, WebSocket and alert layers
+live_store = LiveTrafficStore()
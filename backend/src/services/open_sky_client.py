@@ -1,22 +1,66 @@
 import requests
-from typing import List, Dict, Any
+import httpx
+from typing import List, Dict, Any, Optional, Tuple
 import os
 import logging
 
+from .http_pool import create_async_session
+from .resilience import CircuitOpenError, ResiliencePolicy, provider_policy
+from .state_vector_decoder import StateVector, iter_state_vectors, aiter_state_vectors
+
 logger = logging.getLogger(__name__)
 
+# Size of the response chunks handed to the streaming decoder
+STREAM_CHUNK_SIZE = 64 * 1024
+
+def _bounds_params(bounds: Optional[Tuple[float, float, float, float]]) -> Dict[str, float]:
+    """Query parameters restricting /states/all to a bounding box (lat1, lon1, lat2, lon2)."""
+    if bounds is None:
+        return {}
+    lat1, lon1, lat2, lon2 = bounds
+    return {'lamin': min(lat1, lat2), 'lomin': min(lon1, lon2), 'lamax': max(lat1, lat2), 'lomax': max(lon1, lon2)}
+
 class OpenSkyClient:
     """
     Client to interact with the OpenSky API for fetching live flight data.
     """
     BASE_URL = "https://opensky-network.org/api"
 
-    def __init__(self):
+    def __init__(self, resilience: Optional[ResiliencePolicy] = None):
         self.session = requests.Session()
         # If authentication is required in the future, credentials can be loaded from environment variables
         # self.username = os.getenv('OPENSKY_USERNAME')
         # self.password = os.getenv('OPENSKY_PASSWORD')
         # self.session.auth = (self.username, self.password)
+        # Retries, rate limit and circuit breaker shared by all OpenSky clients
+        self.resilience = resilience or provider_policy('opensky')
+
+    def metrics(self) -> Dict[str, Any]:
+        """Circuit breaker state and request counters of the OpenSky policy."""
+        return self.resilience.metrics()
+
+    def get_state_vectors(self) -> List[StateVector]:
+        """
+        Fetches live state vectors from the OpenSky API, decoding the response
+        incrementally as it is streamed.
+
+        Returns:
+            List of StateVector records.
+        """
+        url = f"{self.BASE_URL}/states/all"
+        
+        def send() -> List[StateVector]:
+            with self.session.get(url, timeout=10, stream=True) as response:
+                response.raise_for_status()
+                return list(iter_state_vectors(response.iter_content(chunk_size=STREAM_CHUNK_SIZE)))
+        
+        try:
+            states = self.resilience.call(send)
+            logger.info(f"Fetched {len(states)} live flights from OpenSky API.")
+            return states
+        except (requests.exceptions.RequestException, CircuitOpenError) as e:
+            logger.error(f"Error fetching live flights from OpenSky API: {e}")
+            return []
 
     def get_live_flights(self) -> List[Dict[str, Any]]:
         """
@@ -25,36 +69,60 @@ class OpenSkyClient:
         Returns:
             List of dictionaries containing flight data.
         """
+        return [state._asdict() for state in self.get_state_vectors()]
+
+class AsyncOpenSkyClient:
+    """
+    Non-blocking client for the OpenSky API with pooled keep-alive connections.
+    """
+    BASE_URL = OpenSkyClient.BASE_URL
+
+    def __init__(self, resilience: Optional[ResiliencePolicy] = None):
+        self.session = create_async_session()
+        self.resilience = resilience or provider_policy('opensky')
+
+    def metrics(self) -> Dict[str, Any]:
+        """Circuit breaker state and request counters of the OpenSky policy."""
+        return self.resilience.metrics()
+
+    async def get_state_vectors(self, bounds: Optional[Tuple[float, float, float, float]] = None) -> List[StateVector]:
+        """
+        Fetches live state vectors from the OpenSky API without blocking the
+        event loop, decoding the response incrementally as it is streamed.
+
+        Args:
+            bounds: Optional bounding box (lat1, lon1, lat2, lon2); None means global
+
+        Returns:
+            List of StateVector records.
+        """
         url = f"{self.BASE_URL}/states/all"
+        params = _bounds_params(bounds)
+        
+        async def send() -> List[StateVector]:
+            async with self.session.stream("GET", url, params=params) as response:
+                response.raise_for_status()
+                return [
+                    state async for state in aiter_state_vectors(response.aiter_bytes(STREAM_CHUNK_SIZE))
+                ]
+        
         try:
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            states = data.get("states", [])
-            flights = []
-            for state in states:
-                flight = {
-                    "icao24": state[0],
-                    "callsign": state[1].strip() if state[1] else None,
-                    "origin_country": state[2],
-                    "time_position": state[3],
-                    "last_contact": state[4],
-                    "longitude": state[5],
-                    "latitude": state[6],
-                    "baro_altitude": state[7],
-                    "on_ground": state[8],
-                    "velocity": state[9],
-                    "heading": state[10],
-                    "vertical_rate": state[11],
-                    "sensors": state[12],
-                    "geo_altitude": state[13],
-                    "squawk": state[14],
-                    "spi": state[15],
-                    "position_source": state[16],
-                }
-                flights.append(flight)
-            logger.info(f"Fetched {len(flights)} live flights from OpenSky API.")
-            return flights
-        except requests.exceptions.RequestException as e:
+            states = await self.resilience.call_async(send)
+            logger.info(f"Fetched {len(states)} live flights from OpenSky API.")
+            return states
+        except (httpx.HTTPError, CircuitOpenError) as e:
             logger.error(f"Error fetching live flights from OpenSky API: {e}")
             return []
+
+    async def get_live_flights(self) -> List[Dict[str, Any]]:
+        """
+        Fetches live flight data from the OpenSky API without blocking the event loop.
+
+        Returns:
+            List of dictionaries containing flight data.
+        """
+        return [state._asdict() for state in await self.get_state_vectors()]
+
+    async def aclose(self):
+        """Close the pooled connections."""
+        await self.session.aclose()
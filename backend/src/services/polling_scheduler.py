@@ -0,0 +1,163 @@
+import os
+import time
+import logging
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Default cadence (seconds) for a region with normal traffic
+DEFAULT_BASE_INTERVAL = 30
+# Cadence used while one of our aircraft is airborne in the region
+DEFAULT_MIN_INTERVAL = 10
+# Upper bound for quiet regions at night
+DEFAULT_MAX_INTERVAL = 300
+# Number of aircraft at which a region counts as busy
+DEFAULT_BUSY_THRESHOLD = 50
+# Local hours (start, end) treated as night
+DEFAULT_NIGHT_HOURS = (22, 6)
+
+class PollingRegion:
+    """A bounding box polled on its own adaptive schedule."""
+    __slots__ = ('name', 'bounds', 'interval', 'next_poll_at', 'traffic', 'fleet_airborne')
+
+    def __init__(self, name: str, bounds: Optional[Tuple[float, float, float, float]] = None):
+        """
+        Args:
+            name: Region name used in logs
+            bounds: Bounding box (lat1, lon1, lat2, lon2); None means global
+        """
+        self.name = name
+        self.bounds = bounds
+        self.interval = 0.0
+        self.next_poll_at = 0.0
+        self.traffic = 0
+        self.fleet_airborne = 0
+
+    @property
+    def center_longitude(self) -> float:
+        if self.bounds is None:
+            return 0.0
+        return (self.bounds[1] + self.bounds[3]) / 2
+
+    def contains(self, latitude: Optional[float], longitude: Optional[float]) -> bool:
+        if self.bounds is None:
+            return True
+        if latitude is None or longitude is None:
+            return False
+        lat1, lon1, lat2, lon2 = self.bounds
+        return min(lat1, lat2) <= latitude <= max(lat1, lat2) and min(lon1, lon2) <= longitude <= max(lon1, lon2)
+
+class PollingScheduler:
+    """
+    Decides when each region is polled.
+
+    Regions where our fleet is airborne are polled at the minimum interval, busy
+    regions at the base interval, and quiet regions and local night hours back
+    off towards the maximum interval. Due regions are returned fleet first,
+    so they are charged to the API credit budget (see credit_budget) first
+    when credits are scarce.
+    """
+
+    def __init__(
+        self,
+        regions: Optional[Sequence[PollingRegion]] = None,
+        base_interval: float = DEFAULT_BASE_INTERVAL,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        busy_threshold: int = DEFAULT_BUSY_THRESHOLD,
+        night_hours: Tuple[int, int] = DEFAULT_NIGHT_HOURS,
+        clock: Callable[[], float] = time.time
+    ):
+        self.regions = list(regions) if regions else [PollingRegion('global')]
+        self.base_interval = base_interval
+        self.min_interval = min(min_interval, base_interval)
+        self.max_interval = max(max_interval, base_interval)
+        self.busy_threshold = busy_threshold
+        self.night_hours = night_hours
+        self.clock = clock
+
+    @classmethod
+    def from_env(cls, **overrides) -> 'PollingScheduler':
+        """
+        Build a scheduler from environment variables:
+        POLL_REGIONS ("name:lat1,lon1,lat2,lon2;..."), POLL_BASE_INTERVAL_SECONDS,
+        POLL_MIN_INTERVAL_SECONDS and POLL_MAX_INTERVAL_SECONDS.
+        """
+        options = {
+            'base_interval': float(os.getenv('POLL_BASE_INTERVAL_SECONDS', DEFAULT_BASE_INTERVAL)),
+            'min_interval': float(os.getenv('POLL_MIN_INTERVAL_SECONDS', DEFAULT_MIN_INTERVAL)),
+            'max_interval': float(os.getenv('POLL_MAX_INTERVAL_SECONDS', DEFAULT_MAX_INTERVAL)),
+        }
+        regions = os.getenv('POLL_REGIONS')
+        if regions:
+            options['regions'] = parse_regions(regions)
+        options.update(overrides)
+        return cls(**options)
+
+    def _is_night(self, region: PollingRegion, now: float) -> bool:
+        # Approximate local solar time from the region's center longitude
+        utc = datetime.fromtimestamp(now, tz=timezone.utc)
+        local_hour = (utc.hour + utc.minute / 60 + region.center_longitude / 15) % 24
+        start, end = self.night_hours
+        if start <= end:
+            return start <= local_hour < end
+        return local_hour >= start or local_hour < end
+
+    def interval_for(self, region: PollingRegion, now: Optional[float] = None) -> float:
+        """
+        Compute the polling interval for a region from its latest activity.
+        """
+        now = self.clock() if now is None else now
+        if region.fleet_airborne > 0:
+            return self.min_interval
+        interval = self.base_interval
+        if region.traffic < self.busy_threshold:
+            interval *= 2
+        if self._is_night(region, now):
+            interval *= 2
+        return min(interval, self.max_interval)
+
+    def due_regions(self, now: Optional[float] = None) -> List[PollingRegion]:
+        """
+        Return the regions that should be polled now. Fleet regions and busy
+        regions come first.
+        """
+        now = self.clock() if now is None else now
+        due = [region for region in self.regions if region.next_poll_at <= now]
+        due.sort(key=lambda region: (-region.fleet_airborne, -region.traffic))
+        return due
+
+    def record_poll(self, region: PollingRegion, traffic: int, fleet_airborne: int = 0, now: Optional[float] = None):
+        """
+        Record the result of polling a region and schedule its next poll.
+
+        Args:
+            region: The region that was polled
+            traffic: Number of aircraft returned for the region
+            fleet_airborne: Number of our aircraft airborne in the region
+            now: Optional poll time (defaults to the scheduler clock)
+        """
+        now = self.clock() if now is None else now
+        region.traffic = traffic
+        region.fleet_airborne = fleet_airborne
+        region.interval = self.interval_for(region, now)
+        region.next_poll_at = now + region.interval
+
+    def seconds_until_next(self, now: Optional[float] = None) -> float:
+        """Seconds until the next region is due (never negative)."""
+        now = self.clock() if now is None else now
+        return max(0.0, min(region.next_poll_at for region in self.regions) - now)
+
+def parse_regions(value: str) -> List[PollingRegion]:
+    """
+    Parse regions in the form "name:lat1,lon1,lat2,lon2;name2:...".
+    """
+    regions = []
+    for item in filter(None, (part.strip() for part in value.split(';'))):
+        name, _, coordinates = item.partition(':')
+        bounds = tuple(float(coordinate) for coordinate in coordinates.split(','))
+        if len(bounds) != 4:
+            raise ValueError(f"Invalid bounds for polling region '{name}': {coordinates}")
+        regions.append(PollingRegion(name.strip(), bounds))
+    return regions
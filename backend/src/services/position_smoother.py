@@ -0,0 +1,208 @@
+from typing import Dict, Hashable, List, Sequence
+
+import numpy as np
+
+METERS_PER_DEGREE = 111320.0
+
+# Standard deviation of provider position reports (meters)
+DEFAULT_MEASUREMENT_NOISE_METERS = 50.0
+# Standard deviation of unmodelled acceleration (m/s^2)
+DEFAULT_ACCELERATION_NOISE = 1.5
+# Initial velocity uncertainty of a newly seen aircraft (m/s)
+INITIAL_VELOCITY_STD = 150.0
+
+# State columns: position and velocity per axis (degrees, degrees/s) and the
+# covariance terms of each axis' 2x2 matrix
+_COLUMNS = ('lat', 'lon', 'v_lat', 'v_lon', 'p11_lat', 'p12_lat', 'p22_lat', 'p11_lon', 'p12_lon', 'p22_lon', 'time')
+
+# Live store columns written by smooth()
+SMOOTHED_COLUMNS = ('smoothed_latitude', 'smoothed_longitude', 'velocity_north', 'velocity_east')
+
+def _kalman_axis(x, v, p11, p12, p22, z, dt, r, q):
+    """
+    One predict/update step of a 1-D constant-velocity Kalman filter, applied
+    element-wise to arrays. Returns the new (x, v, p11, p12, p22).
+    """
+    # Predict with white-noise acceleration
+    x = x + v * dt
+    dt2 = dt * dt
+    p11 = p11 + 2 * dt * p12 + dt2 * p22 + q * dt2 * dt2 / 4
+    p12 = p12 + dt * p22 + q * dt2 * dt / 2
+    p22 = p22 + q * dt2
+
+    # Update with the measured position
+    innovation = z - x
+    s = p11 + r
+    k1 = p11 / s
+    k2 = p12 / s
+    x = x + k1 * innovation
+    v = v + k2 * innovation
+    p22 = p22 - k2 * p12
+    p12 = (1 - k1) * p12
+    p11 = (1 - k1) * p11
+    return x, v, p11, p12, p22
+
+class PositionSmoother:
+    """
+    Batched constant-velocity Kalman filter over many aircraft.
+
+    Each aircraft has an independent filter per axis (latitude, longitude)
+    estimating position and velocity. All filter states live in NumPy columns
+    so one ingest cycle is a single vectorized pass over the updated aircraft.
+    Noise is specified in meters and scaled to degrees per aircraft.
+    """
+
+    def __init__(self, measurement_noise: float = DEFAULT_MEASUREMENT_NOISE_METERS,
+                 acceleration_noise: float = DEFAULT_ACCELERATION_NOISE, capacity: int = 1024):
+        """
+        Args:
+            measurement_noise: Standard deviation of position reports in meters
+            acceleration_noise: Standard deviation of acceleration in m/s^2
+            capacity: Initial number of aircraft slots
+        """
+        self.measurement_noise = measurement_noise
+        self.acceleration_noise = acceleration_noise
+        self._keys: List[Hashable] = []
+        self._index: Dict[Hashable, int] = {}
+        self._columns = {name: np.zeros(capacity) for name in _COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _rows(self, keys: Sequence[Hashable]) -> np.ndarray:
+        rows = np.empty(len(keys), dtype=np.intp)
+        for position, key in enumerate(keys):
+            row = self._index.get(key)
+            if row is None:
+                row = len(self._keys)
+                if row == len(self._columns['time']):
+                    for name, column in self._columns.items():
+                        self._columns[name] = np.concatenate([column, np.zeros(len(column))])
+                self._keys.append(key)
+                self._index[key] = row
+                self._columns['time'][row] = np.nan
+            rows[position] = row
+        return rows
+
+    def update(self, keys: Sequence[Hashable], latitude: np.ndarray, longitude: np.ndarray,
+               timestamp: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Feed one position report per aircraft and return the filtered estimates.
+
+        Reports without a position, or not newer than the aircraft's last
+        report, leave its filter unchanged.
+
+        Args:
+            keys: Aircraft identifiers (unique)
+            latitude: Measured latitudes in degrees
+            longitude: Measured longitudes in degrees
+            timestamp: Report times in epoch seconds
+
+        Returns:
+            Dict of arrays aligned with keys: smoothed_latitude, smoothed_longitude,
+            velocity_north and velocity_east (m/s)
+        """
+        latitude = np.asarray(latitude, dtype=float)
+        longitude = np.asarray(longitude, dtype=float)
+        timestamp = np.asarray(timestamp, dtype=float)
+        rows = self._rows(keys)
+        state = {name: column[rows] for name, column in self._columns.items()}
+
+        measured = ~(np.isnan(latitude) | np.isnan(longitude) | np.isnan(timestamp))
+        new = measured & np.isnan(state['time'])
+        dt = timestamp - state['time']
+        step = measured & ~new & (dt > 0)
+
+        # Meters per degree of longitude shrink with latitude
+        lon_scale = METERS_PER_DEGREE * np.maximum(np.cos(np.radians(np.where(measured, latitude, state['lat']))), 1e-6)
+        r_lat = (self.measurement_noise / METERS_PER_DEGREE) ** 2
+        r_lon = (self.measurement_noise / lon_scale) ** 2
+        q_lat = (self.acceleration_noise / METERS_PER_DEGREE) ** 2
+        q_lon = (self.acceleration_noise / lon_scale) ** 2
+
+        if step.any():
+            dt_step = dt[step]
+            x, v, p11, p12, p22 = _kalman_axis(
+                state['lat'][step], state['v_lat'][step], state['p11_lat'][step], state['p12_lat'][step],
+                state['p22_lat'][step], latitude[step], dt_step, r_lat, q_lat
+            )
+            state['lat'][step], state['v_lat'][step] = x, v
+            state['p11_lat'][step], state['p12_lat'][step], state['p22_lat'][step] = p11, p12, p22
+
+            # Filter longitude relative to the estimate so the antimeridian does not jump
+            previous = state['lon'][step]
+            offset = (longitude[step] - previous + 180) % 360 - 180
+            x, v, p11, p12, p22 = _kalman_axis(
+                np.zeros_like(previous), state['v_lon'][step], state['p11_lon'][step], state['p12_lon'][step],
+                state['p22_lon'][step], offset, dt_step, r_lon[step], q_lon[step]
+            )
+            state['lon'][step] = (previous + x + 180) % 360 - 180
+            state['v_lon'][step] = v
+            state['p11_lon'][step], state['p12_lon'][step], state['p22_lon'][step] = p11, p12, p22
+            state['time'][step] = timestamp[step]
+
+        if new.any():
+            state['lat'][new] = latitude[new]
+            state['lon'][new] = longitude[new]
+            state['v_lat'][new] = 0.0
+            state['v_lon'][new] = 0.0
+            state['p11_lat'][new] = r_lat
+            state['p11_lon'][new] = r_lon[new]
+            state['p12_lat'][new] = 0.0
+            state['p12_lon'][new] = 0.0
+            state['p22_lat'][new] = (INITIAL_VELOCITY_STD / METERS_PER_DEGREE) ** 2
+            state['p22_lon'][new] = (INITIAL_VELOCITY_STD / lon_scale[new]) ** 2
+            state['time'][new] = timestamp[new]
+
+        for name, column in self._columns.items():
+            column[rows] = state[name]
+
+        known = ~np.isnan(state['time'])
+        return {
+            'smoothed_latitude': np.where(known, state['lat'], np.nan),
+            'smoothed_longitude': np.where(known, state['lon'], np.nan),
+            'velocity_north': np.where(known, state['v_lat'] * METERS_PER_DEGREE, np.nan),
+            'velocity_east': np.where(known, state['v_lon'] * lon_scale, np.nan),
+        }
+
+    def forget(self, key: Hashable) -> bool:
+        """
+        Drop an aircraft's filter, moving the last row into its slot.
+
+        Returns:
+            True if the aircraft was known
+        """
+        row = self._index.pop(key, None)
+        if row is None:
+            return False
+        last = len(self._keys) - 1
+        if row != last:
+            moved = self._keys[last]
+            self._keys[row] = moved
+            self._index[moved] = row
+            for column in self._columns.values():
+                column[row] = column[last]
+        self._keys.pop()
+        return True
+
+    def smooth(self, store, flight_ids: Sequence[Hashable]) -> int:
+        """
+        Filter the given flights of a LiveTrafficStore from their raw columns
+        and write the estimates to its smoothed columns.
+
+        Args:
+            store: LiveTrafficStore holding the raw positions
+            flight_ids: Flights updated in this ingest cycle (unique)
+
+        Returns:
+            Number of flights filtered
+        """
+        flight_ids = [flight_id for flight_id in dict.fromkeys(flight_ids) if flight_id in store]
+        if not flight_ids:
+            return 0
+        raw = store.columns_for(flight_ids, ('latitude', 'longitude', 'timestamp', 'position_timestamp'))
+        # Filter on the provider's position time, or the receive time without one
+        timestamp = np.where(np.isnan(raw['position_timestamp']), raw['timestamp'], raw['position_timestamp'])
+        estimates = self.update(flight_ids, raw['latitude'], raw['longitude'], timestamp)
+        store.update_columns(flight_ids, estimates)
+        return len(flight_ids)
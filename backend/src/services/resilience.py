@@ -0,0 +1,324 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+import requests
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: throttling and transient gateway errors
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+# Retry defaults (seconds)
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_CAP = 10.0
+# Consecutive failures that open the breaker, and seconds it stays open
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+# Requests per second allowed to each provider (burst of one second's worth)
+DEFAULT_RATE_LIMITS = {'fr24': 10.0, 'flightradar': 10.0, 'opensky': 1.0}
+DEFAULT_RATE_LIMIT = 5.0
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit breaker is open."""
+
+def _status_code(error: BaseException) -> Optional[int]:
+    response = getattr(error, 'response', None)
+    return getattr(response, 'status_code', None)
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether a failed request may succeed if repeated."""
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                          httpx.TransportError)):
+        return True
+    return _status_code(error) in RETRY_STATUSES
+
+def is_provider_failure(error: BaseException) -> bool:
+    """Whether an error says the provider is unhealthy (as opposed to a bad request)."""
+    status = _status_code(error)
+    return is_retryable(error) or (status is not None and status >= 500)
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt: int, base: float = DEFAULT_BACKOFF_BASE, cap: float = DEFAULT_BACKOFF_CAP,
+                  rng: Callable[[float, float], float] = random.uniform) -> float:
+    """
+    Full-jitter exponential backoff: a random delay up to base * 2^attempt,
+    capped, so clients retrying together spread out.
+    """
+    return rng(0.0, min(cap, base * 2 ** attempt))
+
+class RateLimiter:
+    """
+    Token bucket shared by every request to a provider. Callers reserve a
+    token and wait until it is due, so bursts are smoothed rather than
+    rejected. Thread-safe, so sync and async clients can share one bucket.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            rate: Tokens added per second
+            burst: Bucket size (defaults to one second's worth, at least 1)
+            clock: Monotonic time source
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.clock = clock
+        self.tokens = self.burst
+        self.throttled = 0
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return the seconds to wait before using it."""
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            self.throttled += 1
+            return -self.tokens / self.rate
+
+class CircuitBreaker:
+    """
+    Fails fast while a provider is down.
+
+    After failure_threshold consecutive failures the breaker opens and calls
+    are rejected for reset_timeout seconds. It then lets one trial call
+    through (half-open): success closes it, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may be made now."""
+        with self._lock:
+            if self.state == OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    @property
+    def rejecting(self) -> bool:
+        """Whether a call made now would be rejected, without claiming the half-open trial."""
+        with self._lock:
+            if self.state == OPEN:
+                return self.clock() - self.opened_at < self.reset_timeout
+            return self.state == HALF_OPEN and self._trial_in_flight
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Free the half-open trial of a call that ended without an outcome, e.g. was cancelled."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                self.state = OPEN
+                self.opened_at = self.clock()
+
+class ResiliencePolicy:
+    """
+    Rate limiting, retries with jittered exponential backoff and a circuit
+    breaker around the requests to one provider.
+
+    Only transient errors (connection problems, timeouts, 429/502/503/504)
+    are retried; provider errors count towards opening the breaker. Errors
+    are re-raised, so clients keep handling them as before.
+    """
+
+    def __init__(self, name: str, rate: float = DEFAULT_RATE_LIMIT, max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_base: float = DEFAULT_BACKOFF_BASE, backoff_cap: float = DEFAULT_BACKOFF_CAP,
+                 breaker: Optional[CircuitBreaker] = None):
+        """
+        Args:
+            name: Provider name used in logs and metrics
+            rate: Requests per second
+            max_retries: Retries after the first attempt
+            backoff_base: Backoff ceiling of the first retry in seconds
+            backoff_cap: Maximum backoff in seconds
+            breaker: Optional circuit breaker (a default one is created)
+        """
+        self.name = name
+        self.limiter = RateLimiter(rate)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.breaker = breaker or CircuitBreaker()
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+
+    def _before_attempt(self):
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Circuit breaker for {self.name} is open")
+
+    def _after_failure(self, error: Exception, attempt: int) -> Optional[float]:
+        """Record a failed attempt; return the delay before retrying, or None to give up."""
+        if is_provider_failure(error):
+            self.failures += 1
+            self.breaker.record_failure()
+        else:
+            # The provider answered; the request itself was rejected
+            self.breaker.record_success()
+        if attempt >= self.max_retries or not is_retryable(error) or self.breaker.state == OPEN:
+            return None
+        self.retries += 1
+        delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_cap))
+        logger.warning(f"Retrying {self.name} request in {delay:.2f}s after: {error}")
+        return delay
+
+    def call(self, func: Callable[[], Any]) -> Any:
+        """
+        Run a blocking request function under the policy.
+
+        Raises:
+            CircuitOpenError: If the breaker is open
+        """
+        self.calls += 1
+        attempt = 0
+        while True:
+            self._before_attempt()
+            try:
+                time.sleep(self.limiter.reserve())
+                result = func()
+            except Exception as e:
+                delay = self._after_failure(e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                self.breaker.release_trial()
+                raise
+            self.breaker.record_success()
+            return result
+
+    async def call_async(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run a request coroutine function under the policy.
+
+        Raises:
+            CircuitOpenError: If the breaker is open
+        """
+        self.calls += 1
+        attempt = 0
+        while True:
+            self._before_attempt()
+            try:
+                wait = self.limiter.reserve()
+                if wait:
+                    await asyncio.sleep(wait)
+                result = await func()
+            except Exception as e:
+                delay = self._after_failure(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                # Cancelled: no outcome, but a half-open breaker must allow the next trial
+                self.breaker.release_trial()
+                raise
+            self.breaker.record_success()
+            return result
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return breaker state and request counters."""
+        return {
+            'state': self.breaker.state,
+            'consecutive_failures': self.breaker.consecutive_failures,
+            'times_opened': self.breaker.times_opened,
+            'rejected': self.breaker.rejected,
+            'calls': self.calls,
+            'retries': self.retries,
+            'failures': self.failures,
+            'throttled': self.limiter.throttled,
+        }
+
+def _rate_limits() -> Dict[str, float]:
+    """Per-provider rates from UPSTREAM_RATE_LIMITS ("fr24:10,opensky:1")."""
+    rates = dict(DEFAULT_RATE_LIMITS)
+    for item in filter(None, (part.strip() for part in os.getenv('UPSTREAM_RATE_LIMITS', '').split(','))):
+        name, _, rate = item.partition(':')
+        rates[name.strip()] = float(rate)
+    return rates
+
+_policies: Dict[str, ResiliencePolicy] = {}
+
+def provider_policy(name: str) -> ResiliencePolicy:
+    """
+    Return the process-wide policy of a provider, shared by its sync and
+    async clients so they draw from one rate limit and one breaker. Configured
+    by UPSTREAM_RATE_LIMITS, UPSTREAM_MAX_RETRIES, UPSTREAM_BREAKER_FAILURES
+    and UPSTREAM_BREAKER_RESET_SECONDS.
+    """
+    policy = _policies.get(name)
+    if policy is None:
+        breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv('UPSTREAM_BREAKER_FAILURES', DEFAULT_FAILURE_THRESHOLD)),
+            reset_timeout=float(os.getenv('UPSTREAM_BREAKER_RESET_SECONDS', DEFAULT_RESET_TIMEOUT)),
+        )
+        policy = ResiliencePolicy(
+            name,
+            rate=_rate_limits().get(name, DEFAULT_RATE_LIMIT),
+            max_retries=int(os.getenv('UPSTREAM_MAX_RETRIES', DEFAULT_MAX_RETRIES)),
+            breaker=breaker,
+        )
+        _policies[name] = policy
+    return policy
+
+def resilience_metrics() -> Dict[str, Dict[str, Any]]:
+    """Metrics of every provider policy in this process."""
+    return {name: policy.metrics() for name, policy in _policies.items()}
@@ -0,0 +1,313 @@
+import asyncio
+import json
+import logging
+import os
+import struct
+import tempfile
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library codec
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Segment header: sequence number (odd while a write is in progress), payload
+# length and publish time (epoch seconds)
+HEADER = struct.Struct('<QQd')
+DEFAULT_SEGMENT_BYTES = 16 * 1024 * 1024
+# Attempts a reader makes while a write is in progress before giving up
+READ_RETRIES = 1000
+# Seconds between checks of the relay for a new snapshot
+DEFAULT_RELAY_INTERVAL_SECONDS = 0.5
+# Recent alerts kept in the alert log segment for workers to relay
+ALERT_LOG_SIZE = 100
+
+SHARED_SNAPSHOT_ENABLED = os.getenv('SHARED_SNAPSHOT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+SHARED_SNAPSHOT_PREFIX = os.getenv('SHARED_SNAPSHOT_PREFIX', 'flight_tracker')
+SHARED_SNAPSHOT_BYTES = int(float(os.getenv('SHARED_SNAPSHOT_MB', DEFAULT_SEGMENT_BYTES / (1024 * 1024))) * 1024 * 1024)
+# Active flights older than this are not served: the leader republishes them
+# every update interval, so an older snapshot means no leader is running
+ACTIVE_FLIGHTS_MAX_AGE_SECONDS = float(os.getenv('ACTIVE_FLIGHTS_MAX_AGE_SECONDS', 90))
+
+# Segment names for the active flights (as served by /api/flights/active), the
+# fleet positions relayed to WebSocket clients, all live traffic and recent alerts
+ACTIVE_FLIGHTS_SEGMENT = f'{SHARED_SNAPSHOT_PREFIX}_active'
+FLEET_SEGMENT = f'{SHARED_SNAPSHOT_PREFIX}_fleet'
+LIVE_TRAFFIC_SEGMENT = f'{SHARED_SNAPSHOT_PREFIX}_live'
+ALERTS_SEGMENT = f'{SHARED_SNAPSHOT_PREFIX}_alerts'
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    segment = shared_memory.SharedMemory(name=name)
+    # Attaching registers the segment with this process's resource tracker,
+    # which would unlink it on exit although other processes still use it
+    try:
+        resource_tracker.unregister(segment._name, 'shared_memory')
+    except Exception:
+        pass
+    return segment
+
+class SharedSnapshotWriter:
+    """
+    Publishes byte payloads to a named shared memory segment guarded by a
+    seqlock: the sequence number is odd while a write is in progress, so
+    readers in other processes can detect and retry torn reads without locks.
+
+    The segment outlives the writer so a new leader can keep publishing to the
+    segment that API workers are already attached to. Writers in several
+    processes must not publish concurrently (see append_alert); each publish
+    continues from the sequence number found in the segment.
+
+    Snapshots are published as JSON rather than as the live store's NumPy
+    columns. The payload is exactly the HTTP response body, so the hot
+    /api/flights/active and /api/flights/live paths return the bytes without
+    decoding anything; the records also mix strings of any length with
+    floats, which a fixed-layout columnar segment could not hold without a
+    width limit. Workers decode only for WebSocket relays and degraded reads,
+    once per new snapshot (see SharedSnapshotReader.read_json).
+    """
+
+    def __init__(self, name: str, size: int = DEFAULT_SEGMENT_BYTES):
+        """
+        Args:
+            name: Segment name shared by writer and readers
+            size: Segment size in bytes (header included)
+        """
+        self.name = name
+        try:
+            self._segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+            resource_tracker.unregister(self._segment._name, 'shared_memory')
+        except FileExistsError:
+            self._segment = _attach(name)
+            if self._segment.size < size:
+                logger.warning(f"Shared snapshot segment {name} is smaller than requested ({self._segment.size} bytes)")
+        self.capacity = self._segment.size - HEADER.size
+        self.sequence, _, _ = HEADER.unpack_from(self._segment.buf, 0)
+        # Finish a write interrupted by a crashed writer
+        if self.sequence % 2:
+            self.sequence += 1
+            struct.pack_into('<Q', self._segment.buf, 0, self.sequence)
+
+    def publish(self, payload: bytes) -> bool:
+        """
+        Publish a payload, replacing the previous one.
+
+        Returns:
+            False if the payload does not fit into the segment
+        """
+        if len(payload) > self.capacity:
+            logger.error(f"Snapshot of {len(payload)} bytes does not fit into shared segment {self.name}")
+            return False
+        buf = self._segment.buf
+        current, _, _ = HEADER.unpack_from(buf, 0)
+        # Another process may have published since our last write
+        self.sequence = max(self.sequence, current + current % 2)
+        struct.pack_into('<Q', buf, 0, self.sequence + 1)
+        buf[HEADER.size:HEADER.size + len(payload)] = payload
+        HEADER.pack_into(buf, 0, self.sequence + 1, len(payload), time.time())
+        self.sequence += 2
+        struct.pack_into('<Q', buf, 0, self.sequence)
+        return True
+
+    def close(self):
+        """Detach from the segment without removing it."""
+        self._segment.close()
+
+    def unlink(self):
+        """Remove the segment; attached readers keep their mapping until they close."""
+        # unlink() unregisters from the resource tracker, so register it again first
+        resource_tracker.register(self._segment._name, 'shared_memory')
+        self._segment.unlink()
+
+class SharedSnapshotReader:
+    """
+    Reads the latest payload of a segment published by SharedSnapshotWriter.
+
+    The payload is copied out only when its sequence number changed, so
+    repeated reads of an unchanged snapshot cost one header read. Attaching is
+    lazy: until a writer has created the segment, read() returns None.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._segment = None
+        self._sequence = 0
+        self._payload: Optional[bytes] = None
+        self._decoded: Any = None
+        self.published_at: Optional[float] = None
+
+    def _ensure_attached(self) -> bool:
+        if self._segment is None:
+            try:
+                self._segment = _attach(self.name)
+            except FileNotFoundError:
+                return False
+        return True
+
+    @property
+    def sequence(self) -> int:
+        """Sequence number of the last payload read (0 before any)."""
+        return self._sequence
+
+    def read(self, max_age: Optional[float] = None) -> Optional[bytes]:
+        """
+        Return the latest published payload, or None if nothing was published.
+
+        Args:
+            max_age: Optional seconds after which a payload is too old to
+                serve (e.g. because its writer died); None is returned instead
+        """
+        payload = self._read_latest()
+        if payload is not None and max_age is not None and time.time() - self.published_at > max_age:
+            return None
+        return payload
+
+    def _read_latest(self) -> Optional[bytes]:
+        if not self._ensure_attached():
+            return None
+        buf = self._segment.buf
+        capacity = self._segment.size - HEADER.size
+        for _ in range(READ_RETRIES):
+            start, length, published_at = HEADER.unpack_from(buf, 0)
+            if start == self._sequence:
+                return self._payload
+            if start % 2 or length > capacity:
+                continue
+            payload = bytes(buf[HEADER.size:HEADER.size + length])
+            end, = struct.unpack_from('<Q', buf, 0)
+            if start == end:
+                self._sequence = start
+                self._payload = payload
+                self._decoded = None
+                self.published_at = published_at
+                return payload
+        # The writer kept the segment busy; serve the previous snapshot
+        return self._payload
+
+    def read_json(self) -> Any:
+        """Return the latest payload decoded as JSON (decoded once per snapshot)."""
+        payload = self.read()
+        if payload is None:
+            return None
+        if self._decoded is None:
+            self._decoded = orjson.loads(payload) if orjson is not None else json.loads(payload)
+        return self._decoded
+
+    def close(self):
+        """Detach from the segment."""
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+_writers: Dict[str, SharedSnapshotWriter] = {}
+
+def publish_snapshot(name: str, data: Any) -> bool:
+    """
+    Encode data as JSON (with orjson when installed) and publish it to the
+    named segment, creating the segment on first use.
+
+    Returns:
+        True if the snapshot was published
+    """
+    writer = _writers.get(name)
+    if writer is None:
+        try:
+            writer = SharedSnapshotWriter(name, SHARED_SNAPSHOT_BYTES)
+        except Exception as e:
+            logger.error(f"Could not open shared snapshot segment {name}: {e}")
+            return False
+        _writers[name] = writer
+    if orjson is not None:
+        payload = orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    else:
+        payload = json.dumps(data, separators=(',', ':'), default=str).encode('utf-8')
+    return writer.publish(payload)
+
+_log_readers: Dict[str, SharedSnapshotReader] = {}
+
+def append_alert(name: str, alert: Dict[str, Any]) -> bool:
+    """
+    Append an alert to the log of recent alerts in the named segment. Any API
+    worker may append, so appends are serialized with a lock file; every
+    entry gets the next sequence number of the log.
+
+    Returns:
+        True if the alert was published
+    """
+    reader = _log_readers.setdefault(name, SharedSnapshotReader(name))
+    with open(os.path.join(tempfile.gettempdir(), f'{name}.lock'), 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            entries = list(reader.read_json() or [])
+            sequence = entries[-1]['sequence'] + 1 if entries else 1
+            entries.append({'sequence': sequence, 'alert': alert})
+            return publish_snapshot(name, entries[-ALERT_LOG_SIZE:])
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+# Readers used by the API workers
+active_flights_reader = SharedSnapshotReader(ACTIVE_FLIGHTS_SEGMENT)
+fleet_reader = SharedSnapshotReader(FLEET_SEGMENT)
+live_traffic_reader = SharedSnapshotReader(LIVE_TRAFFIC_SEGMENT)
+alerts_reader = SharedSnapshotReader(ALERTS_SEGMENT)
+
+async def relay_snapshots(reader: SharedSnapshotReader, manager, interval: float = DEFAULT_RELAY_INTERVAL_SECONDS,
+                          method: str = 'broadcast'):
+    """
+    Broadcast every new snapshot of a segment to this worker's WebSocket
+    clients, so all API workers serve the leader's updates.
+
+    Args:
+        reader: Reader of the segment to relay
+        manager: WebSocket connection manager
+        interval: Seconds between checks for a new snapshot
+        method: Name of the manager's async method receiving each snapshot
+    """
+    publish = getattr(manager, method)
+    sequence = reader.sequence
+    while True:
+        try:
+            data = reader.read_json()
+            if data is not None and reader.sequence != sequence:
+                sequence = reader.sequence
+                await publish(data)
+        except Exception as e:
+            logger.error(f"Error relaying shared snapshot {reader.name}: {e}")
+        await asyncio.sleep(interval)
+
+async def relay_alerts(reader: SharedSnapshotReader, manager, interval: float = DEFAULT_RELAY_INTERVAL_SECONDS):
+    """
+    Broadcast every alert appended to the alert log (by any worker) to this
+    worker's WebSocket clients once. Alerts logged before the relay started
+    are not replayed.
+
+    Args:
+        reader: Reader of the alert log segment
+        manager: WebSocket connection manager
+        interval: Seconds between checks for new alerts
+    """
+    entries = reader.read_json()
+    last = entries[-1]['sequence'] if entries else 0
+    while True:
+        try:
+            entries = reader.read_json() or []
+            if entries and entries[-1]['sequence'] < last:
+                # The log was recreated
+                last = 0
+            for entry in entries:
+                if entry['sequence'] > last:
+                    last = entry['sequence']
+                    await manager.broadcast_alert(entry['alert'])
+        except Exception as e:
+            logger.error(f"Error relaying alerts from {reader.name}: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,142 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .live_store import LiveSnapshot
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_PATH = os.path.join('.cache', 'live_snapshot.bin')
+# Seconds between snapshot writes
+DEFAULT_SNAPSHOT_INTERVAL_SECONDS = 30.0
+# Snapshots older than this are not loaded at startup
+DEFAULT_SNAPSHOT_MAX_AGE_SECONDS = 900.0
+
+# File layout: magic, metadata length, JSON metadata, then 8-byte aligned arrays
+MAGIC = b'FLTSNAP1'
+PREAMBLE = struct.Struct('<8sI')
+ALIGNMENT = 8
+
+class WarmSnapshot(NamedTuple):
+    """State loaded from a snapshot file."""
+    saved_at: float
+    live: LiveSnapshot
+    dead_reckoning_keys: List[Hashable]
+    dead_reckoning_columns: Dict[str, np.ndarray]
+    fleet: Optional[Dict[str, Any]]
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def save_snapshot(path: str, live: LiveSnapshot, dead_reckoning: Tuple[List[Hashable], Dict[str, np.ndarray]],
+                  fleet: Optional[Dict[str, Any]] = None, saved_at: Optional[float] = None):
+    """
+    Write the live traffic, dead-reckoning fixes and fleet payload to a file.
+
+    Arrays are stored raw so the file can be memory-mapped on load; the file
+    is written to a temporary name and renamed, so a crash never leaves a
+    partial snapshot behind.
+
+    Args:
+        path: Snapshot file path
+        live: Live store snapshot
+        dead_reckoning: (keys, columns) from DeadReckoningEngine.state()
+        fleet: Last fleet payload sent to WebSocket clients
+        saved_at: Optional save time (defaults to now)
+    """
+    dead_reckoning_keys, dead_reckoning_columns = dead_reckoning
+    arrays = {f'live.{name}': column for name, column in live.columns.items()}
+    arrays.update({f'live_codes.{name}': codes for name, codes in live.codes.items()})
+    arrays.update({f'dead_reckoning.{name}': column for name, column in dead_reckoning_columns.items()})
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = [offset, array.dtype.str, len(array)]
+        offset = _aligned(offset + array.nbytes)
+
+    metadata = json.dumps({
+        'saved_at': time.time() if saved_at is None else saved_at,
+        'arrays': layout,
+        'live_ids': live.ids,
+        'live_vocab': live.vocab,
+        'dead_reckoning_keys': dead_reckoning_keys,
+        'fleet': fleet,
+    }, separators=(',', ':'), default=str).encode('utf-8')
+    data_start = _aligned(PREAMBLE.size + len(metadata))
+
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as snapshot_file:
+            snapshot_file.write(PREAMBLE.pack(MAGIC, len(metadata)))
+            snapshot_file.write(metadata)
+            for name, array in arrays.items():
+                snapshot_file.seek(data_start + layout[name][0])
+                snapshot_file.write(np.ascontiguousarray(array).tobytes())
+        os.replace(temp_path, path)
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+def load_snapshot(path: str, max_age: Optional[float] = DEFAULT_SNAPSHOT_MAX_AGE_SECONDS,
+                  now: Optional[float] = None) -> Optional[WarmSnapshot]:
+    """
+    Memory-map a snapshot file. The arrays are read-only views of the mapping,
+    so loading costs no more than parsing the metadata.
+
+    Args:
+        path: Snapshot file path
+        max_age: Optional maximum age in seconds; older snapshots are ignored
+        now: Optional current time (defaults to now)
+
+    Returns:
+        The snapshot, or None if missing, unreadable or too old
+    """
+    try:
+        with open(path, 'rb') as snapshot_file:
+            mapping = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        magic, metadata_length = PREAMBLE.unpack_from(mapping, 0)
+        if magic != MAGIC:
+            raise ValueError("not a live snapshot file")
+        metadata = json.loads(mapping[PREAMBLE.size:PREAMBLE.size + metadata_length])
+        data_start = _aligned(PREAMBLE.size + metadata_length)
+        arrays = {
+            name: np.frombuffer(mapping, dtype=np.dtype(dtype), count=length, offset=data_start + offset)
+            if length else np.empty(0, dtype=np.dtype(dtype))
+            for name, (offset, dtype, length) in metadata['arrays'].items()
+        }
+    except (struct.error, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring unreadable live snapshot {path}: {e}")
+        return None
+
+    saved_at = metadata['saved_at']
+    now = time.time() if now is None else now
+    if max_age is not None and now - saved_at > max_age:
+        logger.info(f"Ignoring live snapshot saved {now - saved_at:.0f}s ago")
+        return None
+
+    def group(prefix: str) -> Dict[str, np.ndarray]:
+        return {name[len(prefix):]: array for name, array in arrays.items() if name.startswith(prefix)}
+
+    live = LiveSnapshot(0, metadata['live_ids'], group('live.'), group('live_codes.'), metadata['live_vocab'])
+    return WarmSnapshot(saved_at, live, metadata['dead_reckoning_keys'], group('dead_reckoning.'), metadata['fleet'])
+
+def snapshot_path() -> str:
+    """Snapshot file path from WARM_SNAPSHOT_PATH."""
+    return os.getenv('WARM_SNAPSHOT_PATH') or DEFAULT_SNAPSHOT_PATH
@@ -0,0 +1,136 @@
+import math
+from typing import NamedTuple, Optional, Sequence
+
+import numpy as np
+
+# Edge length of an index cell in degrees
+DEFAULT_CELL_DEGREES = 1.0
+
+class Viewport(NamedTuple):
+    """Map viewport: bounding box in degrees and slippy-map zoom level."""
+    south: float
+    west: float
+    north: float
+    east: float
+    zoom: int
+
+    @property
+    def crosses_antimeridian(self) -> bool:
+        return self.west > self.east
+
+    def snapped(self, step: float) -> 'Viewport':
+        """Expand the box outward to multiples of step, so nearby viewports coincide."""
+        return Viewport(
+            max(-90.0, math.floor(self.south / step) * step),
+            max(-180.0, math.floor(self.west / step) * step),
+            min(90.0, math.ceil(self.north / step) * step),
+            min(180.0, math.ceil(self.east / step) * step),
+            self.zoom,
+        )
+
+def tile_degrees(zoom: int) -> float:
+    """Longitude span of one slippy-map tile at a zoom level."""
+    return 360.0 / 2 ** max(0, zoom)
+
+class GridIndex:
+    """
+    Uniform latitude/longitude grid over arrays of points.
+
+    Points are sorted by cell id (row-major), so the cells of one grid row
+    inside a bounding box are a contiguous run of the sorted order: a query
+    costs two binary searches per row plus an exact filter of the candidates.
+    The index is rebuilt from scratch for every update, which is a single
+    argsort.
+    """
+
+    def __init__(self, cell_degrees: float = DEFAULT_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.columns = int(math.ceil(360.0 / cell_degrees))
+        self.rows = int(math.ceil(180.0 / cell_degrees))
+        self.latitude = np.empty(0)
+        self.longitude = np.empty(0)
+        self._order = np.empty(0, dtype=np.intp)
+        self._sorted_cells = np.empty(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def _row(self, latitude):
+        return np.clip(np.floor((np.asarray(latitude) + 90.0) / self.cell_degrees), 0, self.rows - 1).astype(np.int64)
+
+    def _column(self, longitude):
+        return np.clip(np.floor((np.asarray(longitude) + 180.0) / self.cell_degrees), 0, self.columns - 1).astype(np.int64)
+
+    def build(self, latitude: Sequence[float], longitude: Sequence[float]):
+        """
+        Index points; points without a position are left out.
+
+        Args:
+            latitude: Latitudes in degrees
+            longitude: Longitudes in degrees
+        """
+        self.latitude = np.asarray(latitude, dtype=float)
+        self.longitude = np.asarray(longitude, dtype=float)
+        valid = np.flatnonzero(~(np.isnan(self.latitude) | np.isnan(self.longitude)))
+        cells = self._row(self.latitude[valid]) * self.columns + self._column(self.longitude[valid])
+        order = np.argsort(cells, kind='stable')
+        self._order = valid[order]
+        self._sorted_cells = cells[order]
+
+    def query(self, viewport: Viewport) -> np.ndarray:
+        """
+        Return the indices of the points inside a viewport, in ascending order.
+        Viewports whose west edge is east of their east edge wrap the antimeridian.
+        """
+        if not len(self._order):
+            return np.empty(0, dtype=np.intp)
+        spans = [(viewport.west, 180.0), (-180.0, viewport.east)] if viewport.crosses_antimeridian \
+            else [(viewport.west, viewport.east)]
+        first_row, last_row = self._row(viewport.south), self._row(viewport.north)
+
+        candidates = []
+        for west, east in spans:
+            first_column, last_column = self._column(west), self._column(east)
+            for row in range(int(first_row), int(last_row) + 1):
+                start = np.searchsorted(self._sorted_cells, row * self.columns + first_column, side='left')
+                end = np.searchsorted(self._sorted_cells, row * self.columns + last_column, side='right')
+                if end > start:
+                    candidates.append(self._order[start:end])
+        if not candidates:
+            return np.empty(0, dtype=np.intp)
+
+        points = np.concatenate(candidates)
+        latitude, longitude = self.latitude[points], self.longitude[points]
+        inside = (latitude >= viewport.south) & (latitude <= viewport.north)
+        if viewport.crosses_antimeridian:
+            inside &= (longitude >= viewport.west) | (longitude <= viewport.east)
+        else:
+            inside &= (longitude >= viewport.west) & (longitude <= viewport.east)
+        return np.sort(points[inside])
+
+def thin(points: np.ndarray, latitude: np.ndarray, longitude: np.ndarray, cell_degrees: float,
+         rank: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Keep at most one point per cell of the given size, e.g. to declutter a
+    zoomed-out map. Within a cell the point with the lowest rank wins, so the
+    same aircraft is kept from one update to the next.
+
+    Args:
+        points: Indices of candidate points
+        latitude: Latitudes of all points
+        longitude: Longitudes of all points
+        cell_degrees: Cell edge length in degrees
+        rank: Optional stable priority of every point (lower wins)
+
+    Returns:
+        Sorted indices of the kept points
+    """
+    if not len(points):
+        return points
+    if rank is not None:
+        points = points[np.argsort(rank[points], kind='stable')]
+    columns = int(math.ceil(360.0 / cell_degrees))
+    cells = (np.floor((latitude[points] + 90.0) / cell_degrees).astype(np.int64) * columns
+             + np.floor((longitude[points] + 180.0) / cell_degrees).astype(np.int64))
+    _, first = np.unique(cells, return_index=True)
+    return np.sort(points[first])
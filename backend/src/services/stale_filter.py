@@ -0,0 +1,73 @@
+from typing import Callable, Dict, Hashable, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar('T')
+
+class HighWaterMarks:
+    """
+    Newest provider timestamp seen per aircraft.
+
+    Updates that are not newer than the aircraft's high-water mark are
+    rejected, so merged providers and overlapping tiles can never move an
+    aircraft backwards in time. Updates without a timestamp are accepted.
+    """
+
+    def __init__(self):
+        self._marks: Dict[Hashable, float] = {}
+        self.accepted = 0
+        self.rejected = 0
+
+    def __len__(self) -> int:
+        return len(self._marks)
+
+    def get(self, key: Hashable) -> Optional[float]:
+        """Return the high-water mark of an aircraft, or None if unknown."""
+        return self._marks.get(key)
+
+    def accept(self, key: Hashable, timestamp: Optional[float]) -> bool:
+        """
+        Return True if an update is newer than the aircraft's mark, advancing the mark.
+
+        Args:
+            key: Aircraft identifier
+            timestamp: Provider timestamp of the update (epoch seconds)
+        """
+        if timestamp is None:
+            self.accepted += 1
+            return True
+        mark = self._marks.get(key)
+        if mark is not None and timestamp <= mark:
+            self.rejected += 1
+            return False
+        self._marks[key] = timestamp
+        self.accepted += 1
+        return True
+
+    def filter(self, records: Iterable[T], key: Callable[[T], Hashable],
+               timestamp: Callable[[T], Optional[float]]) -> Iterator[T]:
+        """
+        Yield only the records that are newer than their aircraft's mark.
+
+        Args:
+            records: Updates in arrival order
+            key: Function returning the aircraft identifier of a record
+            timestamp: Function returning the provider timestamp of a record
+        """
+        for record in records:
+            if self.accept(key(record), timestamp(record)):
+                yield record
+
+    def forget(self, key: Hashable):
+        """Drop the mark of an aircraft."""
+        self._marks.pop(key, None)
+
+    def forget_older_than(self, cutoff: float) -> int:
+        """
+        Drop marks older than the cutoff so the map does not grow forever.
+
+        Returns:
+            Number of marks dropped
+        """
+        stale = [key for key, mark in self._marks.items() if mark < cutoff]
+        for key in stale:
+            del self._marks[key]
+        return len(stale)
@@ -0,0 +1,142 @@
+import codecs
+import json
+import re
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Iterator, List, NamedTuple, Optional
+
+# Matches the start of the "states" array (or a null value) in a /states/all body
+_STATES_KEY = re.compile(r'"states"\s*:\s*(\[|null)')
+_WHITESPACE = ' \t\n\r'
+
+class StateVector(NamedTuple):
+    """Compact, immutable OpenSky state vector (field order follows the API)."""
+    icao24: str
+    callsign: Optional[str]
+    origin_country: Optional[str]
+    time_position: Optional[int]
+    last_contact: Optional[int]
+    longitude: Optional[float]
+    latitude: Optional[float]
+    baro_altitude: Optional[float]
+    on_ground: Optional[bool]
+    velocity: Optional[float]
+    heading: Optional[float]
+    vertical_rate: Optional[float]
+    sensors: Optional[List[int]]
+    geo_altitude: Optional[float]
+    squawk: Optional[str]
+    spi: Optional[bool]
+    position_source: Optional[int]
+
+_FIELD_COUNT = len(StateVector._fields)
+
+def _to_state_vector(state: List[Any]) -> StateVector:
+    # Extended responses carry an 18th "category" field; short rows are padded
+    values = state[:_FIELD_COUNT]
+    if len(values) < _FIELD_COUNT:
+        values = values + [None] * (_FIELD_COUNT - len(values))
+    callsign = values[1]
+    values[1] = callsign.strip() or None if callsign else None
+    return StateVector._make(values)
+
+class StateVectorDecoder:
+    """
+    Incremental decoder for the OpenSky /states/all response body.
+
+    Feed raw byte chunks as they arrive from the network; each call returns the
+    state vectors completed so far. Only the current partial state is buffered,
+    so the full payload never has to be held in memory or parsed into a tree.
+    """
+
+    def __init__(self):
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._buffer = ''
+        self._in_states = False
+        self.done = False
+
+    def feed(self, chunk: bytes) -> List[StateVector]:
+        """
+        Decode a chunk of the response body.
+
+        Args:
+            chunk: Next bytes of the response
+
+        Returns:
+            State vectors completed by this chunk
+        """
+        if self.done:
+            return []
+        self._buffer += self._text.decode(chunk)
+        
+        if not self._in_states:
+            match = _STATES_KEY.search(self._buffer)
+            if match is None:
+                # Keep enough of the tail to match a key split across chunks
+                self._buffer = self._buffer[-32:]
+                return []
+            if match.group(1) == 'null':
+                self.done = True
+                self._buffer = ''
+                return []
+            self._in_states = True
+            self._buffer = self._buffer[match.end():]
+        
+        return self._decode_states()
+
+    def _decode_states(self) -> List[StateVector]:
+        buffer = self._buffer
+        end = len(buffer)
+        position = 0
+        states = []
+        
+        while position < end:
+            char = buffer[position]
+            if char in _WHITESPACE or char == ',':
+                position += 1
+                continue
+            if char == ']':
+                self.done = True
+                position = end
+                break
+            try:
+                state, position = self._json.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The state is split across chunks; wait for more data
+                break
+            states.append(_to_state_vector(state))
+        
+        self._buffer = buffer[position:]
+        return states
+
+def iter_state_vectors(chunks: Iterable[bytes]) -> Iterator[StateVector]:
+    """
+    Lazily decode state vectors from an iterable of response body chunks.
+    
+    Args:
+        chunks: Byte chunks, e.g. requests' Response.iter_content()
+        
+    Yields:
+        StateVector records in response order
+    """
+    decoder = StateVectorDecoder()
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+        if decoder.done:
+            break
+
+async def aiter_state_vectors(chunks: AsyncIterable[bytes]) -> AsyncIterator[StateVector]:
+    """
+    Lazily decode state vectors from an async iterable of response body chunks.
+    
+    Args:
+        chunks: Byte chunks, e.g. httpx's Response.aiter_bytes()
+        
+    Yields:
+        StateVector records in response order
+    """
+    decoder = StateVectorDecoder()
+    async for chunk in chunks:
+        for state in decoder.feed(chunk):
+            yield state
+        if decoder.done:
+            break
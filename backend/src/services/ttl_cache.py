@@ -0,0 +1,110 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+class AsyncTTLCache:
+    """
+    In-process cache for upstream lookups with a time-to-live, LRU eviction and
+    single-flight request coalescing.
+
+    Concurrent get_or_fetch() calls for the same missing key share one upstream
+    request; the others wait for its result. Hit, miss and coalesced-wait
+    counters are kept for monitoring.
+    """
+
+    def __init__(self, ttl: float, max_size: int = 1024, cache_empty: bool = False,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            ttl: Seconds an entry stays fresh
+            max_size: Maximum number of entries before the least recently used is evicted
+            cache_empty: Whether falsy results (e.g. {} on upstream errors) are cached
+            clock: Monotonic time source
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.cache_empty = cache_empty
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the fresh value for key, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def get_stale(self, key: Hashable) -> Optional[Any]:
+        """Return the value for key even if expired, or None if never cached or evicted."""
+        entry = self._entries.get(key)
+        return None if entry is None else entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entries if full."""
+        self._entries[key] = (self.clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for key, fetching it once if missing or expired.
+
+        The fetch runs as a task shared by every caller for the key, each
+        awaiting it through a shield: a caller that is cancelled (e.g. its
+        client disconnected) neither cancels the fetch nor fails the others.
+
+        Args:
+            key: Cache key
+            fetch: Coroutine function performing the upstream lookup
+
+        Returns:
+            The cached or freshly fetched value
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        task = self._pending.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(fetch())
+            self._pending[key] = task
+            task.add_done_callback(lambda done: self._fetched(key, done))
+        return await asyncio.shield(task)
+
+    def _fetched(self, key: Hashable, task: asyncio.Future):
+        if self._pending.get(key) is task:
+            del self._pending[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        value = task.result()
+        if value or self.cache_empty:
+            self.set(key, value)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the cache counters."""
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+        }
@@ -1,40 +1,462 @@
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict, List, Any
+from typing import Callable, Deque, Dict, List, Any, Optional, Set
+from collections import deque
 import json
+import os
 import asyncio
+import zlib
 from datetime import datetime
 
+import numpy as np
+
+from ..services.spatial_index import DEFAULT_CELL_DEGREES, GridIndex, Viewport, thin, tile_degrees
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library encoder
+    orjson = None
+
+# Seconds a client may take to accept one message before it is dropped
+SEND_TIMEOUT_SECONDS = float(os.getenv('WS_SEND_TIMEOUT_SECONDS', 5))
+# Alerts waiting for one client before it is considered dead and dropped
+MAX_PENDING_ALERTS = int(os.getenv('WS_MAX_PENDING_ALERTS', 100))
+# A full keyframe replaces every this many delta frames
+KEYFRAME_INTERVAL = int(os.getenv('WS_KEYFRAME_INTERVAL', 12))
+# Viewports zoomed out below this level get one aircraft per cluster cell
+FULL_DETAIL_ZOOM = int(os.getenv('WS_FULL_DETAIL_ZOOM', 7))
+# Cell size of the spatial index over live traffic, in degrees
+SPATIAL_INDEX_CELL_DEGREES = float(os.getenv('SPATIAL_INDEX_CELL_DEGREES', DEFAULT_CELL_DEGREES))
+# Cluster cells per map tile edge when thinning a zoomed-out viewport
+CLUSTER_CELLS_PER_TILE = 8
+# Viewports are widened to multiples of this fraction of a tile, so clients
+# looking at nearly the same area share one stream
+VIEWPORT_SNAP_PER_TILE = 4
+MAX_ZOOM = 22
+
+# Placeholder in a client's position slot: send the current keyframe
+RESYNC = object()
+
+def encode_frame(data: Dict[str, Any]) -> bytes:
+    """
+    Serialize a frame to compact JSON bytes, with orjson when installed.
+    Values JSON cannot represent (e.g. datetimes with the fallback) are
+    converted with str().
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(data, separators=(',', ':'), default=str).encode('utf-8')
+
+class ClientChannel:
+    """
+    Outbound queue of one WebSocket client, drained by its own writer task.
+
+    Position frames are conflated: only one waits in the queue, so a
+    congested client skips intermediate updates instead of falling behind.
+    A delta cannot be skipped, so when a delta would replace a frame the
+    client has not received yet, the slot is marked for resync and the writer
+    sends the keyframe current at send time instead. Alert frames are never
+    dropped; they are queued in order and sent before any position frame. A
+    client that lets more than max_alerts pile up, or fails a send, is
+    reported through on_failure.
+    """
+
+    def __init__(self, websocket: WebSocket, send_timeout: float, max_alerts: int,
+                 on_failure: Callable[['ClientChannel'], None], keyframe: Callable[[], str]):
+        self.websocket = websocket
+        self.send_timeout = send_timeout
+        self.max_alerts = max_alerts
+        self.on_failure = on_failure
+        self.keyframe = keyframe
+        self.sent = 0
+        self.conflated = 0
+        self.resyncs = 0
+        self._position: Any = None
+        self._alerts: Deque[str] = deque()
+        self._ready = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    @property
+    def pending(self) -> int:
+        return len(self._alerts) + (self._position is not None)
+
+    def push_keyframe(self, frame: str):
+        if self._position is not None:
+            self.conflated += 1
+        self._position = frame
+        self._ready.set()
+
+    def push_delta(self, frame: str):
+        if self._position is None:
+            self._position = frame
+        else:
+            # The client would miss the pending frame's changes
+            self.conflated += 1
+            if self._position is not RESYNC:
+                self.resyncs += 1
+            self._position = RESYNC
+        self._ready.set()
+
+    def resync(self):
+        """Replace whatever position frame is pending with the current keyframe."""
+        self._position = RESYNC
+        self._ready.set()
+
+    def push_alert(self, frame: str) -> bool:
+        """Queue an alert; returns False if the client is too far behind to take it."""
+        if len(self._alerts) >= self.max_alerts:
+            return False
+        self._alerts.append(frame)
+        self._ready.set()
+        return True
+
+    async def _run(self):
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            while self._alerts or self._position is not None:
+                if self._alerts:
+                    frame = self._alerts.popleft()
+                else:
+                    frame, self._position = self._position, None
+                    if frame is RESYNC:
+                        frame = self.keyframe()
+                try:
+                    await asyncio.wait_for(self.websocket.send_text(frame), self.send_timeout)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    self.on_failure(self)
+                    return
+                self.sent += 1
+
+    def close(self):
+        """Stop the writer task; queued frames are discarded."""
+        self._task.cancel()
+
+def _flight_key(flight: Dict[str, Any]) -> Any:
+    return flight.get("id", flight.get("flight_id"))
+
+def _wrap_longitude(longitude: float) -> float:
+    return longitude if -180.0 <= longitude <= 180.0 else (longitude + 180.0) % 360.0 - 180.0
+
+class DeltaStream:
+    """
+    Delta-encoded state of one set of flights and the channels following it:
+    the fleet, or the aircraft inside one viewport. Each stream has its own
+    sequence numbers and keyframe, and encodes each frame once for all of
+    its channels.
+    """
+
+    def __init__(self, encode: Callable[[Dict[str, Any]], str], keyframe_interval: int,
+                 viewport: Optional[Viewport] = None):
+        self.encode = encode
+        self.keyframe_interval = keyframe_interval
+        self.viewport = viewport
+        self.channels: Dict[WebSocket, ClientChannel] = {}
+        self.flights: Dict[Any, Dict[str, Any]] = {}
+        self.timestamp: Optional[str] = None
+        self.sequence = 0
+        self._keyframe: Optional[str] = None
+        self._frames_since_keyframe = 0
+
+    def reset(self, flights: Dict[Any, Dict[str, Any]], timestamp: Optional[str]):
+        """Replace the state without a delta; clients get it with their next keyframe."""
+        self.flights = flights
+        self.timestamp = timestamp
+        self.sequence += 1
+        self._keyframe = None
+
+    def keyframe(self) -> str:
+        if self._keyframe is None:
+            frame = {
+                "type": "keyframe",
+                "seq": self.sequence,
+                "flights": list(self.flights.values()),
+                "timestamp": self.timestamp,
+            }
+            if self.viewport is not None:
+                frame["viewport"] = self.viewport._asdict()
+            self._keyframe = self.encode(frame)
+        return self._keyframe
+
+    def publish(self, flights: Dict[Any, Dict[str, Any]]) -> Optional[str]:
+        """
+        Send every channel the change from the current state to flights.
+
+        Returns:
+            "keyframe" or "delta" for the frame sent, or None if nothing changed
+        """
+        previous = self.flights
+        added = [flight for key, flight in flights.items() if key not in previous]
+        changed = [flight for key, flight in flights.items() if key in previous and previous[key] != flight]
+        removed = [key for key in previous if key not in flights]
+        if not (added or changed or removed) and self.sequence:
+            return None
+
+        self.flights = flights
+        self.timestamp = datetime.now().isoformat()
+        self.sequence += 1
+        self._keyframe = None
+        self._frames_since_keyframe += 1
+
+        # Encode once; every client's writer sends the same immutable payload,
+        # so a slow client only falls behind on its own queue
+        if self._frames_since_keyframe >= self.keyframe_interval:
+            self._frames_since_keyframe = 0
+            frame = self.keyframe()
+            for channel in list(self.channels.values()):
+                channel.push_keyframe(frame)
+            return "keyframe"
+
+        frame = self.encode({
+            "type": "delta",
+            "seq": self.sequence,
+            "added": added,
+            "changed": changed,
+            "removed": removed,
+            "timestamp": self.timestamp,
+        })
+        for channel in list(self.channels.values()):
+            channel.push_delta(frame)
+        return "delta"
+
 # Class to manage WebSocket connections
 class FlightTrackingManager:
-    def __init__(self):
+    """
+    Streams fleet positions and live traffic to WebSocket clients with a
+    delta protocol.
+
+    broadcast() receives the full fleet and sends each client only what
+    changed since the previous frame:
+
+        {"type": "delta", "seq": n, "added": [...], "changed": [...], "removed": [ids], "timestamp": ...}
+
+    A full {"type": "keyframe", "seq": n, "flights": [...], "timestamp": ...}
+    is sent on connect, every keyframe_interval frames, whenever a client's
+    queue had to skip a delta, and on request. A client applies a delta only
+    if its seq is one past the last frame it applied; otherwise it sends
+    "resync" and waits for the next keyframe.
+
+    A client that subscribes to a viewport leaves the fleet stream and
+    instead receives the live traffic inside its bounding box, with the same
+    protocol. broadcast_traffic() indexes the live traffic in a grid once per
+    update and answers every viewport from it. Viewports are snapped to a
+    fraction of a map tile, so clients with nearly the same view share one
+    stream and its encoded frames. Below full_detail_zoom a viewport keeps
+    one aircraft per cluster cell so zoomed-out maps are not flooded.
+    """
+
+    def __init__(self, send_timeout: float = SEND_TIMEOUT_SECONDS, max_pending_alerts: int = MAX_PENDING_ALERTS,
+                 keyframe_interval: int = KEYFRAME_INTERVAL, full_detail_zoom: int = FULL_DETAIL_ZOOM,
+                 cell_degrees: float = SPATIAL_INDEX_CELL_DEGREES):
         self.active_connections: List[WebSocket] = []
-        self.last_flight_data: Dict[str, Any] = {}
-    
+        self._channels: Dict[WebSocket, ClientChannel] = {}
+        self.send_timeout = send_timeout
+        self.max_pending_alerts = max_pending_alerts
+        self.keyframe_interval = keyframe_interval
+        self.full_detail_zoom = full_detail_zoom
+        self._fleet = DeltaStream(self._encode, keyframe_interval)
+        self._views: Dict[Viewport, DeltaStream] = {}
+        self._subscriptions: Dict[WebSocket, Viewport] = {}
+        self._index = GridIndex(cell_degrees)
+        self._traffic: List[Dict[str, Any]] = []
+        self._traffic_keys: List[Any] = []
+        self._traffic_rank = np.empty(0, dtype=np.int64)
+        self.dropped_connections = 0
+        self.frames_encoded = 0
+        self.keyframes_sent = 0
+        self.deltas_sent = 0
+        self._closing: Set[asyncio.Task] = set()
+
+    @property
+    def sequence(self) -> int:
+        return self._fleet.sequence
+
+    @property
+    def last_flight_data(self) -> Dict[str, Any]:
+        if not self._fleet.flights:
+            return {}
+        return {"flights": list(self._fleet.flights.values()), "timestamp": self._fleet.timestamp}
+
+    @last_flight_data.setter
+    def last_flight_data(self, data: Dict[str, Any]):
+        # A new baseline, e.g. restored from a snapshot; clients get it as a keyframe
+        self._fleet.reset({_flight_key(flight): flight for flight in data.get("flights", [])}, data.get("timestamp"))
+
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
         self.active_connections.append(websocket)
-        
-        # Send the current flight data to the new connection
-        if self.last_flight_data:
-            await websocket.send_json(self.last_flight_data)
-    
+        channel = ClientChannel(websocket, self.send_timeout, self.max_pending_alerts,
+                                self._on_channel_failure, self._fleet.keyframe)
+        self._channels[websocket] = channel
+        self._fleet.channels[websocket] = channel
+
+        # Start the new connection from the current state, even if empty, so
+        # it knows the sequence number the next delta follows
+        channel.resync()
+
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-    
+        # The socket may already have been dropped by its writer
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
+        channel = self._channels.pop(websocket, None)
+        if channel is not None:
+            self._leave(websocket)
+            channel.close()
+
+    def resync(self, websocket: WebSocket):
+        """Send a client the current keyframe, e.g. after it detected a sequence gap."""
+        channel = self._channels.get(websocket)
+        if channel is not None:
+            channel.resync()
+
+    def subscribe(self, websocket: WebSocket, south: float, west: float, north: float, east: float,
+                  zoom: int) -> Optional[Viewport]:
+        """
+        Stream a client only the live traffic inside a viewport, starting with
+        a keyframe of it. A west edge east of the east edge wraps the
+        antimeridian.
+
+        Returns:
+            The snapped viewport the client now follows, or None if it is not connected
+
+        Raises:
+            ValueError: If the bounds are not a valid bounding box
+        """
+        channel = self._channels.get(websocket)
+        if channel is None:
+            return None
+        if not (-90.0 <= south <= north <= 90.0) or not (np.isfinite(west) and np.isfinite(east)):
+            raise ValueError(f"Invalid viewport bounds: {south}, {west}, {north}, {east}")
+        zoom = int(min(max(zoom, 0), MAX_ZOOM))
+        if east - west >= 360.0:
+            west, east = -180.0, 180.0
+        viewport = Viewport(south, _wrap_longitude(west), north, _wrap_longitude(east), zoom)
+        viewport = viewport.snapped(tile_degrees(zoom) / VIEWPORT_SNAP_PER_TILE)
+
+        self._leave(websocket)
+        view = self._views.get(viewport)
+        if view is None:
+            view = DeltaStream(self._encode, self.keyframe_interval, viewport)
+            view.reset(self._visible(viewport), datetime.now().isoformat())
+            self._views[viewport] = view
+        view.channels[websocket] = channel
+        self._subscriptions[websocket] = viewport
+        channel.keyframe = view.keyframe
+        channel.resync()
+        return viewport
+
+    def unsubscribe(self, websocket: WebSocket):
+        """Return a client from its viewport to the fleet stream."""
+        channel = self._channels.get(websocket)
+        if channel is None or websocket not in self._subscriptions:
+            return
+        self._leave(websocket)
+        self._fleet.channels[websocket] = channel
+        channel.keyframe = self._fleet.keyframe
+        channel.resync()
+
+    def _leave(self, websocket: WebSocket):
+        """Remove a client from the stream it follows; unwatched viewports are discarded."""
+        viewport = self._subscriptions.pop(websocket, None)
+        if viewport is None:
+            self._fleet.channels.pop(websocket, None)
+            return
+        view = self._views[viewport]
+        view.channels.pop(websocket, None)
+        if not view.channels:
+            del self._views[viewport]
+
+    def _visible(self, viewport: Viewport) -> Dict[Any, Dict[str, Any]]:
+        points = self._index.query(viewport)
+        if viewport.zoom < self.full_detail_zoom:
+            points = thin(points, self._index.latitude, self._index.longitude,
+                          tile_degrees(viewport.zoom) / CLUSTER_CELLS_PER_TILE, self._traffic_rank)
+        return {self._traffic_keys[point]: self._traffic[point] for point in points}
+
+    def _encode(self, data: Dict[str, Any]) -> str:
+        self.frames_encoded += 1
+        # Text frames carry str, so decode the encoded bytes once per frame
+        return encode_frame(data).decode('utf-8')
+
+    def _count(self, sent: Optional[str]):
+        if sent == "keyframe":
+            self.keyframes_sent += 1
+        elif sent == "delta":
+            self.deltas_sent += 1
+
+    def _on_channel_failure(self, channel: ClientChannel):
+        if self._channels.get(channel.websocket) is channel:
+            self._drop(channel.websocket)
+
+    def _drop(self, websocket: WebSocket):
+        self.disconnect(websocket)
+        self.dropped_connections += 1
+        # A send cut off by the timeout leaves the stream mid-frame, so close
+        # the socket in the background and let the client reconnect
+        task = asyncio.create_task(self._close(websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(websocket.close(), self.send_timeout)
+        except Exception:
+            pass
+
     async def broadcast(self, data: Dict[str, Any]):
-        # Update the last flight data
-        self.last_flight_data = data
-        
-        # Add timestamp
-        data["timestamp"] = datetime.now().isoformat()
-        
-        # Broadcast to all connected clients
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(data)
-            except Exception:
-                # Remove any connections that fail
-                self.active_connections.remove(connection)
+        """
+        Send the change from the previous fleet state to data["flights"] (the
+        full fleet) to every client following the fleet; nothing is sent if
+        nothing changed.
+        """
+        flights = {_flight_key(flight): flight for flight in data.get("flights", [])}
+        self._count(self._fleet.publish(flights))
+
+    async def broadcast_traffic(self, flights: Optional[List[Dict[str, Any]]]):
+        """
+        Index the live traffic (FlightResponse-shaped dicts with latitude and
+        longitude) and send every subscribed viewport the change in the
+        aircraft inside it.
+        """
+        self._traffic = list(flights or [])
+        self._traffic_keys = [_flight_key(flight) for flight in self._traffic]
+        self._index.build(
+            np.array([flight.get("latitude") for flight in self._traffic], dtype=float),
+            np.array([flight.get("longitude") for flight in self._traffic], dtype=float),
+        )
+        # A stable per-aircraft priority keeps the same aircraft in a thinned cell
+        self._traffic_rank = np.array([zlib.crc32(str(key).encode('utf-8')) for key in self._traffic_keys],
+                                      dtype=np.int64)
+        for viewport, view in list(self._views.items()):
+            self._count(view.publish(self._visible(viewport)))
+
+    async def broadcast_alert(self, alert: Dict[str, Any]):
+        """
+        Queue an alert for every client. Alerts are not conflated; a client
+        too far behind to take one is dropped so it reconnects and resyncs.
+        """
+        frame = self._encode({"type": "alert", "alert": alert, "timestamp": datetime.now().isoformat()})
+        for channel in list(self._channels.values()):
+            if not channel.push_alert(frame):
+                self._drop(channel.websocket)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Connection, queue and protocol counters of this worker."""
+        return {
+            'connections': len(self._channels),
+            'dropped_connections': self.dropped_connections,
+            'sequence': self.sequence,
+            'frames_encoded': self.frames_encoded,
+            'keyframes_sent': self.keyframes_sent,
+            'deltas_sent': self.deltas_sent,
+            'pending_frames': sum(channel.pending for channel in self._channels.values()),
+            'conflated_frames': sum(channel.conflated for channel in self._channels.values()),
+            'resyncs': sum(channel.resyncs for channel in self._channels.values()),
+            'viewport_subscriptions': len(self._subscriptions),
+            'viewport_streams': len(self._views),
+            'indexed_aircraft': len(self._index),
+        }
 
 # Create a global instance of the manager
-flight_manager = FlightTrackingManager() 
\ No newline at end of file
+flight_manager = FlightTrackingManager()
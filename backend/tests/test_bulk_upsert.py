@@ -0,0 +1,132 @@
+import pytest
+from sqlalchemy import create_engine, event, Column, Integer, String, Float, DateTime, UniqueConstraint
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker
+
+from src.services.bulk_upsert import bulk_upsert, UpsertResult
+
+Base = declarative_base()
+
+class StateRow(Base):
+    __tablename__ = 'state_rows'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    icao24 = Column(String, unique=True, nullable=False)
+    callsign = Column(String, nullable=True)
+    latitude = Column(Float, nullable=True)
+    last_contact = Column(Integer, nullable=True)
+    updated_at = Column(DateTime, nullable=True)
+
+class ScheduleRow(Base):
+    __tablename__ = 'schedule_rows'
+    __table_args__ = (UniqueConstraint('flight_number', 'departure_time'),)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    flight_number = Column(String, nullable=False)
+    departure_time = Column(String, nullable=False)
+    status = Column(String, nullable=True)
+
+@pytest.fixture
+def db():
+    """Create an in-memory SQLite session and count executed statements."""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: session.statements.append(args[2]))
+    yield session
+    session.close()
+
+def test_bulk_upsert_inserts_new_rows(db):
+    """Test that new rows are inserted and reported."""
+    rows = [{'icao24': f'abc{i}', 'callsign': f'CS{i}', 'latitude': float(i)} for i in range(5)]
+
+    result = bulk_upsert(db, StateRow, rows, key_columns=['icao24'])
+    db.commit()
+
+    assert result == UpsertResult(inserted=5, updated=0)
+    assert db.query(StateRow).count() == 5
+
+def test_bulk_upsert_updates_existing_rows(db):
+    """Test that existing rows are updated in place."""
+    bulk_upsert(db, StateRow, [{'icao24': 'abc1', 'callsign': 'OLD', 'latitude': 1.0}], key_columns=['icao24'])
+    db.commit()
+
+    rows = [
+        {'icao24': 'abc1', 'callsign': 'NEW', 'latitude': 2.0},
+        {'icao24': 'abc2', 'callsign': 'OTHER', 'latitude': 3.0},
+    ]
+    result = bulk_upsert(db, StateRow, rows, key_columns=['icao24'])
+    db.commit()
+
+    assert result == UpsertResult(inserted=1, updated=1)
+    updated = db.query(StateRow).filter_by(icao24='abc1').one()
+    assert updated.callsign == 'NEW'
+    assert updated.latitude == 2.0
+    assert updated.updated_at is not None
+
+def test_bulk_upsert_uses_constant_statements_per_batch(db):
+    """Test that a batch costs a lookup and a write rather than a query per row."""
+    rows = [{'icao24': f'abc{i}', 'latitude': float(i)} for i in range(250)]
+
+    result = bulk_upsert(db, StateRow, rows, key_columns=['icao24'], batch_size=100)
+
+    assert result.inserted == 250
+    selects = [s for s in db.statements if s.lstrip().upper().startswith('SELECT')]
+    assert len(selects) == 3
+
+def test_bulk_upsert_ignores_unknown_columns_and_duplicates(db):
+    """Test that unknown keys are dropped and duplicate keys are collapsed."""
+    rows = [
+        {'icao24': 'abc1', 'latitude': 1.0, 'not_a_column': 'x'},
+        {'icao24': 'abc1', 'latitude': 5.0, 'not_a_column': 'y'},
+    ]
+
+    result = bulk_upsert(db, StateRow, rows, key_columns=['icao24'])
+    db.commit()
+
+    assert result == UpsertResult(inserted=1, updated=0)
+    assert db.query(StateRow).one().latitude == 5.0
+
+def test_bulk_upsert_composite_key(db):
+    """Test upserting on a composite natural key."""
+    bulk_upsert(db, ScheduleRow, [
+        {'flight_number': 'AA1', 'departure_time': '2024-03-01T10:00', 'status': 'Scheduled'},
+    ], key_columns=['flight_number', 'departure_time'])
+
+    result = bulk_upsert(db, ScheduleRow, [
+        {'flight_number': 'AA1', 'departure_time': '2024-03-01T10:00', 'status': 'Completed'},
+        {'flight_number': 'AA1', 'departure_time': '2024-03-02T10:00', 'status': 'Scheduled'},
+    ], key_columns=['flight_number', 'departure_time'])
+    db.commit()
+
+    assert result == UpsertResult(inserted=1, updated=1)
+    assert db.query(ScheduleRow).count() == 2
+
+def test_bulk_upsert_empty_rows(db):
+    """Test that an empty input writes nothing."""
+    assert bulk_upsert(db, StateRow, [], key_columns=['icao24']) == UpsertResult()
+
+def test_bulk_upsert_rejects_unsupported_dialects(db, monkeypatch):
+    """Test that dialects without ON CONFLICT support raise a ValueError."""
+    monkeypatch.setattr(db.get_bind().dialect, 'name', 'mssql')
+    with pytest.raises(ValueError):
+        bulk_upsert(db, StateRow, [{'icao24': 'abc1'}], key_columns=['icao24'])
+
+def test_bulk_upsert_skips_stale_versions(db):
+    """Test that rows are only overwritten by a newer version, in the database and within a batch."""
+    bulk_upsert(db, StateRow, [
+        {'icao24': 'abc1', 'latitude': 1.0, 'last_contact': 100},
+        {'icao24': 'abc2', 'latitude': 2.0, 'last_contact': 100},
+    ], key_columns=['icao24'], version_column='last_contact')
+    db.commit()
+
+    result = bulk_upsert(db, StateRow, [
+        {'icao24': 'abc1', 'latitude': 9.0, 'last_contact': 90},
+        {'icao24': 'abc2', 'latitude': 3.0, 'last_contact': 110},
+        {'icao24': 'abc2', 'latitude': 0.0, 'last_contact': 105},
+        {'icao24': 'abc3', 'latitude': 4.0, 'last_contact': 100},
+    ], key_columns=['icao24'], version_column='last_contact')
+    db.commit()
+
+    assert result == UpsertResult(inserted=1, updated=1, stale=2)
+    latitudes = {row.icao24: row.latitude for row in db.query(StateRow)}
+    assert latitudes == {'abc1': 1.0, 'abc2': 3.0, 'abc3': 4.0}
@@ -0,0 +1,44 @@
+from unittest.mock import MagicMock
+
+from src.services.change_detector import ChangeDetector, distance_meters
+from src.services.flight_update_service import update_flights_from_api
+
+BASE = {'latitude': 40.0, 'longitude': -3.0, 'altitude': 30000, 'speed': 400, 'heading': 359, 'status': 'en-route'}
+
+def test_distance_meters():
+    """Test the haversine distance for one degree of latitude."""
+    assert abs(distance_meters(40.0, -3.0, 41.0, -3.0) - 111195) < 10
+
+def test_small_changes_are_suppressed_until_a_threshold_is_crossed():
+    """Test movement, altitude, heading and status thresholds."""
+    detector = ChangeDetector(min_distance_meters=200, min_altitude_feet=100, min_heading_degrees=3)
+
+    assert detector.check('F1', BASE, now=0)
+    assert not detector.check('F1', dict(BASE, latitude=40.001, altitude=30050, heading=1), now=10)
+    assert detector.check('F1', dict(BASE, latitude=40.003), now=20)
+    assert detector.check('F1', dict(BASE, latitude=40.003, status='landed'), now=30)
+    # Heading wraps around north
+    assert not detector.is_significant(dict(BASE, heading=359), dict(BASE, heading=1))
+    assert detector.is_significant(dict(BASE, heading=359), dict(BASE, heading=5))
+
+def test_stationary_flight_is_written_after_max_silence():
+    """Test the time threshold and forgetting state."""
+    detector = ChangeDetector(max_silence_seconds=60)
+
+    assert detector.check('F1', BASE, now=0)
+    assert not detector.check('F1', BASE, now=59)
+    assert detector.check('F1', BASE, now=60)
+    assert detector.forget_older_than(100) == 1
+    assert detector.check('F1', BASE, now=101)
+
+def test_update_flights_from_api_skips_unchanged_flights():
+    """Test that only fleet flights with meaningful changes are modified and returned."""
+    detector = ChangeDetector()
+    flight = MagicMock(id=1, flight_id='F1', tail_number='EC-ABC')
+    live = [dict(BASE, flight_id='F1', tail_number='EC-ABC')]
+
+    assert update_flights_from_api([flight], live, MagicMock(), detector) == [flight]
+    flight.reset_mock()
+    flight.current_position_lat = None
+    assert update_flights_from_api([flight], live, MagicMock(), detector) == []
+    assert flight.current_position_lat is None
@@ -0,0 +1,99 @@
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+from src.services import flight_data_service
+from src.services.credit_budget import ADHOC, FLEET, FLIGHT_DETAILS, LIVE_POSITIONS, CreditBudget, parse_weights
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_consumer_shares_protect_fleet_tracking():
+    """Test that ad-hoc lookups cannot spend the credits reserved for the fleet."""
+    budget = CreditBudget(limit=10, window_seconds=3600, shares={FLEET: 0.7, ADHOC: 0.3},
+                          costs={FLIGHT_DETAILS: 2}, clock=FakeClock())
+
+    assert budget.try_spend(FLIGHT_DETAILS, ADHOC)
+    assert not budget.try_spend(FLIGHT_DETAILS, ADHOC)
+    assert budget.try_spend(LIVE_POSITIONS, ADHOC)
+    assert budget.try_spend(LIVE_POSITIONS, FLEET, requests=7)
+    assert not budget.try_spend(LIVE_POSITIONS, FLEET)
+
+    stats = budget.stats()
+    assert stats['spent'] == 10
+    assert stats['spent_by_endpoint'] == {FLIGHT_DETAILS: 2, LIVE_POSITIONS: 8}
+    assert stats['denied_by_consumer'] == {ADHOC: 1, FLEET: 1}
+    assert stats['remaining'] == 0
+
+def test_window_reset_and_unlimited_budget():
+    """Test that credits come back in the next window and no limit allows everything."""
+    clock = FakeClock()
+    budget = CreditBudget(limit=1, window_seconds=3600, clock=clock)
+    assert budget.try_spend(LIVE_POSITIONS, 'competitor-tracking')
+    assert not budget.try_spend(LIVE_POSITIONS, 'competitor-tracking')
+
+    clock.now += 3600
+    assert budget.remaining() == 1
+    assert budget.try_spend(LIVE_POSITIONS, 'competitor-tracking')
+
+    unlimited = CreditBudget(clock=clock)
+    assert all(unlimited.try_spend(LIVE_POSITIONS, ADHOC) for _ in range(1000))
+    assert unlimited.remaining(ADHOC) is None and unlimited.spent == 1000
+
+def test_budget_state_is_shared_through_its_file(tmp_path):
+    """Test that restarts and other workers draw from the same credits."""
+    clock = FakeClock()
+    path = str(tmp_path / 'credits.json')
+    worker = CreditBudget(limit=3, window_seconds=3600, shares={}, clock=clock, state_path=path)
+    other_worker = CreditBudget(limit=3, window_seconds=3600, shares={}, clock=clock, state_path=path)
+
+    assert worker.try_spend(LIVE_POSITIONS, FLEET, requests=2)
+    assert other_worker.try_spend(LIVE_POSITIONS, ADHOC)
+    assert not worker.try_spend(LIVE_POSITIONS, FLEET)
+
+    restarted = CreditBudget(limit=3, window_seconds=3600, shares={}, clock=clock, state_path=path)
+    assert restarted.remaining() == 0
+    # Reading the accounting does not rewrite the file
+    os.utime(path, (0, 0))
+    assert restarted.stats()['spent_by_consumer'] == {FLEET: 2, ADHOC: 1}
+    assert os.stat(path).st_mtime == 0
+
+@pytest.mark.asyncio
+async def test_async_charges_share_the_state_file(tmp_path):
+    """Test that charges made from the event loop reach the shared accounting."""
+    path = str(tmp_path / 'credits.json')
+    budget = CreditBudget(limit=1, window_seconds=3600, shares={}, clock=FakeClock(), state_path=path)
+
+    assert await budget.try_spend_async(LIVE_POSITIONS, FLEET)
+    assert not await budget.try_spend_async(LIVE_POSITIONS, FLEET)
+    assert CreditBudget(limit=1, window_seconds=3600, shares={}, clock=FakeClock(), state_path=path).remaining() == 0
+
+def test_parse_weights():
+    assert parse_weights('fleet:0.6, adhoc:0.4') == {'fleet': 0.6, 'adhoc': 0.4}
+    with pytest.raises(ValueError):
+        parse_weights('fleet')
+
+def test_degraded_live_flights_are_extrapolated(monkeypatch):
+    """Test that exhausted budgets fall back to the shared snapshot projected to now."""
+    reported_at = datetime(2024, 1, 1, 12, 0, 0)
+    snapshot = [
+        {'flight_id': 'A', 'latitude': 10.0, 'longitude': 20.0, 'speed': 360, 'heading': 0,
+         'last_updated': reported_at.isoformat()},
+        {'flight_id': 'B', 'latitude': 60.0, 'longitude': 20.0, 'speed': None, 'heading': None,
+         'last_updated': reported_at.isoformat()},
+    ]
+    monkeypatch.setattr(flight_data_service.live_traffic_reader, 'read_json', lambda: snapshot)
+    now = datetime(2024, 1, 1, 12, 10, 0, tzinfo=timezone.utc).timestamp()
+
+    flights = flight_data_service.degraded_live_flights('0,30,0,30', now=now)
+
+    assert [flight['flight_id'] for flight in flights] == ['A']
+    # 360 knots for ten minutes is one degree of latitude
+    assert flights[0]['latitude'] == pytest.approx(11.0, abs=0.01)
+    assert snapshot[0]['latitude'] == 10.0
+    assert flight_data_service.degraded_live_flights(flight_id='B', now=now)[0]['latitude'] == pytest.approx(60.0)
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+
+from src.services.dead_reckoning import DeadReckoningEngine, dead_reckon, decay_confidence
+from src.services import flight_update_service
+
+def test_dead_reckon_moves_along_heading():
+    """Test that one hour at 60 knots due north moves one degree of latitude."""
+    lat, lon = dead_reckon(np.array([0.0, 10.0]), np.array([0.0, 20.0]), np.array([60.0, np.nan]),
+                           np.array([0.0, 90.0]), np.array([3600.0, 3600.0]))
+
+    assert lat[0] == pytest.approx(1.0, abs=1e-3)
+    assert lon[0] == pytest.approx(0.0, abs=1e-9)
+    # Unknown speed leaves the position unchanged
+    assert (lat[1], lon[1]) == pytest.approx((10.0, 20.0))
+
+def test_confidence_decays_with_age():
+    """Test the exponential confidence decay."""
+    confidence = decay_confidence(np.array([0.0, 60.0, 120.0]), half_life=60)
+    assert confidence.tolist() == pytest.approx([1.0, 0.5, 0.25])
+
+def test_engine_projects_and_caps_extrapolation():
+    """Test projection of several aircraft, the extrapolation cap and forgetting."""
+    engine = DeadReckoningEngine(half_life=60, max_extrapolation=1800, capacity=1, clock=lambda: 0)
+    engine.record_fix('A', 0.0, 0.0, speed=60, heading=90, timestamp=0)
+    engine.record_fix('B', 0.0, 0.0, speed=60, heading=0, timestamp=0)
+
+    projections = engine.project(['A', 'B', 'missing'], now=7200)
+
+    assert set(projections) == {'A', 'B'}
+    assert projections['A'].longitude == pytest.approx(0.5, abs=1e-3)
+    assert projections['B'].latitude == pytest.approx(0.5, abs=1e-3)
+    assert projections['B'].confidence == pytest.approx(2 ** -120)
+    assert engine.forget('A')
+    keys, lat, _, _ = engine.project_all(now=3600)
+    assert keys == ['B'] and lat[0] == pytest.approx(0.5, abs=1e-3)
+
+def test_flights_without_live_data_are_extrapolated(monkeypatch):
+    """Test that update_flights_from_api projects flights missing from the live data."""
+    engine = DeadReckoningEngine()
+    monkeypatch.setattr(flight_update_service, 'dead_reckoning', engine)
+    flight = MagicMock(id=7, flight_id='F7', tail_number='EC-XYZ', current_position_lat=0.0,
+                       current_position_lon=0.0, speed=60, heading=0, updated_at=None)
+    engine.record_fix(7, 0.0, 0.0, 60, 0, timestamp=0)
+
+    updated = flight_update_service.extrapolate_flight_positions([flight], now=60)
+
+    assert updated == [flight]
+    assert flight.current_position_lat == pytest.approx(1 / 60, abs=1e-4)
+
+def test_fleet_flight_that_stops_reporting_is_projected_from_its_provider_fix(monkeypatch):
+    """Test that fixes keep the provider time, so silence is noticed and extrapolated."""
+    engine = DeadReckoningEngine()
+    clock = [1010.0]
+    monkeypatch.setattr(flight_update_service, 'dead_reckoning', engine)
+    monkeypatch.setattr(flight_update_service.time, 'time', lambda: clock[0])
+    monkeypatch.setattr(flight_update_service, 'fleet_fix_keys', {('flight_id', 'F7'): 7})
+    flight = MagicMock(id=7, flight_id='F7', tail_number='EC-XYZ', updated_at=None)
+    report = {'flight_id': 'F7', 'latitude': 0.0, 'longitude': 0.0, 'speed': 60, 'heading': 0, 'timestamp': 1000.0}
+
+    flight_update_service.record_fleet_fixes([report])
+    assert flight_update_service.update_flights_from_api([flight], [report], MagicMock()) == [flight]
+    assert flight.current_position_lat == 0.0
+
+    # Reported recently: left alone
+    clock[0] = 1030.0
+    assert flight_update_service.update_flights_from_api([flight], [], MagicMock()) == []
+
+    # Silent for 500 s: projected from the fix taken at the provider time
+    clock[0] = 1500.0
+    assert flight_update_service.update_flights_from_api([flight], [], MagicMock()) == [flight]
+    assert flight.current_position_lat == pytest.approx(500 / 3600, abs=1e-3)
+    assert engine.confidence(7, now=1500.0) == pytest.approx(0.5 ** (500 / 120), abs=1e-6)
@@ -0,0 +1,53 @@
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.routers import flight_data
+from src.services.credit_budget import CreditBudget
+from src.services.flight_data_service import FlightDataService
+
+FLIGHT = {
+    'flight_id': 'ABC123', 'callsign': 'TEST123', 'registration': 'N123AB', 'aircraft_type': 'B738',
+    'latitude': 40.7, 'longitude': -74.0, 'altitude': 30000, 'speed': 500, 'heading': 90, 'status': 'active',
+    'departure_airport': 'KJFK', 'arrival_airport': 'KLAX', 'airline': 'Test Airlines',
+    'last_updated': '2024-01-01T12:00:00',
+}
+
+def client_for(service: FlightDataService) -> TestClient:
+    app = FastAPI()
+    app.include_router(flight_data.router)
+    app.dependency_overrides[flight_data.get_flight_service] = lambda: service
+    return TestClient(app)
+
+def test_live_flights_route_returns_bounded_and_tiled_flights(monkeypatch):
+    """Test that the parsed flights of the async client reach the response, tiled or not."""
+    monkeypatch.setenv('FLIGHTRADAR_API_KEY', 'real-key')
+    async_client = MagicMock()
+    async_client.get_live_flights = AsyncMock(return_value=[FLIGHT])
+    async_client.get_live_flights_tiled = AsyncMock(return_value=[FLIGHT])
+    service = FlightDataService(fr24_client=MagicMock(), async_client=async_client, budget=CreditBudget(limit=None))
+    client = client_for(service)
+
+    for params in ({'bounds': '50,46,14,22'}, {'bounds': '50,46,14,22', 'tiled': 'true'}):
+        response = client.get('/api/flights/live', params=params)
+        assert response.status_code == 200
+        assert [flight['flight_id'] for flight in response.json()] == ['ABC123']
+    async_client.get_live_flights_tiled.assert_awaited_once_with('50,46,14,22')
+
+def test_exhausted_budget_is_reported_as_429_not_as_a_missing_flight(monkeypatch):
+    """Test that a denied lookup is distinguishable from a flight that does not exist."""
+    monkeypatch.setenv('FLIGHTRADAR_API_KEY', 'real-key')
+    async_client = MagicMock()
+    async_client.historical_cache.get = MagicMock(return_value=None)
+    async_client.fetch_historical_flight = AsyncMock(return_value={'flight_id': 'ABC123'})
+    budget = CreditBudget(limit=1, shares={})
+    client = client_for(FlightDataService(fr24_client=MagicMock(), async_client=async_client, budget=budget))
+
+    assert client.get('/api/flights/historical/ABC123', params={'date': '2024-01-01'}).status_code == 200
+    response = client.get('/api/flights/historical/ABC123', params={'date': '2024-01-01'})
+
+    assert response.status_code == 429
+    # One disk cache read per lookup, and the client does not read it again
+    assert async_client.historical_cache.get.call_count == 2
+    async_client.fetch_historical_flight.assert_awaited_once()
@@ -0,0 +1,109 @@
+import asyncio
+import pytest
+
+from src.services.flight_fusion import (
+    FlightFusionEngine,
+    FusionSource,
+    FusedFlight,
+    build_sources,
+    merge_flights,
+    normalize_fr24,
+    normalize_flightradar,
+    normalize_opensky,
+    to_live_record,
+)
+from src.services.state_vector_decoder import StateVector
+
+PRIORITIES = {'fr24': 3, 'flightradar': 2, 'opensky': 1}
+
+def _state(callsign, time_position, latitude):
+    return StateVector('abc123', callsign, 'Spain', time_position, time_position, -3.7, latitude,
+                       1000.0, False, 100.0, 90.0, 0.0, None, 1000.0, None, False, 0)
+
+def test_normalizers_share_one_schema():
+    """Test that every provider maps onto the same record and units."""
+    opensky = normalize_opensky(_state('EAM01 ', 1000, 40.4), fetched_at=2000)
+    flightradar = normalize_flightradar({'flight_id': 'F1', 'callsign': 'eam01', 'tail_number': 'EC-ABC', 'origin': 'MAD'}, fetched_at=2000)
+    fr24 = normalize_fr24({'flight_id': 'F2', 'callsign': 'EAM01', 'registration': 'EC-ABC', 'departure_airport': 'MAD',
+                           'timestamp': '1970-01-01T00:25:00Z', 'last_updated': '1970-01-01T00:33:00'}, fetched_at=2000)
+
+    assert opensky.key == flightradar.key == fr24.key == 'EAM01'
+    assert opensky.altitude == pytest.approx(3280.84)
+    assert opensky.speed == pytest.approx(194.3844)
+    assert opensky.timestamp == 1000
+    assert flightradar.registration == fr24.registration == 'EC-ABC'
+    assert flightradar.origin == fr24.origin == 'MAD'
+    assert fr24.timestamp == 1500
+
+def test_merge_prefers_freshest_then_priority():
+    """Test conflict resolution by timestamp, then source priority."""
+    records = [
+        FusedFlight('K1', 'opensky', 100.0, latitude=1.0, icao24='abc'),
+        FusedFlight('K1', 'fr24', 50.0, latitude=2.0, registration='EC-ABC'),
+        FusedFlight('K2', 'opensky', 100.0, latitude=3.0),
+        FusedFlight('K2', 'fr24', 98.0, latitude=4.0),
+    ]
+
+    merged = merge_flights(records, PRIORITIES, tie_window=5.0)
+
+    assert merged['K1'].source == 'opensky'
+    assert merged['K1'].latitude == 1.0
+    assert merged['K1'].registration == 'EC-ABC'
+    assert merged['K2'].source == 'fr24'
+    assert merged['K2'].latitude == 4.0
+
+@pytest.mark.asyncio
+async def test_slow_and_failing_providers_do_not_delay_snapshot():
+    """Test that the snapshot is built from the providers that answered in time."""
+    async def fast():
+        return [_state('FAST1', 1000, 40.0)]
+
+    async def slow():
+        await asyncio.sleep(10)
+        return []
+
+    async def failing():
+        raise RuntimeError("provider down")
+
+    engine = FlightFusionEngine([
+        FusionSource('opensky', 1, fast, normalize_opensky),
+        FusionSource('fr24', 3, slow, normalize_fr24),
+        FusionSource('flightradar', 2, failing, normalize_flightradar),
+    ], timeout=0.05)
+
+    snapshot = await asyncio.wait_for(engine.snapshot(), timeout=1)
+    await engine.aclose()
+
+    assert list(snapshot) == ['FAST1']
+
+@pytest.mark.asyncio
+async def test_bounded_sources_skip_providers_that_may_not_be_called():
+    """Test that each provider gets the region in its own bounds format and the allow check gates fetches."""
+    calls = []
+
+    class Client:
+        def __init__(self, name):
+            self.name = name
+
+        async def get_live_flights(self, bounds=None):
+            calls.append((self.name, bounds))
+            return [{'flight_id': 'F1', 'callsign': 'EAM01', 'timestamp': 1000}]
+
+        get_state_vectors = get_live_flights
+
+    async def allow(name):
+        return name != 'fr24'
+
+    sources = build_sources(opensky_client=Client('opensky'), flightradar_client=Client('flightradar'),
+                            fr24_client=Client('fr24'), bounds=(36.0, -10.0, 44.0, 4.0), allow=allow)
+    results = {source.name: await source.fetch() for source in sources}
+
+    assert calls == [('opensky', (36.0, -10.0, 44.0, 4.0)), ('flightradar', (36.0, -10.0, 44.0, 4.0))]
+    assert results['fr24'] == []
+
+def test_live_record_is_keyed_by_fusion_key_with_position_time():
+    record = to_live_record(FusedFlight('EAM01', 'opensky', 1000.0, flight_id='abc123', registration='EC-ABC', latitude=40.0))
+
+    assert record['flight_id'] == 'EAM01'
+    assert record['tail_number'] == 'EC-ABC'
+    assert record['timestamp'] == 1000.0 and record['source'] == 'opensky'
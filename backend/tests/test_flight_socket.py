@@ -0,0 +1,254 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+import src.routers.websockets as route
+from src.websockets.flight_socket import FlightTrackingManager
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.sent = []
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("connection reset")
+        self.sent.append(data)
+
+    async def close(self):
+        self.closed = True
+
+@pytest.mark.asyncio
+async def test_failed_and_slow_clients_are_dropped_without_skipping_others():
+    """Test that dead sockets are removed and every healthy client still receives the update."""
+    manager = FlightTrackingManager(send_timeout=0.05)
+    healthy = [FakeWebSocket() for _ in range(3)]
+    broken = FakeWebSocket(fail=True)
+    stuck = FakeWebSocket(delay=10)
+    for websocket in (healthy[0], broken, healthy[1], stuck, healthy[2]):
+        await manager.connect(websocket)
+
+    await manager.broadcast({'flights': [{'id': 1}]})
+    # Let the writers time out and the background close tasks run
+    await asyncio.sleep(0.1)
+
+    # Connecting queued a keyframe; the delta that followed replaced it by the newer keyframe
+    assert all(len(websocket.sent) == 1 for websocket in healthy)
+    assert manager.active_connections == healthy
+    assert manager.dropped_connections == 2
+    assert broken.closed and stuck.closed
+
+    # Disconnecting a socket that was already dropped is harmless
+    manager.disconnect(broken)
+
+@pytest.mark.asyncio
+async def test_broadcast_time_does_not_grow_with_clients():
+    """Test that each client has its own writer, so 50 clients take about as long as one."""
+    manager = FlightTrackingManager(send_timeout=1)
+    for _ in range(50):
+        await manager.connect(FakeWebSocket(delay=0.02))
+
+    started = time.perf_counter()
+    await manager.broadcast({'flights': []})
+
+    await asyncio.sleep(0.05)
+
+    assert time.perf_counter() - started < 0.5
+    assert len(manager.active_connections) == 50
+    assert manager.metrics()['pending_frames'] == 0
+
+def key(flight):
+    return flight.get('id', flight.get('flight_id'))
+
+def apply_frames(frames):
+    """Replay frames the way a client does; returns (flights by id, applied seqs)."""
+    flights, applied = None, []
+    for frame in map(json.loads, frames):
+        if frame.get('type') == 'keyframe':
+            flights = {key(flight): flight for flight in frame['flights']}
+        elif frame.get('type') == 'delta':
+            assert flights is not None and frame['seq'] == applied[-1] + 1, "sequence gap"
+            for flight in frame['added'] + frame['changed']:
+                flights[key(flight)] = flight
+            for flight_id in frame['removed']:
+                del flights[flight_id]
+        else:
+            continue
+        applied.append(frame['seq'])
+    return flights, applied
+
+def fleet(count, moved=(), speed=100):
+    return {'flights': [
+        {'id': flight_id, 'lat': 1.0 + (flight_id in moved), 'speed': speed if flight_id in moved else 0}
+        for flight_id in range(count)
+    ]}
+
+@pytest.mark.asyncio
+async def test_deltas_carry_only_changes_and_are_encoded_once():
+    """Test that a mostly stationary fleet produces small deltas sent identically to every client."""
+    manager = FlightTrackingManager(keyframe_interval=100)
+    manager.last_flight_data = fleet(500)
+    clients = [FakeWebSocket() for _ in range(20)]
+    for websocket in clients:
+        await manager.connect(websocket)
+    await asyncio.sleep(0.01)
+    keyframe = clients[0].sent[0]
+
+    data = fleet(499, moved={3, 7})
+    data['flights'].append({'id': 900, 'lat': 5.0, 'speed': 0})
+    await manager.broadcast(data)
+    await asyncio.sleep(0.01)
+
+    assert 'timestamp' not in data
+    delta = json.loads(clients[0].sent[1])
+    assert delta['type'] == 'delta' and delta['seq'] == json.loads(keyframe)['seq'] + 1
+    assert [flight['id'] for flight in delta['changed']] == [3, 7]
+    assert [flight['id'] for flight in delta['added']] == [900]
+    assert delta['removed'] == [499]
+    assert len(clients[0].sent[1]) * 10 < len(keyframe)
+    assert all(websocket.sent[1] is clients[0].sent[1] for websocket in clients)
+    # One keyframe for all clients, one delta
+    assert manager.frames_encoded == 2
+
+    # Unchanged fleets send nothing
+    await manager.broadcast(data)
+    assert manager.sequence == delta['seq']
+
+@pytest.mark.asyncio
+async def test_congested_client_resyncs_with_keyframe_and_gets_every_alert():
+    """Test that skipped deltas turn into a keyframe while alerts are all delivered first."""
+    manager = FlightTrackingManager(send_timeout=1, keyframe_interval=100)
+    fast = FakeWebSocket()
+    slow = FakeWebSocket(delay=0.05)
+    await manager.connect(fast)
+    await manager.connect(slow)
+    await asyncio.sleep(0.1)
+
+    for update in range(5):
+        await manager.broadcast(fleet(10, moved={update}, speed=update + 1))
+        await manager.broadcast_alert({'id': update, 'title': 'Delay'})
+        await asyncio.sleep(0.005)
+    await asyncio.sleep(0.5)
+
+    fast_flights, fast_seqs = apply_frames(fast.sent)
+    slow_flights, slow_seqs = apply_frames(slow.sent)
+    slow_alerts = [frame['alert']['id'] for frame in map(json.loads, slow.sent) if frame['type'] == 'alert']
+
+    assert fast_seqs == [0, 1, 2, 3, 4, 5]
+    assert slow_flights == fast_flights == {flight['id']: flight for flight in fleet(10, moved={4}, speed=5)['flights']}
+    assert len(slow_seqs) < 5 and slow_seqs[-1] == 5
+    assert slow_alerts == [0, 1, 2, 3, 4]
+    assert manager.metrics()['resyncs'] > 0
+
+@pytest.mark.asyncio
+async def test_periodic_and_requested_keyframes():
+    manager = FlightTrackingManager(keyframe_interval=3)
+    client = FakeWebSocket()
+    await manager.connect(client)
+    await asyncio.sleep(0.005)
+
+    for update in range(6):
+        await manager.broadcast(fleet(4, moved={update % 4}))
+        await asyncio.sleep(0.005)
+    manager.resync(client)
+    await asyncio.sleep(0.01)
+
+    types = [json.loads(frame)['type'] for frame in client.sent]
+    assert types == ['keyframe', 'delta', 'delta', 'keyframe', 'delta', 'delta', 'keyframe', 'keyframe']
+    assert apply_frames(client.sent)[1] == [0, 1, 2, 3, 4, 5, 6, 6]
+
+@pytest.mark.asyncio
+async def test_client_with_too_many_pending_alerts_is_dropped():
+    manager = FlightTrackingManager(send_timeout=1, max_pending_alerts=2)
+    stuck = FakeWebSocket(delay=10)
+    await manager.connect(stuck)
+
+    for alert_id in range(4):
+        await manager.broadcast_alert({'id': alert_id})
+
+    assert manager.active_connections == []
+    assert manager.dropped_connections == 1
+
+def traffic(positions):
+    return [{'flight_id': flight_id, 'latitude': lat, 'longitude': lon} for flight_id, (lat, lon) in positions.items()]
+
+@pytest.mark.asyncio
+async def test_viewport_subscribers_receive_only_aircraft_in_view():
+    """Test that subscribed clients get deltas of their viewport's traffic while others keep the fleet stream."""
+    manager = FlightTrackingManager(keyframe_interval=100, full_detail_zoom=0)
+    madrid, paris, fleet_client = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    for websocket in (madrid, paris, fleet_client):
+        await manager.connect(websocket)
+    await manager.broadcast_traffic(traffic({'A': (40.4, -3.7), 'B': (48.9, 2.3), 'C': (-33.9, 151.2)}))
+
+    manager.subscribe(madrid, 39.0, -5.0, 42.0, -2.0, 8)
+    manager.subscribe(paris, 48.0, 1.0, 50.0, 3.5, 8)
+    await asyncio.sleep(0.01)
+    # Aircraft A flies from Madrid to Paris
+    await manager.broadcast_traffic(traffic({'A': (48.5, 2.0), 'B': (48.9, 2.4), 'C': (-33.9, 151.2)}))
+    await manager.broadcast({'flights': [{'id': 1}]})
+    await asyncio.sleep(0.01)
+
+    assert apply_frames(madrid.sent)[0] == {}
+    assert sorted(apply_frames(paris.sent)[0]) == ['A', 'B']
+    assert [json.loads(frame)['type'] for frame in madrid.sent] == ['keyframe', 'delta']
+    assert json.loads(madrid.sent[0])['viewport']['zoom'] == 8
+    assert apply_frames(fleet_client.sent)[0] == {1: {'id': 1}}
+    metrics = manager.metrics()
+    assert metrics['viewport_subscriptions'] == 2 and metrics['indexed_aircraft'] == 3
+
+    # Leaving the viewport returns to the fleet stream; unwatched viewports are discarded
+    manager.unsubscribe(madrid)
+    manager.disconnect(paris)
+    await asyncio.sleep(0.01)
+    assert json.loads(madrid.sent[-1])['flights'] == [{'id': 1}]
+    assert manager.metrics()['viewport_streams'] == 0
+
+@pytest.mark.asyncio
+async def test_nearby_viewports_share_a_stream_and_zoomed_out_views_are_thinned():
+    manager = FlightTrackingManager(keyframe_interval=100, full_detail_zoom=4)
+    positions = {f'N{i}': (45.0 + i * 0.001, 7.0 + i * 0.001) for i in range(50)}
+    positions['FAR'] = (10.0, 100.0)
+    await manager.broadcast_traffic(traffic(positions))
+    clients = [FakeWebSocket() for _ in range(3)]
+    for websocket in clients:
+        await manager.connect(websocket)
+
+    first = manager.subscribe(clients[0], 44.1, 6.1, 46.2, 8.3, 6)
+    second = manager.subscribe(clients[1], 44.2, 6.2, 46.1, 8.2, 6)
+    world = manager.subscribe(clients[2], -85, -180, 85, 180, 2)
+    await asyncio.sleep(0.01)
+
+    assert first == second and manager.metrics()['viewport_streams'] == 2
+    assert clients[0].sent[-1] is clients[1].sent[-1]
+    assert len(json.loads(clients[0].sent[-1])['flights']) == 50
+    # Zoomed out, the cluster near Turin is one aircraft
+    assert world.zoom == 2
+    assert len(json.loads(clients[2].sent[-1])['flights']) == 2
+
+@pytest.mark.asyncio
+async def test_subscribe_messages_are_parsed_and_invalid_ones_ignored():
+    manager = FlightTrackingManager()
+    original, route.flight_manager = route.flight_manager, manager
+    try:
+        client = FakeWebSocket()
+        await manager.connect(client)
+        route.handle_client_message(client, json.dumps({'type': 'subscribe', 'bounds': {'south': 91, 'west': 0, 'north': 1, 'east': 1}}))
+        route.handle_client_message(client, json.dumps({'type': 'subscribe', 'bounds': {'south': 0}}))
+        route.handle_client_message(client, 'ping')
+        assert manager.metrics()['viewport_subscriptions'] == 0
+
+        route.handle_client_message(client, json.dumps({'type': 'subscribe', 'bounds': {'south': 0, 'west': 0, 'north': 1, 'east': 1}, 'zoom': 9}))
+        assert manager.metrics()['viewport_subscriptions'] == 1
+        route.handle_client_message(client, json.dumps({'type': 'unsubscribe'}))
+        assert manager.metrics()['viewport_subscriptions'] == 0
+    finally:
+        route.flight_manager = original
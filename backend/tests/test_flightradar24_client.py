@@ -1,8 +1,10 @@
+import asyncio
 import pytest
 import responses
+import httpx
 from datetime import datetime
 from urllib.parse import quote
-from src.services.flightradar24_client import FlightRadar24Client
+from src.services.flightradar24_client import FlightRadar24Client, AsyncFlightRadar24Client, split_bounds
 
 @pytest.fixture
 def fr24_client():
@@ -205,4 +207,74 @@ def test_get_airline_details(fr24_client):
     airline_data = fr24_client.get_airline_details(airline_code)
 
     # Verify the response
-    assert airline_data == mock_response 
\ No newline at end of file
+    assert airline_data == mock_response
+
+
+def _async_client_with_transport(handler):
+    """Create an AsyncFlightRadar24Client whose requests are served by handler."""
+    client = AsyncFlightRadar24Client('test_token')
+    client.session = httpx.AsyncClient(
+        headers=client.session.headers,
+        transport=httpx.MockTransport(handler)
+    )
+    return client
+
+@pytest.mark.asyncio
+async def test_async_get_live_flights(mock_live_flights_response):
+    """Test getting live flights with the async client."""
+    requests_seen = []
+
+    def handler(request):
+        requests_seen.append(request)
+        return httpx.Response(200, json=mock_live_flights_response)
+
+    client = _async_client_with_transport(handler)
+    flights = await client.get_live_flights('50.682,46.218,14.422,22.243')
+    await client.aclose()
+
+    assert len(flights) == 1
+    assert flights[0]['flight_id'] == 'ABC123'
+    assert flights[0]['registration'] == 'N123AB'
+    assert requests_seen[0].url.path == '/api/live/flight-positions/light'
+    assert requests_seen[0].url.params['bounds'] == '50.682,46.218,14.422,22.243'
+    assert requests_seen[0].headers['Authorization'] == 'Bearer test_token'
+
+@pytest.mark.asyncio
+async def test_async_get_live_flights_error_handling():
+    """Test that the async client returns an empty list on errors."""
+    client = _async_client_with_transport(lambda request: httpx.Response(500))
+    flights = await client.get_live_flights()
+    await client.aclose()
+
+    assert flights == []
+
+def test_split_bounds():
+    """Test splitting a bounding box into a grid of tiles."""
+    tiles = split_bounds('50,46,14,22', 2, 2)
+
+    assert tiles == ['50,48,14,18', '50,48,18,22', '48,46,14,18', '48,46,18,22']
+
+@pytest.mark.asyncio
+async def test_async_get_live_flights_tiled_dedupes_and_caps_concurrency():
+    """Test that tiles are fetched concurrently, capped, and merged without duplicates."""
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        tile = request.url.params['bounds']
+        # Every tile reports the shared aircraft plus one of its own
+        return httpx.Response(200, json={'data': [{'id': 'SHARED'}, {'id': tile}]})
+
+    client = _async_client_with_transport(handler)
+    flights = await client.get_live_flights_tiled('50,46,14,22', rows=2, columns=3, max_concurrency=2)
+    await client.aclose()
+
+    ids = [flight['flight_id'] for flight in flights]
+    assert len(ids) == 7
+    assert ids.count('SHARED') == 1
+    assert peak == 2
@@ -0,0 +1,77 @@
+import os
+import pytest
+import responses
+from datetime import datetime, timedelta
+
+from src.services.historical_cache import HistoricalFlightCache
+from src.services.flightradar24_client import FlightRadar24Client
+
+PAST_DATE = datetime(2024, 3, 15)
+
+@pytest.fixture
+def cache(tmp_path):
+    return HistoricalFlightCache(directory=str(tmp_path))
+
+def test_put_and_get_round_trip(cache):
+    """Test that stored responses are read back unchanged."""
+    data = {'data': {'id': 'ABC123', 'track': [[1, 2, 3]] * 50}}
+
+    cache.put('ABC123', PAST_DATE, data)
+
+    assert cache.get('ABC123', PAST_DATE) == data
+    assert cache.get('ABC123', PAST_DATE + timedelta(days=1)) is None
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+def test_entries_are_compressed(cache):
+    """Test that entries are stored compressed."""
+    data = {'data': {'track': [[40.7128, -74.006, 35000]] * 1000}}
+
+    cache.put('ABC123', PAST_DATE, data)
+
+    path = cache._path('ABC123', PAST_DATE)
+    assert os.path.getsize(path) < len(str(data)) / 5
+
+def test_today_and_empty_responses_are_not_cached(cache):
+    """Test that mutable or failed responses are never stored."""
+    cache.put('ABC123', datetime.utcnow(), {'data': {'id': 'ABC123'}})
+    cache.put('ABC123', PAST_DATE, {})
+
+    assert cache.get('ABC123', datetime.utcnow()) is None
+    assert cache.get('ABC123', PAST_DATE) is None
+
+def test_size_cap_evicts_least_recently_read(tmp_path):
+    """Test that the oldest entries are removed once the cap is exceeded."""
+    cache = HistoricalFlightCache(directory=str(tmp_path), max_bytes=1)
+    cache.put('OLD', PAST_DATE, {'data': 'old'})
+    cache.put('NEW', PAST_DATE, {'data': 'new'})
+
+    assert cache.get('OLD', PAST_DATE) is None
+    assert cache._total_bytes <= 1
+
+def test_corrupt_entries_are_discarded(cache):
+    """Test that unreadable files are treated as misses and removed."""
+    cache.put('ABC123', PAST_DATE, {'data': 'ok'})
+    path = cache._path('ABC123', PAST_DATE)
+    with open(path, 'wb') as cache_file:
+        cache_file.write(b'not compressed')
+
+    assert cache.get('ABC123', PAST_DATE) is None
+    assert not os.path.exists(path)
+
+@responses.activate
+def test_client_serves_historical_data_from_cache(cache):
+    """Test that the client only calls the API on the first historical read."""
+    responses.add(
+        responses.GET,
+        'https://fr24api.flightradar24.com/api/flights/historical/ABC123',
+        json={'data': {'id': 'ABC123'}},
+        status=200
+    )
+    client = FlightRadar24Client('test_token', historical_cache=cache)
+
+    first = client.get_historical_flight('ABC123', PAST_DATE)
+    second = client.get_historical_flight('ABC123', PAST_DATE)
+
+    assert first == second == {'data': {'id': 'ABC123'}}
+    assert len(responses.calls) == 1
@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+
+from src.services.ingest_pipeline import IngestPipeline, Stage
+
+def _source(items):
+    async def source():
+        for index, item in enumerate(items):
+            yield item
+            if index == 0:
+                # Let the stages pick up the first item before the rest arrive
+                await asyncio.sleep(0.01)
+    return source
+
+@pytest.mark.asyncio
+async def test_items_flow_through_stages_in_order():
+    """Test that each stage's result feeds the next and None results are dropped."""
+    received = []
+
+    async def double(item):
+        return item * 2
+
+    async def skip_odd_inputs(item):
+        return item if item % 4 == 0 else None
+
+    async def sink(item):
+        received.append(item)
+
+    pipeline = IngestPipeline('fetch', _source([1, 2, 3, 4]), [
+        Stage('double', double),
+        Stage('filter', skip_odd_inputs),
+        Stage('sink', sink),
+    ])
+    await asyncio.wait_for(pipeline.run(), timeout=1)
+
+    assert received == [4, 8]
+    metrics = pipeline.metrics()
+    assert metrics['fetch']['processed'] == 4
+    assert metrics['double']['processed'] == 4
+    assert metrics['sink']['processed'] == 2
+    assert metrics['sink']['queue_depth'] == 0
+
+@pytest.mark.asyncio
+async def test_batch_stage_receives_queued_items_together():
+    """Test that a slow batching stage catches up on everything queued meanwhile."""
+    batches = []
+    release = asyncio.Event()
+
+    async def persist(items):
+        batches.append(items)
+        await release.wait()
+
+    pipeline = IngestPipeline('fetch', _source([1, 2, 3]), [Stage('persist', persist, batch=True)])
+    task = asyncio.ensure_future(pipeline.run())
+    await asyncio.sleep(0.05)
+    release.set()
+    await asyncio.wait_for(task, timeout=1)
+
+    assert batches == [[1], [2, 3]]
+
+@pytest.mark.asyncio
+async def test_latest_only_stage_drops_stale_items_and_errors_do_not_stop_it():
+    """Test conflation on a full latest-only queue and that handler errors are counted."""
+    sent = []
+    release = asyncio.Event()
+
+    async def broadcast(item):
+        await release.wait()
+        if item == 'bad':
+            raise ValueError("boom")
+        sent.append(item)
+
+    pipeline = IngestPipeline('fetch', _source(['a', 'b', 'c', 'bad']), [
+        Stage('broadcast', broadcast, queue_size=1, latest_only=True),
+    ])
+    task = asyncio.ensure_future(pipeline.run())
+    await asyncio.sleep(0.05)
+    release.set()
+    await asyncio.wait_for(task, timeout=1)
+
+    metrics = pipeline.metrics()['broadcast']
+    assert sent == ['a']
+    assert metrics['dropped'] == 2
+    assert metrics['errors'] == 1
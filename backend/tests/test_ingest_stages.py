@@ -0,0 +1,150 @@
+import pytest
+from unittest.mock import MagicMock
+
+from src.services import flight_update_service
+from src.services.change_detector import ChangeDetector
+from src.services.credit_budget import CreditBudget
+from src.services.dead_reckoning import DeadReckoningEngine
+from src.services.flight_fusion import FlightFusionEngine, FusionSource, normalize_flightradar, normalize_opensky
+from src.services.live_store import LiveTrafficStore
+from src.services.polling_scheduler import PollingRegion, PollingScheduler
+from src.services.position_smoother import PositionSmoother
+from src.services.resilience import CircuitBreaker, ResiliencePolicy
+from src.services.stale_filter import HighWaterMarks
+from src.websockets.flight_socket import FlightTrackingManager
+
+@pytest.fixture
+def ingest(monkeypatch):
+    """Fresh ingest state, serving this process's WebSocket clients directly."""
+    monkeypatch.setattr(flight_update_service, 'SHARED_SNAPSHOT_ENABLED', False)
+    monkeypatch.setattr(flight_update_service, 'live_store', LiveTrafficStore())
+    monkeypatch.setattr(flight_update_service, 'latest_live_flights', {})
+    monkeypatch.setattr(flight_update_service, 'latest_fleet_flights', {})
+    monkeypatch.setattr(flight_update_service, '_live_flight_seen_at', {})
+    monkeypatch.setattr(flight_update_service, 'change_detector', ChangeDetector())
+    monkeypatch.setattr(flight_update_service, 'live_high_water_marks', HighWaterMarks())
+    monkeypatch.setattr(flight_update_service, 'position_smoother', PositionSmoother())
+    monkeypatch.setattr(flight_update_service, 'flight_manager', FlightTrackingManager())
+    monkeypatch.setattr(flight_update_service, 'dead_reckoning', DeadReckoningEngine())
+    monkeypatch.setattr(flight_update_service, 'fleet_fix_keys', {})
+    return flight_update_service
+
+def live(flight_id, latitude=40.0, **fields):
+    return dict({'flight_id': flight_id, 'latitude': latitude, 'longitude': -3.0, 'speed': 300, 'heading': 90}, **fields)
+
+@pytest.mark.asyncio
+async def test_expired_flights_are_evicted_from_the_live_store(ingest, monkeypatch):
+    """Test that flights not reported for LIVE_FLIGHT_MAX_AGE_SECONDS leave every live view."""
+    clock = [1000.0]
+    monkeypatch.setattr(ingest.time, 'time', lambda: clock[0])
+    await ingest.diff_live_traffic(await ingest.normalize_live_traffic([live('A'), live('B')]))
+
+    clock[0] += ingest.LIVE_FLIGHT_MAX_AGE_SECONDS + 1
+    await ingest.diff_live_traffic(await ingest.normalize_live_traffic([live('A', latitude=41.0)]))
+
+    assert 'B' not in ingest.live_store and 'A' in ingest.live_store
+    assert list(ingest.latest_live_flights) == ['A']
+    assert ingest.flight_manager.metrics()['indexed_aircraft'] == 1
+
+@pytest.mark.asyncio
+async def test_fetch_stage_yields_fused_traffic_of_due_regions(ingest, monkeypatch):
+    """Test that a round fuses every provider of a region into one record per aircraft."""
+    region = PollingRegion('iberia', (36.0, -10.0, 44.0, 4.0))
+    scheduler = PollingScheduler([region], base_interval=30)
+    monkeypatch.setattr(ingest, 'polling_scheduler', scheduler)
+
+    async def flightradar():
+        return [{'flight_id': 'fr1', 'callsign': 'EAM01', 'tail_number': 'EC-ABC', 'latitude': 40.0, 'timestamp': 1000}]
+
+    async def opensky():
+        return [{'icao24': '34510a', 'callsign': 'EAM01 ', 'latitude': 40.1, 'time_position': 1060}]
+
+    engine = FlightFusionEngine([
+        FusionSource('flightradar', 2, flightradar, normalize_flightradar),
+        FusionSource('opensky', 1, opensky, normalize_opensky),
+    ])
+    monkeypatch.setattr(ingest, '_fusion_engines', {'iberia': engine})
+
+    live_flights = await ingest.fetch_live_traffic().__anext__()
+
+    assert [(flight['flight_id'], flight['latitude'], flight['timestamp']) for flight in live_flights] == [('EAM01', 40.1, 1060)]
+    assert live_flights[0]['tail_number'] == 'EC-ABC'
+    assert region.traffic == 1
+
+@pytest.mark.asyncio
+async def test_persist_stage_writes_only_the_batched_changes(ingest, monkeypatch):
+    """Test that queued rounds are merged, newest record first, without re-reading all live traffic."""
+    persisted = []
+
+    def persist(live_flights, reporting):
+        persisted.append(live_flights)
+        return {'flights': []}, [], set(), {}
+    monkeypatch.setattr(ingest, '_persist_fleet_positions', persist)
+    ingest.latest_live_flights['IDLE'] = live('IDLE')
+
+    await ingest.persist_fleet_positions([[live('A'), live('B')], [live('A', latitude=41.0)], []])
+
+    assert persisted == [[live('A', latitude=41.0), live('B')]]
+
+@pytest.mark.asyncio
+async def test_unchanged_fleet_reports_refresh_the_fix_and_are_not_projected(ingest, monkeypatch):
+    """Test that an aircraft moving less than the diff thresholds is not dead-reckoned while it reports."""
+    ingest.fleet_fix_keys[('tail_number', 'EC-ABC')] = 7
+    flight = MagicMock(id=7, flight_id='F7', tail_number='EC-ABC', current_position_lat=40.0, updated_at=None)
+
+    await ingest.diff_live_traffic(await ingest.normalize_live_traffic([live('A', tail_number='EC-ABC', timestamp=1000.0)]))
+    changed = await ingest.diff_live_traffic(
+        await ingest.normalize_live_traffic([live('A', tail_number='EC-ABC', timestamp=1500.0)])
+    )
+
+    assert changed == []
+    assert ingest.dead_reckoning.confidence(7, now=1500.0) == 1.0
+    reporting = list(ingest.latest_live_flights.values())
+    assert ingest.update_flights_from_api([flight], changed, MagicMock(), ingest.change_detector, reporting) == []
+    assert flight.current_position_lat == 40.0
+
+@pytest.mark.asyncio
+async def test_diff_stage_passes_on_rounds_without_changes(ingest):
+    """Test that the persist stage runs every round so silent fleet aircraft are projected."""
+    assert await ingest.diff_live_traffic(await ingest.normalize_live_traffic([live('A')])) == [live('A')]
+    assert await ingest.diff_live_traffic(await ingest.normalize_live_traffic([live('A')])) == []
+    assert await ingest.diff_live_traffic([]) == []
+
+@pytest.mark.asyncio
+async def test_normalize_stage_drops_reports_older_than_the_last_position(ingest):
+    """Test that provider position times, not receive times, order a flight's reports."""
+    await ingest.normalize_live_traffic([live('A', timestamp=1000.0)])
+
+    assert await ingest.normalize_live_traffic([live('A', latitude=39.0, timestamp=990.0)]) == []
+    assert len(await ingest.normalize_live_traffic([live('A', latitude=41.0, timestamp=1010.0)])) == 1
+
+    payload = ingest.live_traffic_payload(ingest.live_store.snapshot())
+    assert (payload[0]['latitude'], payload[0]['last_updated']) == (41.0, '1970-01-01T00:16:50')
+
+@pytest.mark.asyncio
+async def test_persist_stage_drops_fleet_flights_that_are_no_longer_active(ingest, monkeypatch):
+    """Test that the fleet state only holds active flights, so landed ones are reported as removed."""
+    rounds = iter([
+        ({'flights': [{'id': 1, 'status': 'EN_ROUTE'}, {'id': 2, 'status': 'EN_ROUTE'}]}, [], {1, 2}, {}),
+        ({'flights': []}, [], {1, 2}, {}),
+        ({'flights': [{'id': 1, 'status': 'LANDED'}]}, [], {2}, {}),
+    ])
+    monkeypatch.setattr(ingest, '_persist_fleet_positions', lambda live_flights, reporting: next(rounds))
+
+    assert await ingest.persist_fleet_positions([[]]) == {'flights': [{'id': 1, 'status': 'EN_ROUTE'}, {'id': 2, 'status': 'EN_ROUTE'}]}
+    assert await ingest.persist_fleet_positions([[]]) is None
+    assert await ingest.persist_fleet_positions([[]]) == {'flights': [{'id': 2, 'status': 'EN_ROUTE'}]}
+    assert list(ingest.latest_fleet_flights) == [2]
+
+@pytest.mark.asyncio
+async def test_providers_with_an_open_breaker_are_not_charged(ingest, monkeypatch):
+    """Test that a fetch that would fail fast does not spend credits."""
+    budget = CreditBudget(limit=10, shares={})
+    breaker = CircuitBreaker(failure_threshold=1)
+    monkeypatch.setattr(ingest, 'fr24_credit_budget', budget)
+    monkeypatch.setattr(ingest, 'provider_policy', lambda name: ResiliencePolicy(name, breaker=breaker))
+
+    assert await ingest._may_fetch('opensky') and await ingest._may_fetch('fr24')
+    breaker.record_failure()
+    assert not await ingest._may_fetch('fr24')
+    assert budget.spent == 1
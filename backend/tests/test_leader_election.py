@@ -0,0 +1,116 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.services.leader_election import (
+    FileLeaderLock,
+    NoLeaderLock,
+    PostgresLeaderLock,
+    create_leader_lock,
+    run_as_leader,
+)
+
+def test_file_lock_is_exclusive(tmp_path):
+    """Test that only one holder gets the file lock until it is released."""
+    path = str(tmp_path / 'ingest.lock')
+    leader, standby = FileLeaderLock(path), FileLeaderLock(path)
+
+    assert leader.try_acquire()
+    assert not standby.try_acquire()
+    leader.release()
+    assert standby.try_acquire()
+    standby.release()
+
+def test_create_leader_lock_from_env(monkeypatch, tmp_path):
+    """Test lock selection from INGEST_LEADER_LOCK."""
+    monkeypatch.setenv('INGEST_LEADER_LOCK', 'file')
+    monkeypatch.setenv('INGEST_LOCK_PATH', str(tmp_path / 'ingest.lock'))
+    assert create_leader_lock().path == str(tmp_path / 'ingest.lock')
+    assert isinstance(create_leader_lock('none'), NoLeaderLock)
+    with pytest.raises(ValueError):
+        create_leader_lock('zookeeper')
+
+@pytest.mark.asyncio
+async def test_standby_takes_over_when_leader_exits(tmp_path):
+    """Test that exactly one task runs at a time and the standby runs after the leader."""
+    path = str(tmp_path / 'ingest.lock')
+    running = []
+    finish_leader = asyncio.Event()
+
+    async def ingest(name):
+        running.append(name)
+        if name == 'first':
+            await finish_leader.wait()
+
+    first = asyncio.ensure_future(run_as_leader(lambda: ingest('first'), FileLeaderLock(path), retry_interval=0.01))
+    await asyncio.sleep(0.05)
+    second = asyncio.ensure_future(run_as_leader(lambda: ingest('second'), FileLeaderLock(path), retry_interval=0.01))
+    await asyncio.sleep(0.05)
+    assert running == ['first']
+
+    finish_leader.set()
+    await asyncio.wait_for(asyncio.gather(first, second), timeout=1)
+    assert running == ['first', 'second']
+
+class LosableLock:
+    """Lock whose holder can be told it lost the lock, like a dropped database session."""
+
+    def __init__(self):
+        self.held = False
+        self.lost = False
+        self.acquisitions = 0
+
+    def try_acquire(self) -> bool:
+        self.held = True
+        self.lost = False
+        self.acquisitions += 1
+        return True
+
+    def verify(self) -> bool:
+        return self.held and not self.lost
+
+    def release(self):
+        self.held = False
+
+@pytest.mark.asyncio
+async def test_leader_steps_down_when_its_lock_is_lost():
+    """Test that a lost lock cancels the task and the process runs for election again."""
+    lock = LosableLock()
+    runs = []
+    cancelled = asyncio.Event()
+
+    async def ingest():
+        runs.append(lock.acquisitions)
+        if len(runs) == 1:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+    leader = asyncio.ensure_future(run_as_leader(ingest, lock, retry_interval=0.01, check_interval=0.01))
+    await asyncio.sleep(0.05)
+    lock.lost = True
+    await asyncio.wait_for(leader, timeout=1)
+
+    assert cancelled.is_set()
+    assert runs == [1, 2]
+    assert not lock.held
+
+def test_postgres_lock_is_lost_with_its_connection():
+    """Test that a failing pg_locks check discards the connection so the lock counts as lost."""
+    connection = MagicMock()
+    connection.execute.return_value.scalar.return_value = True
+    engine = MagicMock()
+    engine.connect.return_value.execution_options.return_value = connection
+    lock = PostgresLeaderLock(engine, lock_id=(1 << 32) + 5)
+
+    assert lock.try_acquire() and lock.verify()
+    engine.connect.return_value.execution_options.assert_called_once_with(isolation_level="AUTOCOMMIT")
+    assert connection.execute.call_args[0][1] == {'classid': 1, 'objid': 5}
+
+    connection.execute.side_effect = RuntimeError("server closed the connection unexpectedly")
+    assert not lock.verify()
+    assert not lock.held
+    connection.close.assert_called_once()
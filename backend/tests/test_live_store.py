@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from src.services.live_store import LiveTrafficStore
+
+@pytest.fixture
+def store():
+    """Create a small store so tests exercise array growth."""
+    store = LiveTrafficStore(capacity=2)
+    for received_at, record in (
+        (100.0, {'flight_id': 'F1', 'latitude': 40.0, 'longitude': -74.0, 'altitude': 30000,
+                 'speed': 450, 'heading': 90, 'status': 'EN_ROUTE', 'tail_number': 'N1', 'timestamp': 95.0}),
+        (200.0, {'flight_id': 'F2', 'latitude': 51.5, 'longitude': -0.4, 'altitude': 0,
+                 'speed': 0, 'heading': 0, 'status': 'LANDED', 'registration': 'G-ABCD', 'timestamp': 195.0}),
+        (300.0, {'flight_id': 'F3', 'latitude': 41.0, 'longitude': -73.0, 'altitude': 12000,
+                 'speed': 300, 'heading': 180, 'status': 'EN_ROUTE', 'timestamp': 295.0}),
+    ):
+        store.upsert_many([record], received_at=received_at)
+    return store
+
+def test_upsert_inserts_and_updates(store):
+    """Test that upserts add new rows and update existing ones in place."""
+    assert len(store) == 3
+
+    store.upsert('F1', {'latitude': 40.5})
+
+    records = {record['flight_id']: record for record in store.snapshot().to_records()}
+    assert records['F1']['latitude'] == 40.5
+    assert records['F1']['longitude'] == -74.0
+    assert records['F1']['tail_number'] == 'N1'
+    assert records['F2']['tail_number'] == 'G-ABCD'
+    assert records['F3']['tail_number'] is None
+
+def test_filter_by_bounds_and_status(store):
+    """Test vectorized filtering."""
+    snapshot = store.snapshot()
+
+    in_box = snapshot.filter(bounds=(39.0, -75.0, 42.0, -72.0))
+    en_route = snapshot.filter(status=['EN_ROUTE'])
+    recent = snapshot.filter(since=150.0)
+
+    assert sorted(snapshot.ids[i] for i in in_box) == ['F1', 'F3']
+    assert sorted(snapshot.ids[i] for i in en_route) == ['F1', 'F3']
+    assert sorted(snapshot.ids[i] for i in recent) == ['F2', 'F3']
+
+def test_remove_keeps_rows_dense(store):
+    """Test that removing a row moves the last row into its slot."""
+    assert store.remove('F1')
+    assert not store.remove('F1')
+
+    records = {record['flight_id']: record for record in store.snapshot().to_records()}
+    assert set(records) == {'F2', 'F3'}
+    assert records['F3']['latitude'] == 41.0
+
+    store.upsert('F4', {'latitude': 1.0})
+    records = {record['flight_id']: record for record in store.snapshot().to_records()}
+    assert records['F4']['heading'] is None
+
+def test_evict_older_than(store):
+    """Test evicting stale flights."""
+    assert store.evict_older_than(250.0) == 2
+    assert store.snapshot().ids == ['F3']
+
+def test_snapshot_is_shared_and_read_only(store):
+    """Test that snapshots are cached per version and cannot be modified."""
+    first = store.snapshot()
+    assert store.snapshot() is first
+    with pytest.raises(ValueError):
+        first.columns['latitude'][0] = 0.0
+
+    store.upsert('F1', {'speed': 500})
+    second = store.snapshot()
+    assert second is not first
+    assert first.columns['speed'][first.ids.index('F1')] == 450
+
+def test_snapshots_share_vocab_and_departed_values_are_compacted(store):
+    """Test that vocabularies are shared until they change and shrink once flights leave."""
+    first = store.snapshot()
+    store.upsert('F1', {'speed': 500})
+    assert store.snapshot().vocab['tail_number'] is first.vocab['tail_number']
+
+    for number in range(200):
+        store.upsert(f'X{number}', {'tail_number': f'N{number}X'})
+        store.remove(f'X{number}')
+    snapshot = store.snapshot()
+
+    assert snapshot.vocab['tail_number'] == ('N1', 'G-ABCD')
+    assert len(snapshot.filter(status=['EN_ROUTE'])) == 2
+    records = {record['flight_id']: record for record in snapshot.to_records()}
+    assert (records['F1']['tail_number'], records['F2']['tail_number']) == ('N1', 'G-ABCD')
+    assert first.to_records()[1]['tail_number'] == 'G-ABCD'
+
+def test_provider_time_is_kept_apart_from_receive_time(store):
+    """Test that staleness compares provider times only, never the receive time."""
+    # Provider time lags the receive time but is newer than the last report
+    assert store.upsert('F1', {'latitude': 40.1, 'timestamp': 99.0}, received_at=400.0) is not None
+    assert store.upsert('F1', {'latitude': 39.0, 'timestamp': 97.0}, received_at=410.0) is None
+
+    record = next(record for record in store.snapshot().to_records() if record['flight_id'] == 'F1')
+    assert (record['latitude'], record['timestamp'], record['position_timestamp']) == (40.1, 400.0, 99.0)
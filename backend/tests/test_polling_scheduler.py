@@ -0,0 +1,75 @@
+import pytest
+from datetime import datetime, timezone
+
+from src.services.polling_scheduler import PollingScheduler, PollingRegion, parse_regions
+
+# 12:00 UTC, daytime at longitude 0
+NOON = datetime(2024, 3, 15, 12, 0, tzinfo=timezone.utc).timestamp()
+# 02:00 UTC, night at longitude 0
+NIGHT = datetime(2024, 3, 15, 2, 0, tzinfo=timezone.utc).timestamp()
+
+@pytest.fixture
+def scheduler():
+    return PollingScheduler(
+        regions=[PollingRegion('uk', (49.0, -8.0, 59.0, 2.0)), PollingRegion('spain', (36.0, -9.0, 43.0, 3.0))],
+        base_interval=30,
+        min_interval=10,
+        max_interval=300,
+        busy_threshold=50,
+        clock=lambda: NOON
+    )
+
+def test_all_regions_due_initially(scheduler):
+    """Test that every region is polled on the first cycle."""
+    assert [region.name for region in scheduler.due_regions()] == ['uk', 'spain']
+
+def test_fleet_regions_polled_fastest(scheduler):
+    """Test interval selection for fleet, busy and quiet regions."""
+    uk, spain = scheduler.regions
+
+    scheduler.record_poll(uk, traffic=10, fleet_airborne=1, now=NOON)
+    scheduler.record_poll(spain, traffic=200, now=NOON)
+
+    assert uk.interval == 10
+    assert spain.interval == 30
+
+    scheduler.record_poll(spain, traffic=5, now=NOON)
+    assert spain.interval == 60
+
+def test_quiet_regions_back_off_at_night(scheduler):
+    """Test that night hours lengthen the interval, except for fleet regions."""
+    uk, spain = scheduler.regions
+
+    scheduler.record_poll(spain, traffic=5, now=NIGHT)
+    scheduler.record_poll(uk, traffic=5, fleet_airborne=2, now=NIGHT)
+
+    assert spain.interval == 120
+    assert uk.interval == 10
+
+def test_seconds_until_next(scheduler):
+    """Test that the scheduler reports when the next region is due."""
+    uk, spain = scheduler.regions
+    scheduler.record_poll(uk, traffic=100, now=NOON)
+    scheduler.record_poll(spain, traffic=100, fleet_airborne=1, now=NOON)
+
+    assert scheduler.seconds_until_next(now=NOON) == 10
+    assert [region.name for region in scheduler.due_regions(now=NOON + 10)] == ['spain']
+
+def test_due_regions_put_fleet_regions_first():
+    """Test that regions with our fleet airborne are charged to the credit budget first."""
+    uk = PollingRegion('uk', (49.0, -8.0, 59.0, 2.0))
+    spain = PollingRegion('spain', (36.0, -9.0, 43.0, 3.0))
+    uk.traffic = 100
+    spain.fleet_airborne = 1
+    scheduler = PollingScheduler(regions=[uk, spain], clock=lambda: NOON)
+
+    assert [region.name for region in scheduler.due_regions()] == ['spain', 'uk']
+
+def test_parse_regions():
+    """Test parsing regions from configuration."""
+    regions = parse_regions('uk:49,-8,59,2; spain:36,-9,43,3')
+
+    assert [region.name for region in regions] == ['uk', 'spain']
+    assert regions[0].bounds == (49.0, -8.0, 59.0, 2.0)
+    with pytest.raises(ValueError):
+        parse_regions('bad:1,2,3')
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from src.services.live_store import LiveTrafficStore
+from src.services.position_smoother import METERS_PER_DEGREE, PositionSmoother
+
+def test_filter_reduces_noise_and_estimates_velocity():
+    """Test a batch of aircraft flying north at 100 m/s with 50 m position noise."""
+    rng = np.random.default_rng(1)
+    smoother = PositionSmoother(measurement_noise=50, acceleration_noise=0.5)
+    keys = [f'F{i}' for i in range(200)]
+    start = rng.uniform(-60, 60, len(keys))
+    raw_errors, smoothed_errors = [], []
+
+    for step in range(60):
+        t = step * 5.0
+        true_lat = start + 100 * t / METERS_PER_DEGREE
+        measured = true_lat + rng.normal(0, 50 / METERS_PER_DEGREE, len(keys))
+        estimates = smoother.update(keys, measured, np.zeros(len(keys)), np.full(len(keys), t))
+        if step >= 30:
+            raw_errors.append(np.abs(measured - true_lat))
+            smoothed_errors.append(np.abs(estimates['smoothed_latitude'] - true_lat))
+
+    assert np.mean(smoothed_errors) < 0.8 * np.mean(raw_errors)
+    assert np.median(estimates['velocity_north']) == pytest.approx(100, abs=5)
+    assert np.all(np.abs(estimates['velocity_east']) < 10)
+
+def test_stale_missing_and_antimeridian_reports():
+    """Test that repeated or missing reports keep the state and longitude wraps cleanly."""
+    smoother = PositionSmoother()
+    smoother.update(['A'], [0.0], [179.999], [0.0])
+    kept = smoother.update(['A', 'B'], [np.nan, 1.0], [np.nan, 1.0], [10.0, 10.0])
+    assert kept['smoothed_longitude'][0] == pytest.approx(179.999)
+    assert kept['smoothed_latitude'][1] == 1.0
+
+    crossed = smoother.update(['A'], [0.0], [-179.999], [10.0])
+    assert abs(crossed['smoothed_longitude'][0]) > 179.99
+    assert smoother.forget('A') and len(smoother) == 1
+
+def test_smooth_writes_estimates_next_to_raw_columns():
+    """Test that the live store exposes smoothed positions and velocities."""
+    store = LiveTrafficStore()
+    smoother = PositionSmoother()
+    store.upsert('F1', {'latitude': 40.0, 'longitude': -3.0, 'timestamp': 100.0})
+
+    assert smoother.smooth(store, ['F1', 'missing']) == 1
+    record = store.snapshot().to_records()[0]
+    assert record['latitude'] == record['smoothed_latitude'] == 40.0
+    assert record['velocity_north'] == 0.0
@@ -0,0 +1,133 @@
+import asyncio
+
+import httpx
+import pytest
+import requests
+
+from src.services import resilience
+from src.services.open_sky_client import AsyncOpenSkyClient
+from src.services.resilience import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, RateLimiter, ResiliencePolicy, backoff_delay
+)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def _http_error(status: int) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(resilience.time, 'sleep', lambda seconds: None)
+
+def test_transient_errors_are_retried():
+    """Test that 503s are retried and succeed without opening the breaker."""
+    policy = ResiliencePolicy('test', rate=1000, max_retries=2)
+    outcomes = [_http_error(503), requests.exceptions.ConnectionError('reset'), {'ok': True}]
+
+    def send():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert policy.call(send) == {'ok': True}
+    assert policy.metrics()['retries'] == 2
+    assert policy.breaker.state == CLOSED
+
+def test_client_errors_are_not_retried():
+    """Test that a 404 is raised at once and does not count against the provider."""
+    policy = ResiliencePolicy('test', rate=1000, max_retries=3)
+    calls = []
+
+    def send():
+        calls.append(1)
+        raise _http_error(404)
+
+    with pytest.raises(requests.HTTPError):
+        policy.call(send)
+    assert len(calls) == 1
+    assert policy.breaker.consecutive_failures == 0
+
+def test_breaker_opens_fails_fast_and_recovers():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+    policy = ResiliencePolicy('test', rate=1000, max_retries=0, breaker=breaker)
+
+    def failing():
+        raise _http_error(500)
+
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            policy.call(failing)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        policy.call(lambda: 'not called')
+
+    # After the timeout one trial call is let through
+    clock.now = 30
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert policy.call(lambda: 'ok') == 'ok'
+    assert policy.metrics()['times_opened'] == 1 and policy.metrics()['rejected'] == 2
+
+@pytest.mark.asyncio
+async def test_cancelled_trial_does_not_keep_the_breaker_open():
+    """Test that a half-open trial cancelled mid-request lets the next trial through."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+    policy = ResiliencePolicy('test', rate=1000, max_retries=0, breaker=breaker)
+    breaker.record_failure()
+    clock.now = 30
+
+    trial = asyncio.ensure_future(policy.call_async(lambda: asyncio.sleep(10)))
+    await asyncio.sleep(0)
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+
+    async def ok():
+        return 'ok'
+
+    assert breaker.state == HALF_OPEN
+    assert await policy.call_async(ok) == 'ok'
+    assert breaker.state == CLOSED
+
+def test_rate_limiter_spaces_requests():
+    clock = FakeClock()
+    limiter = RateLimiter(rate=2, burst=2, clock=clock)
+    assert [limiter.reserve() for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    clock.now = 10
+    assert limiter.reserve() == 0.0
+    assert limiter.throttled == 2
+
+def test_backoff_is_capped_and_jittered():
+    assert backoff_delay(10, base=0.5, cap=10, rng=lambda low, high: high) == 10
+    assert 0 <= backoff_delay(1, base=0.5) <= 1.0
+
+@pytest.mark.asyncio
+async def test_async_client_keeps_empty_fallback_and_reports_breaker_state():
+    """Test that an unavailable provider still yields [] and opens the breaker."""
+    policy = ResiliencePolicy('opensky-test', rate=1000, max_retries=1, backoff_base=0.001,
+                              breaker=CircuitBreaker(failure_threshold=2))
+    client = AsyncOpenSkyClient(resilience=policy)
+    attempts = []
+
+    def handler(request):
+        attempts.append(request)
+        return httpx.Response(503)
+
+    client.session = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    assert await client.get_state_vectors() == []
+    assert await client.get_state_vectors() == []
+    await client.aclose()
+
+    assert len(attempts) == 2
+    assert client.metrics()['state'] == OPEN
@@ -0,0 +1,112 @@
+import asyncio
+import struct
+import uuid
+import pytest
+
+from src.services import shared_snapshot
+from src.services.shared_snapshot import HEADER, SharedSnapshotReader, SharedSnapshotWriter, append_alert, relay_alerts, relay_snapshots
+
+@pytest.fixture
+def segment_name():
+    name = f"test_snapshot_{uuid.uuid4().hex[:12]}"
+    yield name
+    writer = SharedSnapshotWriter(name, size=4096)
+    writer.unlink()
+    writer.close()
+
+def test_reader_sees_latest_payload(segment_name):
+    """Test publishing and reading, including before the segment exists."""
+    reader = SharedSnapshotReader(segment_name)
+    assert reader.read() is None
+
+    writer = SharedSnapshotWriter(segment_name, size=4096)
+    assert reader.read() is None
+    assert writer.publish(b'{"flights":[1]}')
+    assert reader.read_json() == {"flights": [1]}
+    assert writer.publish(b'{"flights":[]}')
+    assert reader.read() == b'{"flights":[]}'
+    assert reader.sequence == 4
+    assert not writer.publish(b'x' * 5000)
+    reader.close()
+    writer.close()
+
+def test_reader_keeps_previous_payload_during_a_write(segment_name):
+    """Test that an odd sequence number (write in progress) is never read."""
+    writer = SharedSnapshotWriter(segment_name, size=4096)
+    reader = SharedSnapshotReader(segment_name)
+    writer.publish(b'"old"')
+    assert reader.read() == b'"old"'
+
+    # Simulate a writer interrupted halfway through the next publish
+    struct.pack_into('<Q', writer._segment.buf, 0, writer.sequence + 1)
+    writer._segment.buf[HEADER.size:HEADER.size + 5] = b'"new"'
+    assert reader.read() == b'"old"'
+
+    # A new writer finishes the interrupted write and continues the sequence
+    successor = SharedSnapshotWriter(segment_name, size=4096)
+    successor.publish(b'"newer"')
+    assert reader.read() == b'"newer"'
+    reader.close()
+    writer.close()
+    successor.close()
+
+@pytest.mark.asyncio
+async def test_relay_broadcasts_new_snapshots_once(segment_name):
+    """Test that each worker relays every new snapshot to its clients once."""
+    writer = SharedSnapshotWriter(segment_name, size=4096)
+    reader = SharedSnapshotReader(segment_name)
+    received = []
+
+    class Manager:
+        async def broadcast(self, data):
+            received.append(data)
+
+    relay = asyncio.ensure_future(relay_snapshots(reader, Manager(), interval=0.01))
+    writer.publish(b'{"flights":[1]}')
+    await asyncio.sleep(0.05)
+    writer.publish(b'{"flights":[2]}')
+    await asyncio.sleep(0.05)
+    relay.cancel()
+
+    assert received == [{"flights": [1]}, {"flights": [2]}]
+    reader.close()
+    writer.close()
+
+@pytest.mark.asyncio
+async def test_alerts_from_any_worker_are_relayed_once(segment_name):
+    """Test that every worker relays each new alert of the shared log, whichever worker appended it."""
+    assert append_alert(segment_name, {'id': 1})
+    reader = SharedSnapshotReader(segment_name)
+    received = []
+
+    class Manager:
+        async def broadcast_alert(self, alert):
+            received.append(alert)
+
+    relay = asyncio.ensure_future(relay_alerts(reader, Manager(), interval=0.01))
+    await asyncio.sleep(0.02)
+    # A second worker appending to the same log continues its sequence
+    other_worker = SharedSnapshotWriter(segment_name, size=4096)
+    other_worker.publish(b'[{"sequence":1,"alert":{"id":1}},{"sequence":2,"alert":{"id":2}}]')
+    assert append_alert(segment_name, {'id': 3})
+    await asyncio.sleep(0.05)
+    relay.cancel()
+
+    assert received == [{'id': 2}, {'id': 3}]
+    assert [entry['sequence'] for entry in reader.read_json()] == [1, 2, 3]
+    reader.close()
+    other_worker.close()
+
+def test_reader_ignores_snapshots_older_than_max_age(segment_name, monkeypatch):
+    """Test that a snapshot left behind by a dead writer is not served forever."""
+    writer = SharedSnapshotWriter(segment_name, size=4096)
+    reader = SharedSnapshotReader(segment_name)
+    writer.publish(b'{"flights":[]}')
+    published_at = reader.published_at if reader.read() else None
+
+    assert reader.read(max_age=90) == b'{"flights":[]}'
+    monkeypatch.setattr(shared_snapshot.time, 'time', lambda: published_at + 91)
+    assert reader.read(max_age=90) is None
+    assert reader.read() == b'{"flights":[]}'
+    reader.close()
+    writer.close()
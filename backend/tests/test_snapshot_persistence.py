@@ -0,0 +1,45 @@
+import pytest
+
+from src.services.dead_reckoning import DeadReckoningEngine
+from src.services.live_store import LiveTrafficStore
+from src.services.snapshot_persistence import load_snapshot, save_snapshot
+
+def test_snapshot_round_trip(tmp_path):
+    """Test that live traffic, dead-reckoning fixes and the fleet payload survive a restart."""
+    path = str(tmp_path / 'live_snapshot.bin')
+    store = LiveTrafficStore()
+    store.upsert('F1', {'callsign': 'EAM01', 'latitude': 40.4, 'longitude': -3.7, 'status': 'en-route'})
+    store.upsert('F2', {'callsign': 'EAM02', 'altitude': 12000})
+    engine = DeadReckoningEngine()
+    engine.record_fix(7, 40.0, -3.0, speed=120, heading=90, timestamp=1000)
+    fleet = {'flights': [{'id': 7, 'current_position_lat': 40.0}]}
+
+    save_snapshot(path, store.snapshot(), engine.state(), fleet, saved_at=2000)
+    warm = load_snapshot(path, max_age=60, now=2030)
+
+    assert warm.saved_at == 2000
+    assert warm.fleet == fleet
+    assert warm.live.to_records() == store.snapshot().to_records()
+
+    restored_store = LiveTrafficStore(capacity=1)
+    restored_store.restore(warm.live)
+    restored_store.upsert('F3', {'callsign': 'EAM01'})
+    assert restored_store.snapshot().to_records()[0]['callsign'] == 'EAM01'
+    assert len(restored_store) == 3
+
+    restored_engine = DeadReckoningEngine()
+    restored_engine.restore(warm.dead_reckoning_keys, warm.dead_reckoning_columns)
+    assert restored_engine.project([7], now=1000)[7].longitude == pytest.approx(-3.0)
+
+def test_stale_missing_and_corrupt_snapshots_are_ignored(tmp_path):
+    """Test that only usable snapshots are loaded."""
+    path = str(tmp_path / 'live_snapshot.bin')
+    assert load_snapshot(path) is None
+
+    save_snapshot(path, LiveTrafficStore().snapshot(), DeadReckoningEngine().state(), saved_at=1000)
+    assert load_snapshot(path, max_age=60, now=2000) is None
+    assert len(load_snapshot(path, max_age=None).live) == 0
+
+    with open(path, 'wb') as snapshot_file:
+        snapshot_file.write(b'garbage')
+    assert load_snapshot(path, max_age=None) is None
@@ -0,0 +1,50 @@
+import numpy as np
+
+from src.services.spatial_index import GridIndex, Viewport, thin
+
+def brute_force(latitude, longitude, viewport):
+    inside = (latitude >= viewport.south) & (latitude <= viewport.north)
+    if viewport.crosses_antimeridian:
+        inside &= (longitude >= viewport.west) | (longitude <= viewport.east)
+    else:
+        inside &= (longitude >= viewport.west) & (longitude <= viewport.east)
+    return np.flatnonzero(inside)
+
+def test_query_matches_brute_force():
+    """Test that grid queries return exactly the points a full scan finds, including across the antimeridian."""
+    rng = np.random.default_rng(7)
+    latitude = rng.uniform(-90, 90, 5000)
+    longitude = rng.uniform(-180, 180, 5000)
+    index = GridIndex(cell_degrees=2.0)
+    index.build(latitude, longitude)
+
+    viewports = [
+        Viewport(40.2, -10.5, 55.7, 12.3, 5),
+        Viewport(-90, -180, 90, 180, 0),
+        Viewport(-20, 170, 20, -170, 4),
+        Viewport(10, 10, 10.5, 10.5, 12),
+    ]
+    for viewport in viewports:
+        assert np.array_equal(index.query(viewport), brute_force(latitude, longitude, viewport))
+
+def test_points_without_position_are_not_indexed():
+    index = GridIndex()
+    index.build([1.0, np.nan, 2.0], [1.0, 5.0, np.nan])
+
+    assert len(index) == 1
+    assert index.query(Viewport(-90, -180, 90, 180, 0)).tolist() == [0]
+
+def test_snapped_viewports_coincide():
+    a = Viewport(40.1, -3.2, 41.9, -1.1, 8).snapped(0.5)
+    b = Viewport(40.3, -3.4, 41.6, -1.4, 8).snapped(0.5)
+
+    assert a == b == Viewport(40.0, -3.5, 42.0, -1.0, 8)
+
+def test_thin_keeps_lowest_rank_per_cell():
+    latitude = np.array([0.1, 0.2, 0.3, 5.5])
+    longitude = np.array([0.1, 0.2, 0.3, 5.5])
+    rank = np.array([3, 1, 2, 0])
+
+    kept = thin(np.arange(4), latitude, longitude, 1.0, rank)
+
+    assert kept.tolist() == [1, 3]
@@ -0,0 +1,24 @@
+from src.services.live_store import LiveTrafficStore
+from src.services.stale_filter import HighWaterMarks
+
+def test_high_water_marks_reject_older_and_duplicate_updates():
+    """Test that only strictly newer updates pass and marks can be forgotten."""
+    marks = HighWaterMarks()
+    updates = [('a', 100), ('a', 90), ('b', 50), ('a', 100), ('a', 110), ('b', None)]
+
+    fresh = list(marks.filter(updates, lambda update: update[0], lambda update: update[1]))
+
+    assert fresh == [('a', 100), ('b', 50), ('a', 110), ('b', None)]
+    assert (marks.accepted, marks.rejected) == (4, 2)
+    assert marks.forget_older_than(100) == 1
+    assert marks.get('b') is None and marks.get('a') == 110
+
+def test_live_store_ignores_older_provider_timestamps():
+    """Test that the live store never moves a flight backwards in time."""
+    store = LiveTrafficStore()
+    store.upsert('F1', {'latitude': 2.0, 'timestamp': 200.0})
+
+    assert store.upsert('F1', {'latitude': 1.0, 'timestamp': 150.0}) is None
+    assert store.upsert_many([{'flight_id': 'F1', 'latitude': 1.0, 'timestamp': 190.0}]) == 0
+    assert store.snapshot().to_records()[0]['latitude'] == 2.0
+    assert store.stale_rejected == 2
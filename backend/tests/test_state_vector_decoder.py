@@ -0,0 +1,79 @@
+import json
+import pytest
+
+from src.services.state_vector_decoder import (
+    StateVector,
+    StateVectorDecoder,
+    iter_state_vectors,
+    aiter_state_vectors,
+)
+
+SAMPLE_STATES = [
+    ["4b1814", "SWR123  ", "Switzerland", 1710500000, 1710500001, 8.55, 47.45,
+     10972.8, False, 230.5, 91.2, 0.0, None, 11201.4, "1000", False, 0],
+    ["a0b1c2", None, "United States", None, 1710500002, -74.0, 40.7,
+     None, True, 0.0, None, None, [1, 2], None, None, False, 0, 3],
+]
+
+def _payload(states):
+    return json.dumps({"time": 1710500005, "states": states}).encode('utf-8')
+
+def test_decoder_parses_all_states():
+    """Test decoding a complete body in one chunk."""
+    decoder = StateVectorDecoder()
+
+    states = decoder.feed(_payload(SAMPLE_STATES))
+
+    assert decoder.done
+    assert len(states) == 2
+    assert isinstance(states[0], StateVector)
+    assert states[0].icao24 == "4b1814"
+    assert states[0].callsign == "SWR123"
+    assert states[0].latitude == 47.45
+    assert states[1].callsign is None
+    assert states[1].on_ground is True
+    assert states[1].sensors == [1, 2]
+    assert states[1].position_source == 0
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64])
+def test_decoder_handles_arbitrary_chunk_boundaries(chunk_size):
+    """Test that states split across chunks are decoded correctly."""
+    body = _payload(SAMPLE_STATES)
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+
+    states = list(iter_state_vectors(chunks))
+
+    assert [state.icao24 for state in states] == ["4b1814", "a0b1c2"]
+    assert states[0].baro_altitude == 10972.8
+
+def test_decoder_handles_multibyte_characters_split_across_chunks():
+    """Test that UTF-8 sequences split across chunks are decoded correctly."""
+    body = json.dumps({"states": [["abc123", "X", "Côte d'Ivoire"] + [None] * 14]}, ensure_ascii=False).encode('utf-8')
+
+    states = list(iter_state_vectors(body[i:i + 1] for i in range(len(body))))
+
+    assert states[0].origin_country == "Côte d'Ivoire"
+
+def test_decoder_handles_null_states():
+    """Test that an empty (null) states array yields nothing."""
+    assert list(iter_state_vectors([b'{"time": 1, "states": null}'])) == []
+
+def test_decoder_pads_short_states():
+    """Test that states with missing trailing fields are padded with None."""
+    states = list(iter_state_vectors([_payload([["abc123", "TEST"]])]))
+
+    assert states[0].callsign == "TEST"
+    assert states[0].position_source is None
+
+@pytest.mark.asyncio
+async def test_async_decoder():
+    """Test decoding from an async chunk iterator."""
+    body = _payload(SAMPLE_STATES)
+
+    async def chunks():
+        for i in range(0, len(body), 16):
+            yield body[i:i + 16]
+
+    states = [state async for state in aiter_state_vectors(chunks())]
+
+    assert len(states) == 2
@@ -0,0 +1,120 @@
+import asyncio
+import pytest
+
+from src.services.ttl_cache import AsyncTTLCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_fetch():
+    """Test that concurrent identical lookups are coalesced into one upstream call."""
+    cache = AsyncTTLCache(ttl=10)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {'id': 'ABC123'}
+
+    results = await asyncio.gather(*(cache.get_or_fetch('ABC123', fetch) for _ in range(12)))
+
+    assert calls == 1
+    assert all(result == {'id': 'ABC123'} for result in results)
+    assert cache.misses == 1
+    assert cache.hits == 0
+    assert cache.coalesced == 11
+    assert await cache.get_or_fetch('ABC123', fetch) == {'id': 'ABC123'}
+    assert cache.hits == 1
+
+@pytest.mark.asyncio
+async def test_cancelled_first_caller_does_not_fail_the_others():
+    """Test that one disconnecting client neither cancels the shared fetch nor its waiters."""
+    cache = AsyncTTLCache(ttl=10)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return {'id': 'ABC123'}
+
+    first = asyncio.ensure_future(cache.get_or_fetch('ABC123', fetch))
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(cache.get_or_fetch('ABC123', fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == {'id': 'ABC123'}
+    assert first.cancelled()
+    assert calls == 1
+    assert cache.get('ABC123') == {'id': 'ABC123'}
+
+@pytest.mark.asyncio
+async def test_entries_expire_after_ttl():
+    """Test that expired entries are fetched again."""
+    clock = FakeClock()
+    cache = AsyncTTLCache(ttl=10, clock=clock)
+    values = iter([{'v': 1}, {'v': 2}])
+
+    async def fetch():
+        return next(values)
+
+    assert await cache.get_or_fetch('key', fetch) == {'v': 1}
+    clock.now = 5
+    assert await cache.get_or_fetch('key', fetch) == {'v': 1}
+    clock.now = 11
+    assert await cache.get_or_fetch('key', fetch) == {'v': 2}
+    assert cache.stats()['misses'] == 2
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted when full."""
+    cache = AsyncTTLCache(ttl=10, max_size=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.evictions == 1
+
+@pytest.mark.asyncio
+async def test_failures_are_shared_and_not_cached():
+    """Test that a failed fetch propagates to waiters and is retried next time."""
+    cache = AsyncTTLCache(ttl=10)
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(
+        cache.get_or_fetch('key', failing),
+        cache.get_or_fetch('key', failing),
+        return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    async def succeeding():
+        return {'ok': True}
+
+    assert await cache.get_or_fetch('key', succeeding) == {'ok': True}
+
+@pytest.mark.asyncio
+async def test_empty_results_not_cached_by_default():
+    """Test that empty upstream responses are not cached."""
+    cache = AsyncTTLCache(ttl=10)
+
+    async def empty():
+        return {}
+
+    await cache.get_or_fetch('key', empty)
+    await cache.get_or_fetch('key', empty)
+
+    assert cache.misses == 2
+    assert len(cache) == 0